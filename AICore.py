@@ -1,7 +1,8 @@
 """
 Common AI utility functions for Connect Four
 """
-from typing import List, Optional
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
 
 import ConnectFour as CF
 from ConnectFour import ConnectFour as C4
@@ -42,3 +43,149 @@ def order_moves_by_heuristic(valid_cols: List[int], prefer_center: bool = True)
 		return sorted(valid_cols, key=lambda c: abs(c - center))
 	return valid_cols
 
+
+
+def principal_variation_search(board: Board, depth: int, alpha: int, beta: int, maximizing: bool, ai_piece: int,
+		evaluate: Callable[[Board, int], int], order: Callable[[List[int]], List[int]],
+		first: Optional[int] = None) -> Tuple[int, Optional[int]]:
+	"""Alpha-beta with null windows (PVS/negascout), scored for ai_piece like the strategies' minimax.
+
+	The first move in 'order' is searched with the full window; the others
+	only have to be proven no better, with a null window, and are re-searched
+	with the full window when that fails. 'first' moves one column to the
+	front of the ordering at this node (the previous iteration's best move).
+	"""
+	opp_piece = C4.player1 if ai_piece == C4.player2 else C4.player2
+
+	terminal = is_terminal_node(board)
+	if depth == 0 or terminal:
+		if terminal:
+			if CF.winning_move(board, ai_piece):
+				return 1_000_000, None
+			elif CF.winning_move(board, opp_piece):
+				return -1_000_000, None
+			else:
+				return 0, None  # draw
+		else:
+			return evaluate(board, ai_piece), None
+
+	valid_cols = get_valid_locations(board)
+	if not valid_cols:
+		return 0, None
+
+	cols = order(valid_cols)
+	if first in cols:
+		cols.remove(first)
+		cols.insert(0, first)
+
+	best_col: Optional[int] = None
+	piece = ai_piece if maximizing else opp_piece
+	value = -10**9 if maximizing else 10**9
+	for i, col in enumerate(cols):
+		child = simulate_drop(board, col, piece)
+		if child is None:
+			continue
+		if i == 0:
+			new_score, _ = principal_variation_search(child, depth - 1, alpha, beta, not maximizing, ai_piece, evaluate, order)
+		else:
+			# Null window: is this move better than the best so far?
+			lo, hi = (alpha, alpha + 1) if maximizing else (beta - 1, beta)
+			new_score, _ = principal_variation_search(child, depth - 1, lo, hi, not maximizing, ai_piece, evaluate, order)
+			if alpha < new_score < beta:
+				new_score, _ = principal_variation_search(child, depth - 1, alpha, beta, not maximizing, ai_piece, evaluate, order)
+		if maximizing:
+			if new_score > value:
+				value = new_score
+				best_col = col
+			alpha = max(alpha, value)
+		else:
+			if new_score < value:
+				value = new_score
+				best_col = col
+			beta = min(beta, value)
+		if alpha >= beta:
+			break
+	return value, best_col
+
+
+def aspiration_search(board: Board, depth: int, ai_piece: int, evaluate: Callable[[Board, int], int],
+		order: Callable[[List[int]], List[int]], window: int) -> Tuple[int, Optional[int]]:
+	"""Iterative deepening PVS with aspiration windows at the root.
+
+	Depths of the same parity as 'depth' are searched in turn (scores swing
+	between odd and even depths, as the side moving last gains a tempo), each
+	with a window of +-'window' around the previous score and the previous
+	best move first. A score outside the window only bounds the real one, so
+	that side is opened fully and the depth searched again.
+	"""
+	d = 2 - depth % 2
+	score, best_col = principal_variation_search(board, min(d, depth), -10**9, 10**9, True, ai_piece, evaluate, order)
+	for d in range(d + 2, depth + 1, 2):
+		alpha, beta = score - window, score + window
+		while True:
+			s, col = principal_variation_search(board, d, alpha, beta, True, ai_piece, evaluate, order, first=best_col)
+			if s <= alpha and alpha > -10**9:
+				alpha = -10**9
+			elif s >= beta and beta < 10**9:
+				beta = 10**9
+			else:
+				break
+		score, best_col = s, col
+	return score, best_col
+
+
+class EvalCache:
+	"""Bounded cache of static evaluations, keyed by position and piece.
+
+	Wraps a score_position(board, piece) function and is called like it.
+	It only remembers leaf scores (no depths or bounds), so it is valid for
+	any search. When full, 'policy' picks the entry to drop: "lru" (least
+	recently used) or "fifo" (oldest stored). size 0 disables caching.
+	"""
+
+	POLICIES = ("lru", "fifo")
+
+	def __init__(self, evaluate: Callable[[Board, int], int], size: int = 50_000, policy: str = "lru") -> None:
+		if policy not in self.POLICIES:
+			raise ValueError(f"unknown eviction policy {policy!r} (use one of {', '.join(self.POLICIES)})")
+		self.evaluate = evaluate
+		self.size = size
+		self.policy = policy
+		self.entries: "OrderedDict[tuple, int]" = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def __call__(self, board: Board, piece: int) -> int:
+		key = (piece, *map(tuple, board))
+		score = self.entries.get(key)
+		if score is not None:
+			self.hits += 1
+			if self.policy == "lru":
+				try:
+					self.entries.move_to_end(key)
+				except KeyError:
+					pass  # evicted meanwhile by a search in another thread
+			return score
+		self.misses += 1
+		score = self.evaluate(board, piece)
+		if self.size > 0:
+			self.entries[key] = score
+			if len(self.entries) > self.size:
+				self.entries.popitem(last=False)
+		return score
+
+	def clear(self) -> None:
+		"""Forget every score (needed after changing the evaluation weights)."""
+		self.entries.clear()
+		self.hits = self.misses = 0
+
+	def stats(self) -> Dict:
+		lookups = self.hits + self.misses
+		return {
+			"size": len(self.entries),
+			"max_size": self.size,
+			"policy": self.policy,
+			"hits": self.hits,
+			"misses": self.misses,
+			"hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+		}
@@ -2,11 +2,28 @@
 AI Strategy 2: More aggressive offense-focused strategy
 """
 import random
-from typing import List, Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 
 import ConnectFour as CF
 from ConnectFour import ConnectFour as C4
-from AICore import Board, get_valid_locations, is_terminal_node, copy_board, simulate_drop, order_moves_by_heuristic
+from AICore import (Board, get_valid_locations, is_terminal_node, copy_board, simulate_drop, order_moves_by_heuristic,
+	aspiration_search, EvalCache)
+
+# Evaluation weights (tune_weights.py fits these from self-play games)
+THREE_SCORE = 150      # Higher than AI1 (100)
+TWO_SCORE = 20         # Higher than AI1 (12)
+ONE_SCORE = 3          # Bonus for potential threats
+OPP_THREE_SCORE = -100 # Less urgent than AI1 (-120)
+OPP_TWO_SCORE = -8     # Less urgent than AI1 (-10)
+CENTER_SCORE = 10      # Higher than AI1 (6)
+ADJACENT_SCORE = 4     # Columns next to the center
+# Search: "alphabeta" (plain minimax) or "pvs" (null-window search with
+# aspiration windows of +-ASPIRATION_WINDOW around the previous depth's score)
+SEARCH = "pvs"
+ASPIRATION_WINDOW = 60
+# Leaf evaluation cache: positions kept (0 disables) and eviction ("lru" or "fifo")
+EVAL_CACHE_SIZE = 50_000
+EVAL_CACHE_POLICY = "lru"
 
 
 def evaluate_window(window: List[int], piece: int) -> int:
@@ -22,17 +39,17 @@ def evaluate_window(window: List[int], piece: int) -> int:
 	if count_piece == 4:
 		score += 100000
 	elif count_piece == 3 and count_empty == 1:
-		score += 150  # Higher than AI1 (was 100)
+		score += THREE_SCORE
 	elif count_piece == 2 and count_empty == 2:
-		score += 20   # Higher than AI1 (was 12)
+		score += TWO_SCORE
 	elif count_piece == 1 and count_empty == 3:
-		score += 3    # Bonus for potential threats
+		score += ONE_SCORE
 
 	# Defensive (less urgent than AI1)
 	if count_opp == 3 and count_empty == 1:
-		score -= 100  # Less urgent than AI1 (was -120)
+		score += OPP_THREE_SCORE
 	elif count_opp == 2 and count_empty == 2:
-		score -= 8    # Less urgent than AI1 (was -10)
+		score += OPP_TWO_SCORE
 
 	return score
 
@@ -44,14 +61,14 @@ def score_position(board: Board, piece: int) -> int:
 	# Center column priority (stronger than AI1)
 	center_col = C4.cols // 2
 	center_array = [board[r][center_col] for r in range(C4.rows)]
-	score += center_array.count(piece) * 10  # Higher than AI1 (was 6)
+	score += center_array.count(piece) * CENTER_SCORE
 
 	# Also favor columns adjacent to center
 	for offset in [1, -1]:
 		adj_col = center_col + offset
 		if 0 <= adj_col < C4.cols:
 			adj_array = [board[r][adj_col] for r in range(C4.rows)]
-			score += adj_array.count(piece) * 4
+			score += adj_array.count(piece) * ADJACENT_SCORE
 
 	# Horizontal
 	for r in range(C4.rows):
@@ -92,8 +109,13 @@ def order_moves_by_heuristic_custom(valid_cols: List[int]) -> List[int]:
 	))
 
 
-def minimax(board: Board, depth: int, alpha: int, beta: int, maximizing: bool, ai_piece: int) -> Tuple[int, Optional[int]]:
-	"""Minimax algorithm with alpha-beta pruning"""
+# score_position behind the leaf evaluation cache; the searches' default 'evaluate'
+EVAL_CACHE = EvalCache(score_position, EVAL_CACHE_SIZE, EVAL_CACHE_POLICY)
+
+
+def minimax(board: Board, depth: int, alpha: int, beta: int, maximizing: bool, ai_piece: int,
+		evaluate: Callable[[Board, int], int] = EVAL_CACHE) -> Tuple[int, Optional[int]]:
+	"""Minimax algorithm with alpha-beta pruning ('evaluate' scores the leaves)"""
 	opp_piece = C4.player1 if ai_piece == C4.player2 else C4.player2
 
 	terminal = is_terminal_node(board)
@@ -106,7 +128,7 @@ def minimax(board: Board, depth: int, alpha: int, beta: int, maximizing: bool, a
 			else:
 				return 0, None  # draw
 		else:
-			return score_position(board, ai_piece), None
+			return evaluate(board, ai_piece), None
 
 	valid_cols = get_valid_locations(board)
 	if not valid_cols:
@@ -120,7 +142,7 @@ def minimax(board: Board, depth: int, alpha: int, beta: int, maximizing: bool, a
 			child = simulate_drop(board, col, ai_piece)
 			if child is None:
 				continue
-			new_score, _ = minimax(child, depth - 1, alpha, beta, False, ai_piece)
+			new_score, _ = minimax(child, depth - 1, alpha, beta, False, ai_piece, evaluate)
 			if new_score > value:
 				value = new_score
 				best_col = col
@@ -134,7 +156,7 @@ def minimax(board: Board, depth: int, alpha: int, beta: int, maximizing: bool, a
 			child = simulate_drop(board, col, opp_piece)
 			if child is None:
 				continue
-			new_score, _ = minimax(child, depth - 1, alpha, beta, True, ai_piece)
+			new_score, _ = minimax(child, depth - 1, alpha, beta, True, ai_piece, evaluate)
 			if new_score < value:
 				value = new_score
 				best_col = col
@@ -144,7 +166,16 @@ def minimax(board: Board, depth: int, alpha: int, beta: int, maximizing: bool, a
 		return value, best_col
 
 
-def ai_choose_column(board: Board, ai_piece: int, depth: int = 6) -> int:
+def search(board: Board, depth: int, ai_piece: int, mode: Optional[str] = None,
+		evaluate: Callable[[Board, int], int] = EVAL_CACHE) -> Tuple[int, Optional[int]]:
+	"""Best score and column at 'depth' with the configured (or given) search mode"""
+	if (mode or SEARCH) == "pvs":
+		return aspiration_search(board, depth, ai_piece, evaluate, order_moves_by_heuristic_custom, ASPIRATION_WINDOW)
+	return minimax(board, depth, -10**9, 10**9, True, ai_piece, evaluate)
+
+
+def ai_choose_column(board: Board, ai_piece: int, depth: int = 6,
+		evaluate: Callable[[Board, int], int] = EVAL_CACHE) -> int:
 	"""AI Strategy 2: More aggressive, deeper search (default depth 6 vs AI1's 5)"""
 	valid_cols = get_valid_locations(board)
 	random.shuffle(valid_cols)
@@ -163,7 +194,7 @@ def ai_choose_column(board: Board, ai_piece: int, depth: int = 6) -> int:
 			return col
 
 	# 3) Search deeper with alpha-beta (deeper than AI1)
-	_, best_col = minimax(board, depth, -10**9, 10**9, True, ai_piece)
+	_, best_col = search(board, depth, ai_piece, evaluate=evaluate)
 	if best_col is None:
 		# Fallback to center preference
 		ordered = order_moves_by_heuristic_custom(get_valid_locations(board))
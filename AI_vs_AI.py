@@ -1,160 +1,135 @@
 """
-Game loop for AI vs AI (using AIStrategy1 and AIStrategy2)
+Game loop for AI vs AI (AIStrategy1 against AIStrategy2 by default, any engines from engines.py)
 """
-import sys
-from typing import Optional
-import random
+from concurrent.futures import Future
+from typing import List, Optional
 import pygame
 
 import ConnectFour as CF
 from ConnectFour import ConnectFour as C4
-from SoundManager import SoundManager
-from AIStrategy1 import ai_choose_column as ai1_choose_column
-from AIStrategy2 import ai_choose_column as ai2_choose_column
-from AICore import get_valid_locations
+from SceneManager import SceneManager
+import engines
+from game_records import DRAW, GameRecorder
 
-# ---- AI vs AI Game loop ----
-def game_loop_ai_vs_ai(ai1_depth: int = 6, ai2_depth: int = 6, delay_ms: int = 500) -> None:
+
+class AIVsAIScene(CF.BoardScene):
 	"""Watch two AIs compete against each other"""
-	pygame.init()
-	pygame.display.set_caption("Connect Four - AI vs AI")
-	screen = pygame.display.set_mode((C4.width, C4.height))
-	clock = pygame.time.Clock()
-
-	sound = SoundManager()
-	sound.play_bgm()
-
-	board = CF.create_board()
-
-	# AI1 uses player1, AI2 uses player2
-	ai1_piece = C4.player1
-	ai2_piece = C4.player2
-	turn = ai1_piece  # AI1 starts
-
-	game_over = False
-	winner: Optional[int] = None
-
-	# Back to menu button
-	button_width, button_height = 150, 40
-	button_x = C4.width - button_width - 10
-	button_y = 10
-	menu_button_rect = pygame.Rect(button_x, button_y, button_width, button_height)
-
-	# Timer for AI moves (to make it watchable)
-	last_move_time = 0
-
-	while True:
-		mouse_pos = pygame.mouse.get_pos()
-		current_time = pygame.time.get_ticks()
-
-		for event in pygame.event.get():
-			if event.type == pygame.QUIT:
-				try:
-					sound.cleanup()
-				finally:
-					pygame.quit()
-					sys.exit(0)
-			if event.type == pygame.KEYDOWN:
-				if event.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
-					sound.cleanup()
-					screen.fill(C4.bg_color)
-					pygame.display.flip()
-					return
-				if game_over and event.key == pygame.K_r:
-					# Restart
-					board = CF.create_board()
-					turn = ai1_piece
-					game_over = False
-					winner = None
-					last_move_time = current_time
-			if event.type == pygame.MOUSEBUTTONDOWN:
-				if menu_button_rect.collidepoint(event.pos):
-					sound.cleanup()
-					screen.fill(C4.bg_color)
-					pygame.display.flip()
-					return
 
+	caption = "Connect Four - AI vs AI"
+	stats_label = "AI vs AI"
+
+	def __init__(self, ai1_depth: int = 6, ai2_depth: int = 6, delay_ms: int = 500, ai1: str = "ai1", ai2: str = "ai2") -> None:
+		super().__init__()
+		self.ai1_depth = ai1_depth
+		self.ai2_depth = ai2_depth
+		self.ai1 = engines.get(ai1, depth=ai1_depth)
+		self.ai2 = engines.get(ai2, depth=ai2_depth)
+		self.delay_ms = delay_ms
+
+		# AI1 uses player1, AI2 uses player2
+		self.ai1_piece = C4.player1
+		self.ai2_piece = C4.player2
+
+		self.new_game()
+		# Timer for AI moves (to make it watchable)
+		self.last_move_time = 0
+
+	def new_game(self) -> None:
+		self.cancel_drops()
+		if self.recorder is not None:
+			self.recorder.close()
+		self.recorder = GameRecorder("ai_vs_ai", ai1=self.ai1.name, ai2=self.ai2.name, ai1_depth=self.ai1_depth, ai2_depth=self.ai2_depth)
+		self.board = CF.create_board()
+		self.turn = self.ai1_piece  # AI1 starts
+		self.game_over = False
+		self.winner: Optional[int] = None
+		# Search for the side to move; runs in the AI thread during the delay between moves
+		self.ai_future: Optional[Future] = None
+
+	def exit(self) -> None:
+		self.ai1.report("AI1")
+		self.ai2.report("AI2")
+		super().exit()
+
+	def wait_timeout(self) -> Optional[int]:
+		# Sleep until the next AI move is due unless there is input to handle
+		# (a finished search wakes the loop by itself)
+		if self.game_over or self.drops or self.ai_future is None or not self.ai_future.done():
+			return None
+		return max(0, self.last_move_time + self.delay_ms - pygame.time.get_ticks())
+
+	def handle_event(self, event: pygame.event.Event) -> None:
+		if event.type == pygame.KEYDOWN:
+			if event.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
+				self.manager.pop()
+				return
+			if self.game_over and event.key == pygame.K_r:
+				# Restart
+				self.new_game()
+				self.last_move_time = pygame.time.get_ticks()
+		if event.type == pygame.MOUSEBUTTONDOWN:
+			if self.menu_button_rect.collidepoint(event.pos):
+				self.manager.pop()
+
+	def choose_column(self, board: CF.Board, turn: int) -> int:
+		if turn == self.ai1_piece:
+			return self.ai1.choose_move(board, self.ai1_piece)
+		return self.ai2.choose_move(board, self.ai2_piece)
+
+	def _landed(self) -> None:
+		self.last_move_time = pygame.time.get_ticks()
+		if CF.winning_move(self.board, self.turn):
+			self.game_over = True
+			self.winner = self.turn
+			self.recorder.finish(self.turn)
+			self.sound.play_sfx("win")
+		elif CF.is_draw(self.board):
+			self.game_over = True
+			self.winner = None
+			self.recorder.finish(DRAW)
+			self.sound.play_sfx("draw")
+		else:
+			self.turn = self.ai2_piece if self.turn == self.ai1_piece else self.ai1_piece
+
+	def update(self) -> None:
+		self.update_animations()
+		if self.game_over or self.drops:
+			return
+		if self.ai_future is None:
+			self.ai_future = self.submit_ai(self.choose_column, [r[:] for r in self.board], self.turn)
+			return
 		# AI moves (with delay to make it watchable)
-		if not game_over and current_time - last_move_time >= delay_ms:
-			pygame.event.pump()
-			
-   
-			if turn == ai1_piece:
-				if random.random() < 0.25:
-					valid_cols = get_valid_locations(board)
-					if valid_cols:
-						col = random.choice(valid_cols)
-					else:
-						col = ai1_choose_column(board, ai1_piece, depth=ai1_depth)
-				else:
-					valid_cols = get_valid_locations(board)
-					if valid_cols:
-						col = random.choice(valid_cols)
-					else:
-						col = ai1_choose_column(board, ai1_piece, depth=ai1_depth)
-			else:
-				if random.random() < 0.25:
-					valid_cols = get_valid_locations(board)
-					if valid_cols:
-						col = random.choice(valid_cols)
-					else:
-						col = ai2_choose_column(board, ai2_piece, depth=ai2_depth)
-				else:
-					valid_cols = get_valid_locations(board)
-					if valid_cols:
-						col = random.choice(valid_cols)
-					else:
-						col = ai2_choose_column(board, ai2_piece, depth=ai2_depth)
-      
-			row = CF.get_next_open_row(board, col)
-			if row is not None:
-				# Animate the falling piece for the current AI
-				def _extra_draw_ai(surf: pygame.Surface) -> None:
-					CF.draw_button(surf, "Back to Menu", menu_button_rect, pygame.mouse.get_pos())
-				status_color = C4.player1_color if turn == C4.player1 else C4.player2_color
-				ai_label = "AI1 moving..." if turn == ai1_piece else "AI2 moving..."
-				CF.animate_falling_piece(
-					screen,
-					board,
-					col,
-					row,
-					turn,
-					clock,
-					sfx=sound,
-					extra_draw=_extra_draw_ai,
-					status_text=(ai_label, status_color),
-					speed_px_per_frame=30,
-					easing="ease_out",
-				)
-				last_move_time = pygame.time.get_ticks()
-				
-				if CF.winning_move(board, turn):
-					game_over = True
-					winner = turn
-				elif CF.is_draw(board):
-					game_over = True
-					winner = None
-				else:
-					turn = ai2_piece if turn == ai1_piece else ai1_piece
-
-		# Draw
-		CF.draw_board(screen, board)
-		CF.draw_button(screen, "Back to Menu", menu_button_rect, mouse_pos)
-
-		if game_over:
-			if winner is None:
-				CF.render_text(screen, "Draw! Press R to restart", C4.text_color, C4.cell_size // 2)
+		if not self.ai_future.done() or pygame.time.get_ticks() - self.last_move_time < self.delay_ms:
+			return
+
+		col = self.ai_future.result()
+		self.ai_future = None
+		row = CF.get_next_open_row(self.board, col)
+		if row is not None:
+			# Animate the falling piece for the current AI; the turn passes when it lands
+			self.drop(self.board, col, row, self.turn, on_land=self._landed)
+			self.recorder.move(col)
+		self.sched.request_redraw()
+
+	def draw(self, screen: pygame.Surface) -> List[pygame.Rect]:
+		if self.game_over:
+			if self.winner is None:
+				status, color = "Draw! Press R to restart", C4.text_color
 			else:
-				color = C4.player1_color if winner == C4.player1 else C4.player2_color
-				winner_name = "AI1" if winner == ai1_piece else "AI2"
-				CF.render_text(screen, f"{winner_name} wins! Press R", color, C4.cell_size // 2)
+				color = C4.player1_color if self.winner == C4.player1 else C4.player2_color
+				winner_name = "AI1" if self.winner == self.ai1_piece else "AI2"
+				status = f"{winner_name} wins! Press R"
 		else:
-			current_ai = "AI1" if turn == ai1_piece else "AI2"
-			color = C4.player1_color if turn == C4.player1 else C4.player2_color
-			CF.render_text(screen, f"{current_ai} thinking...", color, C4.cell_size // 2)
+			current_ai = "AI1" if self.turn == self.ai1_piece else "AI2"
+			color = C4.player1_color if self.turn == C4.player1 else C4.player2_color
+			status = f"{current_ai} thinking..."
 
-		pygame.display.flip()
-		clock.tick(C4.fps)
+		return self.draw_board(screen, self.board, status, color)
+
+
+def game_loop_ai_vs_ai(ai1_depth: int = 6, ai2_depth: int = 6, delay_ms: int = 500) -> None:
+	"""Watch two AIs compete against each other"""
+	SceneManager.instance().run(AIVsAIScene(ai1_depth, ai2_depth, delay_ms))
 
 
 def main() -> None:
@@ -0,0 +1,200 @@
+"""
+Compact incremental Connect Four board (bitboard) used where the pygame
+board lists are too heavy, e.g. for per-room state on the server.
+
+Layout: each column takes ``rows + 1`` bits (the extra bit is a sentinel),
+bit ``col * (rows + 1) + height`` is set when that cell is occupied. Playing
+a move and checking for a win are a handful of integer operations, so no full
+board scan is ever needed.
+
+Move strings use 1-based column digits ("4453" = columns 3, 3, 4, 2 in the
+0-based convention of ConnectFour.py).
+"""
+from typing import List, Optional
+
+ROWS = 6
+COLS = 7
+H1 = ROWS + 1
+EMPTY = 0
+PLAYER1 = 1
+PLAYER2 = 2
+
+BOTTOM_MASK = sum(1 << (c * H1) for c in range(COLS))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROWS) - 1)
+
+
+def alignment(pos: int) -> bool:
+    """Return True if the stones in 'pos' contain four in a row."""
+    # Horizontal, vertical, diagonal (/) and diagonal (\)
+    for shift in (H1, 1, H1 + 1, H1 - 1):
+        m = pos & (pos >> shift)
+        if m & (m >> (2 * shift)):
+            return True
+    return False
+
+
+class BitBoard:
+    rows = ROWS
+    cols = COLS
+
+    def __init__(self) -> None:
+        self.position = [0, 0, 0]  # indexed by piece (1 or 2); slot 0 unused
+        self.mask = 0
+        self.heights = [c * H1 for c in range(COLS)]  # next free bit per column
+        self.count = 0
+        self.moves: List[int] = []
+        self.winner: Optional[int] = None
+
+    # ---- Construction ----
+    @classmethod
+    def from_moves(cls, moves: str) -> "BitBoard":
+        """Build a position from a 1-based move string; raises ValueError on illegal moves."""
+        bb = cls()
+        for ch in moves.strip():
+            if not ch.isdigit():
+                raise ValueError(f"invalid move character {ch!r}")
+            col = int(ch) - 1
+            if bb.is_over() or not bb.can_play(col):
+                raise ValueError(f"illegal move {ch} at ply {bb.count}")
+            bb.play(col)
+        return bb
+
+    @classmethod
+    def from_board(cls, board: List[List[int]]) -> "BitBoard":
+        """Build a position from a ConnectFour board list (row 0 is the top row).
+
+        The move history is unknown, so 'moves' stays empty.
+        """
+        bb = cls()
+        for c in range(COLS):
+            for r in range(ROWS - 1, -1, -1):
+                cell = board[r][c]
+                if cell == EMPTY:
+                    break
+                bit = 1 << bb.heights[c]
+                bb.position[cell] |= bit
+                bb.mask |= bit
+                bb.heights[c] += 1
+                bb.count += 1
+        for piece in (PLAYER1, PLAYER2):
+            if alignment(bb.position[piece]):
+                bb.winner = piece
+        return bb
+
+    def copy(self) -> "BitBoard":
+        bb = BitBoard.__new__(BitBoard)
+        bb.position = self.position[:]
+        bb.mask = self.mask
+        bb.heights = self.heights[:]
+        bb.count = self.count
+        bb.moves = self.moves[:]
+        bb.winner = self.winner
+        return bb
+
+    # ---- Queries ----
+    @property
+    def current_piece(self) -> int:
+        return PLAYER1 if self.count % 2 == 0 else PLAYER2
+
+    def can_play(self, col: int) -> bool:
+        return 0 <= col < COLS and self.heights[col] < col * H1 + ROWS
+
+    def valid_moves(self) -> List[int]:
+        return [c for c in range(COLS) if self.heights[c] < c * H1 + ROWS]
+
+    def is_full(self) -> bool:
+        return self.count >= ROWS * COLS
+
+    def is_over(self) -> bool:
+        return self.winner is not None or self.count >= ROWS * COLS
+
+    def is_winning_move(self, col: int) -> bool:
+        """Would playing 'col' win for the side to move? (col must be playable)"""
+        piece = self.current_piece
+        return alignment(self.position[piece] | (1 << self.heights[col]))
+
+    def key(self) -> int:
+        """Unique integer key for the position (independent of move order)."""
+        return self.position[PLAYER1] + self.mask + BOTTOM_MASK
+
+    def move_string(self) -> str:
+        return "".join(str(c + 1) for c in self.moves)
+
+    # ---- Updates ----
+    def play(self, col: int) -> int:
+        """Drop the side to move's piece into 'col' and return the ConnectFour row index.
+
+        The caller is responsible for checking can_play() first.
+        """
+        piece = self.current_piece
+        bit = 1 << self.heights[col]
+        row = ROWS - 1 - (self.heights[col] - col * H1)
+        self.position[piece] |= bit
+        self.mask |= bit
+        self.heights[col] += 1
+        self.count += 1
+        self.moves.append(col)
+        if alignment(self.position[piece]):
+            self.winner = piece
+        return row
+
+    def undo(self) -> int:
+        """Take back the last move (only for positions built by play/from_moves)."""
+        col = self.moves.pop()
+        self.count -= 1
+        self.heights[col] -= 1
+        bit = 1 << self.heights[col]
+        self.position[self.current_piece] &= ~bit
+        self.mask &= ~bit
+        self.winner = None
+        return col
+
+    # ---- Conversion ----
+    def to_board(self) -> List[List[int]]:
+        """Return the position as a ConnectFour board list (row 0 is the top row)."""
+        board = [[EMPTY] * COLS for _ in range(ROWS)]
+        for c in range(COLS):
+            for h in range(ROWS):
+                bit = 1 << (c * H1 + h)
+                if self.position[PLAYER1] & bit:
+                    board[ROWS - 1 - h][c] = PLAYER1
+                elif self.position[PLAYER2] & bit:
+                    board[ROWS - 1 - h][c] = PLAYER2
+        return board
+
+
+def self_test() -> None:
+    # Vertical win for player 1
+    bb = BitBoard.from_moves("1212121")
+    assert bb.winner == PLAYER1
+
+    # Horizontal wins
+    bb = BitBoard.from_moves("1122334")
+    assert bb.winner == PLAYER1
+    bb = BitBoard.from_moves("71122334")
+    assert bb.winner == PLAYER2
+
+    # Diagonal (/) win for player 1
+    bb = BitBoard.from_moves("12234334544")
+    assert bb.winner == PLAYER1
+
+    # Round trip through the board list representation
+    bb = BitBoard.from_moves("4453677")
+    again = BitBoard.from_board(bb.to_board())
+    assert again.key() == bb.key() and again.count == bb.count
+
+    # Column full
+    bb = BitBoard.from_moves("111111")
+    assert not bb.can_play(0) and bb.valid_moves() == [1, 2, 3, 4, 5, 6]
+
+    # Undo restores the previous position
+    before = BitBoard.from_moves("445")
+    bb = BitBoard.from_moves("4453")
+    bb.undo()
+    assert bb.key() == before.key()
+
+    print("BitBoard self-tests passed.")
+
+
+if __name__ == "__main__":
+    self_test()
@@ -1,11 +1,20 @@
-import sys
+import random
 import argparse
-from typing import List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Collection, List, Optional, Sequence, Set, Tuple
 
 import pygame
 from pygame import Rect
+import fonts
 from SoundManager import SoundManager
-from network import Network
+from BitBoard import BitBoard
+from game_records import DRAW, GameRecorder
+from FrameScheduler import FrameScheduler
+from SceneManager import Scene, SceneManager
+from animation import Animator, Tween
+
+if TYPE_CHECKING:
+    from network import Network  # online scenes are handed a connected Network
 
 
 class ConnectFour:
@@ -104,30 +113,193 @@ def is_draw(board: Board) -> bool:
     return all(board[0][c] != ConnectFour.empty_cell for c in range(ConnectFour.cols))
 
 
+class BoardRenderer:
+    """Draws the board from pre-rendered surfaces and repaints only what changed.
+
+    The static art is built once per process and shared by all renderers:
+      - back:  background colour with dark holes where the cells are
+      - front: the blue board with transparent (alpha-cut) holes
+      - one sprite per piece colour
+    A cell is composited as back -> piece -> front, so falling pieces pass
+    behind the board. Each renderer remembers what it last put on screen and
+    returns the dirty rects to hand to pygame.display.update().
+    """
+
+    _back: Optional[pygame.Surface] = None
+    _front: Optional[pygame.Surface] = None
+    _sprites: dict = {}
+
+    top_bar_rect = Rect(0, 0, ConnectFour.width, ConnectFour.cell_size)
+
+    def __init__(self) -> None:
+        if BoardRenderer._back is None:
+            BoardRenderer._build_surfaces()
+        self._shown: Optional[Board] = None  # board as last drawn
+        self._status_key = None  # (text, color, hover, button rect) as last drawn
+        self._drop_cols: Set[int] = set()  # columns drawn with a falling piece last frame
+
+    @classmethod
+    def _build_surfaces(cls) -> None:
+        cs = ConnectFour.cell_size
+        hole_radius = cs // 2 - 8
+        piece_radius = cs // 2 - 12
+
+        back = pygame.Surface((ConnectFour.width, ConnectFour.height))
+        back.fill(ConnectFour.bg_color)
+        front = pygame.Surface(ConnectFour.board_rect.size, pygame.SRCALPHA)
+        pygame.draw.rect(front, ConnectFour.board_color, front.get_rect(), border_radius=8)
+        for r in range(ConnectFour.rows):
+            for c in range(ConnectFour.cols):
+                cx = c * cs + cs // 2
+                pygame.draw.circle(back, ConnectFour.hole_color, (cx, (r + 1) * cs + cs // 2), hole_radius)
+                pygame.draw.circle(front, (0, 0, 0, 0), (cx, r * cs + cs // 2), hole_radius)
+
+        sprites = {}
+        for piece, color in ((ConnectFour.player1, ConnectFour.player1_color),
+                             (ConnectFour.player2, ConnectFour.player2_color)):
+            sprite = pygame.Surface((cs, cs), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, color, (cs // 2, cs // 2), piece_radius)
+            sprites[piece] = sprite
+
+        # Match the display pixel format when there is one (much faster blits)
+        if pygame.display.get_surface() is not None:
+            back = back.convert()
+            front = front.convert_alpha()
+            sprites = {k: v.convert_alpha() for k, v in sprites.items()}
+        cls._back, cls._front, cls._sprites = back, front, sprites
+
+    @staticmethod
+    def cell_rect(row: int, col: int) -> Rect:
+        cs = ConnectFour.cell_size
+        return Rect(col * cs, (row + 1) * cs, cs, cs)
+
+    def invalidate(self) -> None:
+        """Forget what is on screen; the next render() repaints everything."""
+        self._shown = None
+        self._status_key = None
+
+    def sprite(self, piece: int) -> pygame.Surface:
+        return self._sprites[piece]
+
+    def _paint_cell(self, screen: pygame.Surface, row: int, col: int, piece: int) -> Rect:
+        rect = self.cell_rect(row, col)
+        screen.blit(self._back, rect, rect)
+        if piece != ConnectFour.empty_cell:
+            screen.blit(self._sprites[piece], rect)
+        screen.blit(self._front, rect, rect.move(0, -ConnectFour.board_rect.top))
+        return rect
+
+    def render(self, screen: pygame.Surface, board: Board, hidden: Collection[Tuple[int, int]] = ()) -> List[Rect]:
+        """Bring the board on screen up to date; returns the rects that changed.
+
+        Cells in 'hidden' (row, col) are drawn empty: their pieces are still falling.
+        """
+        empty = ConnectFour.empty_cell
+        if self._shown is None:
+            screen.blit(self._back, (0, 0))
+            shown = [row[:] for row in board]
+            for r, c in hidden:
+                shown[r][c] = empty
+            for r in range(ConnectFour.rows):
+                for c in range(ConnectFour.cols):
+                    if shown[r][c] != empty:
+                        screen.blit(self._sprites[shown[r][c]], self.cell_rect(r, c))
+            screen.blit(self._front, ConnectFour.board_rect)
+            self._shown = shown
+            self._status_key = None  # the top bar was painted over too
+            return [screen.get_rect()]
+
+        dirty = []
+        shown = self._shown
+        for r in range(ConnectFour.rows):
+            for c in range(ConnectFour.cols):
+                piece = empty if (r, c) in hidden else board[r][c]
+                if piece != shown[r][c]:
+                    dirty.append(self._paint_cell(screen, r, c, piece))
+                    shown[r][c] = piece
+        return dirty
+
+    def render_column(self, screen: pygame.Surface, board: Board, col: int,
+                      falling: Optional[Sequence[Tuple[int, float]]] = None,
+                      hidden: Collection[Tuple[int, int]] = ()) -> Rect:
+        """Repaint one column of the board, optionally with pieces (piece, center_y) falling behind it."""
+        cs = ConnectFour.cell_size
+        rect = Rect(col * cs, ConnectFour.board_rect.top, cs, ConnectFour.board_rect.height)
+        screen.set_clip(rect)
+        screen.blit(self._back, rect, rect)
+        for piece, y in falling or ():
+            screen.blit(self._sprites[piece], (col * cs, int(y) - cs // 2))
+        for r in range(ConnectFour.rows):
+            piece = ConnectFour.empty_cell if (r, col) in hidden else board[r][col]
+            if piece != ConnectFour.empty_cell:
+                screen.blit(self._sprites[piece], self.cell_rect(r, col))
+            if self._shown is not None:
+                self._shown[r][col] = piece
+        screen.blit(self._front, rect, rect.move(0, -ConnectFour.board_rect.top))
+        screen.set_clip(None)
+        return rect
+
+    def render_drops(self, screen: pygame.Surface, board: Board, drops: Sequence['PieceDrop']) -> List[Rect]:
+        """Repaint the columns with falling pieces (and the columns where one just landed)."""
+        cs = ConnectFour.cell_size
+        hidden = {(d.row, d.col) for d in drops}
+        falling: dict = {}
+        for d in drops:
+            falling.setdefault(d.col, []).append((d.piece, d.y))
+        dirty = [self.render_column(screen, board, col, falling.get(col), hidden)
+                 for col in sorted(self._drop_cols | set(falling))]
+        self._drop_cols = set(falling)
+
+        # Pieces still inside the top bar are drawn over the status line; the
+        # next render_status() repaints the bar to erase them
+        bar = self.top_bar_rect
+        in_bar = [d for d in drops if d.y - cs // 2 < bar.bottom]
+        if in_bar:
+            screen.set_clip(bar)
+            for d in in_bar:
+                screen.blit(self._sprites[d.piece], (d.col * cs, int(d.y) - cs // 2))
+            screen.set_clip(None)
+            dirty.append(bar)
+            self._status_key = None
+        return dirty
+
+    def clear_top_bar(self, screen: pygame.Surface) -> Rect:
+        """Paint the empty top bar; the caller draws its own content on top."""
+        bar = self.top_bar_rect
+        screen.blit(self._back, bar, bar)
+        self._status_key = None
+        return bar
+
+    def render_status(
+        self,
+        screen: pygame.Surface,
+        text: Optional[str],
+        color: Tuple[int, int, int],
+        button_rect: Optional[Rect] = None,
+        mouse_pos: Tuple[int, int] = (0, 0),
+        force: bool = False,
+    ) -> List[Rect]:
+        """Repaint the top bar (status text and Back to Menu button) only when it changes."""
+        hover = button_rect is not None and button_rect.collidepoint(mouse_pos)
+        key = (text, color, hover, tuple(button_rect) if button_rect else None)
+        if key == self._status_key and not force:
+            return []
+        bar = self.clear_top_bar(screen)
+        self._status_key = key
+        if text:
+            render_text(screen, text, color, ConnectFour.cell_size // 2)
+        if button_rect is not None:
+            draw_button(screen, "Back to Menu", button_rect, mouse_pos)
+        return [bar]
+
+
 def draw_board(screen: pygame.Surface, board: Board) -> None:
-    screen.fill(ConnectFour.bg_color)
-
-    # Board background
-    pygame.draw.rect(screen, ConnectFour.board_color, ConnectFour.board_rect, border_radius=8)
-
-    # Cells
-    for r in range(ConnectFour.rows):
-        for c in range(ConnectFour.cols):
-            cx = c * ConnectFour.cell_size + ConnectFour.cell_size // 2
-            cy = (r + 1) * ConnectFour.cell_size + ConnectFour.cell_size // 2
-            center = (cx, cy)
-            # Holes
-            pygame.draw.circle(screen, ConnectFour.hole_color, center, ConnectFour.cell_size // 2 - 8)
-            # Pieces
-            if board[r][c] == ConnectFour.player1:
-                pygame.draw.circle(screen, ConnectFour.player1_color, center, ConnectFour.cell_size // 2 - 12)
-            elif board[r][c] == ConnectFour.player2:
-                pygame.draw.circle(screen, ConnectFour.player2_color, center, ConnectFour.cell_size // 2 - 12)
+    """Full repaint of the background and board (from the cached surfaces)."""
+    BoardRenderer().render(screen, board)
 
 
 def render_text(screen: pygame.Surface, text: str, color: Tuple[int, int, int], y: int) -> None:
-    font = pygame.font.SysFont(None, 48)
-    surf = font.render(text, True, color)
+    surf = fonts.render_text(text, 48, color)
     rect = surf.get_rect(center=(ConnectFour.width // 2, y))
     screen.blit(surf, rect)
 
@@ -137,8 +309,7 @@ def draw_button(screen: pygame.Surface, text: str, rect: Rect, mouse_pos: Tuple[
     is_hover = rect.collidepoint(mouse_pos)
     bg_color = ConnectFour.highlight_color if is_hover else (60, 60, 70)
     pygame.draw.rect(screen, bg_color, rect, border_radius=8)
-    font = pygame.font.SysFont(None, 32)
-    label = font.render(text, True, ConnectFour.text_color)
+    label = fonts.render_text(text, 32, ConnectFour.text_color)
     screen.blit(label, label.get_rect(center=rect.center))
     return rect
 
@@ -148,283 +319,392 @@ def get_col_from_mouse(x: int) -> int:
 
 
 
-def animate_falling_piece(
-    screen: pygame.Surface,
+class PieceDrop:
+    """A piece falling into (row, col).
+
+    The board already holds the piece (game logic sees every move at once);
+    renderers hide that cell until the tween finishes and the piece lands.
+    """
+
+    def __init__(self, col: int, row: int, piece: int, tween: Tween) -> None:
+        self.col = col
+        self.row = row
+        self.piece = piece
+        self.tween = tween
+
+    @property
+    def y(self) -> float:
+        return self.tween.value
+
+    @property
+    def done(self) -> bool:
+        return self.tween.done
+
+
+def start_drop(
+    animator: Animator,
     board: Board,
     col: int,
-    target_row: int,
+    row: int,
     piece: int,
-    clock: pygame.time.Clock,
     *,
     sfx: Optional[SoundManager] = None,
-    extra_draw: Optional[callable] = None,
-    status_text: Optional[Tuple[str, Tuple[int, int, int]]] = None,
+    on_land: Optional[Callable[[], None]] = None,
     speed_px_per_frame: int = 30,
     easing: str = "ease_out",
-) -> None:
-    """Animate a piece falling in column 'col' until it reaches 'target_row'.
-
-    - Does not modify the board until landing; upon landing, drops the piece and plays SFX.
-    - extra_draw: optional callback(screen) to render UI elements (e.g., buttons) during animation.
-    - status_text: optional (text, color) tuple to render during animation in the top bar.
-    - speed_px_per_frame: controls fall speed; increase for faster animation.
+) -> PieceDrop:
+    """Place 'piece' at (row, col) and start animating it falling from the top bar.
+
+    - Does not block: the animator advances the piece once per frame.
+    - On landing plays the drop SFX and calls on_land().
+    - speed_px_per_frame: fall speed at the nominal frame rate; the duration is
+      derived from it, so the fall takes the same time at any actual frame rate.
+    - easing: "ease_out" (default), "linear" or "bounce".
     """
-    # Compute pixel positions
-    cx = col * ConnectFour.cell_size + ConnectFour.cell_size // 2
-    start_y = ConnectFour.cell_size // 2  # top bar center
-    end_y = (target_row + 1) * ConnectFour.cell_size + ConnectFour.cell_size // 2
-
-    color = ConnectFour.player1_color if piece == ConnectFour.player1 else ConnectFour.player2_color
-
-    # Prepare easing helpers
-    def _clamp01(x: float) -> float:
-        return 0.0 if x < 0.0 else (1.0 if x > 1.0 else x)
-
-    def _ease_linear(t: float) -> float:
-        return t
-
-    def _ease_out_cubic(t: float) -> float:
-        # Fast, smooth ease-out
-        return 1.0 - (1.0 - t) ** 3
-
-    def _ease_out_bounce(t: float) -> float:
-        # Standard easeOutBounce (0..1)
-        n1 = 7.5625
-        d1 = 2.75
-        if t < 1 / d1:
-            return n1 * t * t
-        elif t < 2 / d1:
-            t -= 1.5 / d1
-            return n1 * t * t + 0.75
-        elif t < 2.5 / d1:
-            t -= 2.25 / d1
-            return n1 * t * t + 0.9375
-        else:
-            t -= 2.625 / d1
-            return n1 * t * t + 0.984375
-
-    if easing == "linear":
-        ease_fn = _ease_linear
-    elif easing == "bounce":
-        ease_fn = _ease_out_bounce
-    else:
-        ease_fn = _ease_out_cubic  # default "ease_out"
-
+    cs = ConnectFour.cell_size
+    start_y = cs // 2  # top bar center
+    end_y = (row + 1) * cs + cs // 2
     distance = max(0, end_y - start_y)
     # Estimate frames based on requested pixels-per-frame; derive a duration for time-based animation
     frames_est = max(1, int(distance / max(1, speed_px_per_frame)))
     duration_ms = int((frames_est / ConnectFour.fps) * 1000)
-    t0 = pygame.time.get_ticks()
-
-    y = float(start_y)
-    while y < end_y - 0.5:
-        # Handle quit events to remain responsive during animation
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit(0)
-
-        # Draw background board and UI
-        draw_board(screen, board)
-        if status_text is not None:
-            txt, colr = status_text
-            render_text(screen, txt, colr, ConnectFour.cell_size // 2)
-        if extra_draw is not None:
-            extra_draw(screen)
-
-        # Draw the falling piece overlay
-        pygame.draw.circle(screen, color, (cx, int(y)), ConnectFour.cell_size // 2 - 12)
-
-        pygame.display.flip()
-        clock.tick(ConnectFour.fps)
-        now = pygame.time.get_ticks()
-        t = _clamp01((now - t0) / max(1, duration_ms))
-        y = start_y + ease_fn(t) * distance
-
-    # Land the piece on the board and play SFX
-    drop_piece(board, target_row, col, piece)
-    if sfx is not None:
-        sfx.play_sfx()
-
 
-def game_loop(net: 'Network', my_player: int) -> None:
-    pygame.init()
-    pygame.display.set_caption(ConnectFour.title)
-    screen = pygame.display.set_mode((ConnectFour.width, ConnectFour.height))
-    clock = pygame.time.Clock()
-
-    # Initialize and start background music
-    sound = SoundManager()
-    sound.play_bgm()
-
-    board = create_board()
-    game_over = False
-    winner: Optional[int] = None
-    turn = ConnectFour.player1
-    started = False
-
-    # If player 2, wait for player 1’s first move
-    if my_player == ConnectFour.player2:
-        turn = ConnectFour.player1
-    
-    def send_move(col):
+    drop_piece(board, row, col, piece)
+
+    def _landed() -> None:
+        if sfx is not None:
+            sfx.play_sfx()
+        if on_land is not None:
+            on_land()
+
+    return PieceDrop(col, row, piece, animator.add(Tween(start_y, end_y, duration_ms, easing, on_complete=_landed)))
+
+
+# Worker thread for AI searches, shared by all board scenes (created on first use)
+_ai_executor: Optional[ThreadPoolExecutor] = None
+
+
+class BoardScene(Scene):
+    """Base for scenes that show the board: incremental renderer, falling pieces and the Back to Menu button."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.renderer = BoardRenderer()
+        self.animator = Animator()
+        self.drops: List[PieceDrop] = []
+        self.recorder: Optional[GameRecorder] = None  # the game being played, saved when it ends
+
+        # Back to menu button
+        button_width, button_height = 150, 40
+        button_x = ConnectFour.width - button_width - 10
+        button_y = 10
+        self.menu_button_rect = Rect(button_x, button_y, button_width, button_height)
+
+    def enter(self) -> None:
+        self.renderer.invalidate()
+
+    def resume(self) -> None:
+        self.renderer.invalidate()
+
+    def exit(self) -> None:
+        # Keep games that were left unfinished too
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def drop(self, board: Board, col: int, row: int, piece: int,
+             on_land: Optional[Callable[[], None]] = None, sound: bool = True, **kwargs) -> PieceDrop:
+        """Place a piece and animate its fall (see start_drop)."""
+        drop = start_drop(self.animator, board, col, row, piece, sfx=self.sound if sound else None,
+                          on_land=on_land, **kwargs)
+        self.drops.append(drop)
+        # Run frames at full rate until it lands
+        self.sched.keep_busy(drop.tween.duration_ms)
+        return drop
+
+    def submit_ai(self, fn: Callable[..., int], *args) -> Future:
+        """Run an AI search off the main loop; the loop is woken when the result is ready."""
+        global _ai_executor
+        if _ai_executor is None:
+            _ai_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="connect4-ai")
+        future = _ai_executor.submit(fn, *args)
+        future.add_done_callback(lambda _f: FrameScheduler.wake())
+        return future
+
+    def cancel_drops(self) -> None:
+        """Stop all animations (e.g. the board was replaced); pieces appear in place."""
+        self.animator.clear()
+        self.drops = []
+
+    def update_animations(self) -> None:
+        if self.drops:
+            self.animator.update()
+            self.drops = [d for d in self.drops if not d.done]
+            if self.drops:
+                # Timing jitter can leave a tween unfinished when keep_busy() runs out
+                self.sched.keep_busy(1000 // self.sched.fps)
+            else:
+                # One more frame after the last landing repaints its column
+                self.sched.request_redraw()
+
+    def draw_board(self, screen: pygame.Surface, board: Board, status: Optional[str],
+                   color: Tuple[int, int, int]) -> List[Rect]:
+        hidden = {(d.row, d.col) for d in self.drops}
+        # Repaint only changed cells and, if it changed, the top bar
+        dirty = self.renderer.render(screen, board, hidden)
+        dirty += self.renderer.render_status(screen, status, color, self.menu_button_rect, pygame.mouse.get_pos())
+        dirty += self.renderer.render_drops(screen, board, self.drops)
+        return dirty
+
+
+# Messages that describe the position as a whole; they wait until pieces in flight have landed
+_AFTER_LANDING = ("WIN:", "DRAW", "SYNC:", "RESET", "START", "ROLE:")
+
+
+class OnlineGameScene(BoardScene):
+    """Online match against another client; the server validates moves and decides wins."""
+
+    caption = ConnectFour.title
+    stats_label = "online game"
+
+    def __init__(self, net: 'Network', my_player: int) -> None:
+        super().__init__()
+        self.net = net
+        self.my_player = my_player
+        self.opp_piece = ConnectFour.player1 if my_player == ConnectFour.player2 else ConnectFour.player2
+
+        self.board = create_board()
+        self.game_over = False
+        self.winner: Optional[int] = None
+        # Player 1 always moves first; player 2 waits for the opponent's first move
+        self.turn = ConnectFour.player1
+        self.rematch = False  # READY sent; the server starts the next game once both players are
+        self.recorder = GameRecorder("online", player=my_player)
+
+    def new_game(self, turn: int) -> None:
+        self.cancel_drops()
+        self.recorder.close()
+        self.recorder = GameRecorder("online", player=self.my_player)
+        self.board = create_board()
+        self.game_over = False
+        self.winner = None
+        self.turn = turn
+        self.rematch = False
+
+    def enter(self) -> None:
+        # Network messages wake the idle loop
+        self.net.on_message = self.sched.wake
+        super().enter()
+
+    def wait_timeout(self) -> Optional[int]:
+        # One message is handled per frame; don't sleep while more are queued
+        return 0 if self.net.messages else None
+
+    def send_move(self, col: int) -> None:
         try:
-            net.send(f"MOVE:{col}")
+            self.net.send(f"MOVE:{col}")
         except Exception as e:
             print(f"Failed to send move: {e}")
 
-    
+    def request_rematch(self) -> None:
+        try:
+            self.net.send("READY")
+            self.rematch = True
+        except Exception as e:
+            print(f"Failed to request a rematch: {e}")
+
+    def quit_game(self) -> None:
+        self.net.send("QUIT")
+        self.net.close()
+        self.manager.quit()
+
+    def update(self) -> None:
+        self.update_animations()
+        if not self.net.messages:
+            return
+        if self.drops and self.net.messages[0].startswith(_AFTER_LANDING):
+            return  # e.g. announce the win once the winning piece is down
+        msg = self.net.get_message()
+        if not msg:
+            return
+        self.sched.request_redraw()
+        if msg.startswith("MOVE:"):
+            col = int(msg.split(":")[1])
+            row = get_next_open_row(self.board, col)
+            if row is not None:
+                self.drop(self.board, col, row, self.opp_piece)
+                self.recorder.move(col)
+                # Win/draw is decided by the server (WIN:/DRAW messages)
+                self.turn = self.my_player
+        elif msg.startswith("WIN:"):
+            self.game_over = True
+            self.winner = int(msg.split(":")[1])
+            self.recorder.finish(self.winner)
+            self.sound.play_sfx("win")
+        elif msg == "DRAW":
+            self.game_over = True
+            self.winner = None
+            self.recorder.finish(DRAW)
+            self.sound.play_sfx("draw")
+        elif msg.startswith("SYNC:"):
+            # Server rejected a move: rebuild the board from its authoritative move list
+            state = BitBoard.from_moves(msg.split(":", 1)[1])
+            self.board = state.to_board()
+            self.game_over = state.is_over()
+            self.winner = state.winner
+            self.turn = state.current_piece
+            self.recorder.set_moves(state.moves)
+        elif msg.startswith("ERR:"):
+            print(f"[Server] Move rejected: {msg.split(':', 1)[1]}")
+            self.sound.play_sfx("invalid")
+        elif msg == "LEFT":
+            quit_msgs = ["Opponent disconnected.", "Opponent chickened out.", "Opponent lost their wifi.", "You scared them to disconnection!"]
+            print(quit_msgs[random.randrange(0, len(quit_msgs), 1)])
+        elif msg.startswith("ROLE:"):
+            # Both players are ready: the server started the next game
+            self.my_player = int(msg.split(":")[1])
+            self.opp_piece = ConnectFour.player1 if self.my_player == ConnectFour.player2 else ConnectFour.player2
+            self.new_game(ConnectFour.player1)
+        elif msg == "RESET":
+            self.new_game(ConnectFour.player1)
+        elif msg == "QUIT":
+            self.manager.pop()
+
+    def handle_event(self, event: pygame.event.Event) -> None:
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            # Check if menu button was clicked
+            if self.menu_button_rect.collidepoint(event.pos):
+                self.manager.pop()  # Return to the lobby
+                return
+            # Handle game move (only if not clicking button and game not over)
+            if not self.game_over and self.turn == self.my_player:
+                col = get_col_from_mouse(event.pos[0])
+                row = get_next_open_row(self.board, col)
+                if row is not None:
+                    # Send right away; the piece falls while the server answers
+                    self.drop(self.board, col, row, self.my_player)
+                    self.send_move(col)
+                    self.recorder.move(col)
+
+                    # The server validates the move and announces any win/draw
+                    self.turn = self.opp_piece
+                else:
+                    self.sound.play_sfx("invalid")
+        if event.type == pygame.KEYDOWN:
+            if event.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
+                self.manager.pop()
+                return
+            if self.game_over and event.key == pygame.K_r and not self.rematch:
+                # The board is reset when the server starts the rematch (ROLE:)
+                self.request_rematch()
+            elif event.key == pygame.K_q:
+                self.quit_game()
+
+    def draw(self, screen: pygame.Surface) -> List[Rect]:
+        if self.game_over and self.rematch:
+            status, color = "Waiting for the opponent to press R...", ConnectFour.text_color
+        elif self.game_over:
+            if self.winner is None:
+                status, color = "Draw! Press R to restart", ConnectFour.text_color
+            elif self.winner == self.my_player:
+                color = ConnectFour.player1_color if self.winner == ConnectFour.player1 else ConnectFour.player2_color
+                status = "You win! Press R for a rematch"
+            else:
+                color = ConnectFour.player1_color if self.winner == ConnectFour.player1 else ConnectFour.player2_color
+                status = "You lost! Press R for a rematch"
+        else:
+            color = ConnectFour.player1_color if self.turn == ConnectFour.player1 else ConnectFour.player2_color
+            if self.turn == self.my_player:
+                status = "Your turn. Select a column to drop"
+            else:
+                status = "Opponent's turn. Be patient."
+
+        return self.draw_board(screen, self.board, status, color)
+
+
+class SpectatorScene(BoardScene):
+    """Watch a room's live move stream (read-only) until the user goes back."""
+
+    caption = f"{ConnectFour.title} - Spectating"
+    stats_label = "spectator"
+
+    def __init__(self, net: 'Network') -> None:
+        super().__init__()
+        self.net = net
+
+        self.state = BitBoard()
+        self.board = create_board()
+        self.status: Optional[str] = "Waiting for the game to start..."
 
-    # Back to menu button
-    button_width, button_height = 150, 40
-    button_x = ConnectFour.width - button_width - 10
-    button_y = 10
-    menu_button_rect = Rect(button_x, button_y, button_width, button_height)
+    def enter(self) -> None:
+        self.net.on_message = self.sched.wake
+        super().enter()
 
-    while True:
-        msg = net.get_message()
+    def wait_timeout(self) -> Optional[int]:
+        # One message is handled per frame; don't sleep while more are queued
+        return 0 if self.net.messages else None
+
+    def update(self) -> None:
+        self.update_animations()
+        msg = None
+        if self.net.messages and not (self.drops and self.net.messages[0].startswith(_AFTER_LANDING)):
+            msg = self.net.get_message()
         if msg:
-            if msg.startswith("MOVE:"):
+            self.sched.request_redraw()
+            if msg.startswith("SYNC:"):
+                self.state = BitBoard.from_moves(msg.split(":", 1)[1])
+                self.board = self.state.to_board()
+                if self.state.winner is not None:
+                    self.status = f"Player {self.state.winner} wins!"
+                elif self.state.is_full():
+                    self.status = "Draw!"
+                else:
+                    self.status = None
+            elif msg == "START":
+                self.state = BitBoard()
+                self.board = create_board()
+                self.status = None
+            elif msg.startswith("MOVE:"):
                 col = int(msg.split(":")[1])
-                opp_piece = ConnectFour.player1 if my_player == ConnectFour.player2 else ConnectFour.player2
-                row = get_next_open_row(board, col)
-                if row is not None:
-                    def _extra_draw(surf: pygame.Surface) -> None:
-                        draw_button(surf, "Back to Menu", menu_button_rect, pygame.mouse.get_pos())
-
-                    animate_falling_piece(
-                            screen,
-                            board,
-                            col,
-                            row,
-                            opp_piece,
-                            clock,
-                            sfx=sound,
-                            extra_draw=_extra_draw,
-                            status_text=None,
-                        )
-                    sound.play_sfx()
-                    if winning_move(board, opp_piece):
-                        game_over = True
-                        winner = opp_piece
-                    elif is_draw(board):
-                        game_over = True
-                    else:
-                        turn = my_player
-            
+                if self.state.can_play(col):
+                    piece = self.state.current_piece
+                    row = self.state.play(col)
+                    self.drop(self.board, col, row, piece, sound=False)
+                    self.status = None
+            elif msg.startswith("WIN:"):
+                self.status = f"Player {msg.split(':')[1]} wins!"
+                self.sound.play_sfx("win")
+            elif msg == "DRAW":
+                self.status = "Draw!"
+                self.sound.play_sfx("draw")
             elif msg == "LEFT":
-                quit_msgs = ["Opponent disconnected.", "Opponent chickened out.", "Opponent lost their wifi.", "You scared them to disconnection!"]
-                from random import randrange
-                print(quit_msgs[randrange(0, len(quit_msgs), 1)])
-            elif msg == "RESET":
-                board = create_board()
-                game_over = False
-                winner = None
-                turn = ConnectFour.player1
-            elif msg == "QUIT":
-                break
-        mouse_pos = pygame.mouse.get_pos()
-        mouse_down = False
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                try:
-                    sound.cleanup()
-                finally:
-                    net.send("QUIT")
-                    net.close()
-                    pygame.quit()
-                    sys.exit(0)
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_down = True
-                # Check if menu button was clicked
-                if menu_button_rect.collidepoint(event.pos):
-                    sound.cleanup()
-                    # Clear screen before returning to avoid game screen showing through
-                    screen.fill(ConnectFour.bg_color)
-                    pygame.display.flip()
-                    return  # Return to main menu
-                # Handle game move (only if not clicking button and game not over)
-                if not game_over and turn == my_player:
-                    col = get_col_from_mouse(event.pos[0])
-                    row = get_next_open_row(board, col)
-                    if row is not None:
-                        # Animate the falling piece, then update game state
-                        def _extra_draw(surf: pygame.Surface) -> None:
-                            # Redraw the back to menu button during animation
-                            draw_button(surf, "Back to Menu", menu_button_rect, pygame.mouse.get_pos())
-
-                        status = (
-                            (f"Your turn", ConnectFour.player1_color if turn == ConnectFour.player1 else ConnectFour.player2_color)
-                        )
-                        animate_falling_piece(
-                            screen,
-                            board,
-                            col,
-                            row,
-                            my_player,
-                            clock,
-                            sfx=sound,
-                            extra_draw=_extra_draw,
-                            status_text=status,
-                        )
-
-                        send_move(col)
-
-                        if winning_move(board, turn):
-                            game_over = True
-                            winner = my_player
-                        elif is_draw(board):
-                            game_over = True
-                            winner = None
-                        else:
-                            turn = ConnectFour.player2 if my_player == ConnectFour.player1 else ConnectFour.player1
-            if event.type == pygame.KEYDOWN:
-                if event.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
-                    # Return to main menu
-                    sound.cleanup()
-                    # Clear screen before returning to avoid game screen showing through
-                    screen.fill(ConnectFour.bg_color)
-                    pygame.display.flip()
-                    return
-                if game_over and event.key == pygame.K_r:
-                    # Restart
-                    board = create_board()
-                    game_over = False
-                    winner = None
-                    turn = randrange(1, 3, 1)
-                elif event.key in (pygame.K_ESCAPE, pygame.K_q):
-                    try:
-                        sound.cleanup()
-                    finally:
-                        net.send("QUIT")
-                        net.close()
-                        pygame.quit()
-                        sys.exit(0)
-
-        draw_board(screen, board)
-        
-        # Draw back to menu button
-        draw_button(screen, "Back to Menu", menu_button_rect, mouse_pos)
-        
-        if game_over:
-            if winner is None:
-                render_text(screen, "Draw! Press R to restart", ConnectFour.text_color, ConnectFour.cell_size // 2)
-            elif winner == my_player:
-                color = ConnectFour.player1_color if winner == ConnectFour.player1 else ConnectFour.player2_color
-                render_text(screen, "You win!", color, ConnectFour.cell_size // 2)
-            else:
-                color = ConnectFour.player1_color if winner == ConnectFour.player1 else ConnectFour.player2_color
-                render_text(screen, "You lost!", color, ConnectFour.cell_size // 2)
+                self.status = "A player left the room."
+        if not self.net.connected and not self.net.messages:
+            self.status = "Disconnected from server."
+
+    def handle_event(self, event: pygame.event.Event) -> None:
+        if event.type == pygame.MOUSEBUTTONDOWN and self.menu_button_rect.collidepoint(event.pos):
+            self.manager.pop()
+        elif event.type == pygame.KEYDOWN and event.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
+            self.manager.pop()
+
+    def draw(self, screen: pygame.Surface) -> List[Rect]:
+        if self.status is not None:
+            text, color = self.status, ConnectFour.text_color
         else:
-            color = ConnectFour.player1_color if turn == ConnectFour.player1 else ConnectFour.player2_color
-            if turn == my_player:
-                render_text(screen, "Your turn. Select a column to drop", color, ConnectFour.cell_size // 2)
-            else:
-                render_text(screen, "Opponent's turn. Be patient.", color, ConnectFour.cell_size // 2)
-        
-        pygame.display.flip()
-        clock.tick(ConnectFour.fps)
+            piece = self.state.current_piece
+            color = ConnectFour.player1_color if piece == ConnectFour.player1 else ConnectFour.player2_color
+            text = f"Spectating - Player {piece} to move"
+
+        return self.draw_board(screen, self.board, text, color)
+
+
+def game_loop(net: 'Network', my_player: int) -> None:
+    """Play an online match (standalone entry point; the lobby pushes OnlineGameScene itself)."""
+    SceneManager.instance().run(OnlineGameScene(net, my_player))
+
+
+def spectate_loop(net: 'Network') -> None:
+    SceneManager.instance().run(SpectatorScene(net))
 
 
 def self_test() -> None:
@@ -0,0 +1,121 @@
+import os
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+import pygame
+
+# Posted (from any thread) to wake a scheduler blocked in pygame.event.wait
+WAKE_EVENT = pygame.USEREVENT + 1
+
+
+class FrameScheduler:
+    """
+    Idle-aware frame pacing shared by the menus and game loops.
+
+    - While something is changing (input, animation, pending AI move, network
+      message) frames run at up to 'fps'.
+    - When nothing needs drawing, wait() blocks in pygame.event.wait() until
+      an event arrives or 'idle_timeout_ms' passes, so an idle screen costs
+      almost no CPU.
+    - Frame work times are kept for stats(); set CONNECT4_FRAME_STATS=1 to
+      print a summary whenever a loop calls report().
+
+    Typical loop:
+        events = sched.wait()
+        ... handle events, call request_redraw() when state changes ...
+        if sched.dirty:
+            ... draw ...
+            sched.frame_done()
+    """
+
+    def __init__(self, fps: int = 60, idle_timeout_ms: int = 500) -> None:
+        self.fps = fps
+        self.idle_timeout_ms = idle_timeout_ms
+        self.clock = pygame.time.Clock()
+        self.dirty = True
+        self._busy_until = 0  # pygame ticks; frames keep running until then
+        self._frame_start: Optional[float] = None
+
+        self.frame_times: Deque[float] = deque(maxlen=600)  # seconds of work per drawn frame
+        self.frames = 0
+        self.idle_waits = 0
+
+    # ---- State ----
+    def request_redraw(self) -> None:
+        self.dirty = True
+
+    def keep_busy(self, ms: int) -> None:
+        """Keep producing frames for at least 'ms' (animations, toasts, pending AI moves)."""
+        self._busy_until = max(self._busy_until, pygame.time.get_ticks() + ms)
+        self.dirty = True
+
+    def is_busy(self) -> bool:
+        return pygame.time.get_ticks() < self._busy_until
+
+    @staticmethod
+    def wake() -> None:
+        """Thread-safe: interrupt an idle wait (e.g. when a network message arrives)."""
+        try:
+            pygame.event.post(pygame.event.Event(WAKE_EVENT))
+        except pygame.error:
+            pass
+
+    # ---- Loop hooks ----
+    def wait(self, timeout_ms: Optional[int] = None) -> List[pygame.event.Event]:
+        """Return the pending events, blocking while idle.
+
+        timeout_ms caps the idle wait, e.g. until the next scheduled AI move.
+        """
+        if self.dirty or self.is_busy():
+            self.clock.tick(self.fps)
+            events = pygame.event.get()
+        else:
+            timeout = self.idle_timeout_ms if timeout_ms is None else min(timeout_ms, self.idle_timeout_ms)
+            if timeout > 0:
+                # Note: pygame.event.wait(0) would block forever, hence the guard
+                self.idle_waits += 1
+                first = pygame.event.wait(timeout)
+                events = [first] if first.type != pygame.NOEVENT else []
+                events += pygame.event.get()
+            else:
+                events = pygame.event.get()
+            self.clock.tick()  # keep the clock's notion of "last frame" current
+        if events or self.is_busy():
+            self.dirty = True
+        self._frame_start = time.perf_counter()
+        return [e for e in events if e.type != WAKE_EVENT]
+
+    def frame_done(self) -> None:
+        """Call after drawing a frame."""
+        if self._frame_start is not None:
+            self.frame_times.append(time.perf_counter() - self._frame_start)
+        self.frames += 1
+        self.dirty = False
+
+    # ---- Stats ----
+    def reset_stats(self) -> None:
+        self.frame_times.clear()
+        self.frames = 0
+        self.idle_waits = 0
+
+    def stats(self) -> dict:
+        times = sorted(self.frame_times)
+        if not times:
+            return {"frames": self.frames, "idle_waits": self.idle_waits}
+        return {
+            "frames": self.frames,
+            "idle_waits": self.idle_waits,
+            "avg_ms": 1000.0 * sum(times) / len(times),
+            "p95_ms": 1000.0 * times[min(len(times) - 1, int(0.95 * len(times)))],
+            "max_ms": 1000.0 * times[-1],
+        }
+
+    def report(self, label: str) -> None:
+        if os.environ.get("CONNECT4_FRAME_STATS"):
+            s = self.stats()
+            if "avg_ms" in s:
+                print(f"[FrameScheduler] {label}: {s['frames']} frames, {s['idle_waits']} idle waits, "
+                      f"avg {s['avg_ms']:.2f} ms, p95 {s['p95_ms']:.2f} ms, max {s['max_ms']:.2f} ms")
+            else:
+                print(f"[FrameScheduler] {label}: no frames drawn")
@@ -1,182 +1,188 @@
 """
-Game loop for Human vs AI1 (using AIStrategy1)
+Game loop for Human vs AI (AIStrategy1 by default, any engine from engines.py)
+
+While the human thinks, the AI ponders its replies to every possible human
+move in background processes (see ponder.py), so most answers are ready
+when the human's piece lands. Set CONNECT4_PONDER=0 to turn this off.
 """
-import sys
+import os
 import random
-from typing import Optional
+from concurrent.futures import Future
+from typing import List, Optional
 
 import pygame
 
 import ConnectFour as CF
 from ConnectFour import ConnectFour as C4
-from SoundManager import SoundManager
-from AIStrategy1 import ai_choose_column
-from AICore import get_valid_locations
-
-
-# ---- Game loop (Human vs AI) ----
-def game_loop_ai(depth: int = 6, flag: str = "easy") -> None:
-	pygame.init()
-	pygame.display.set_caption("Connect Four - vs AI")
-	screen = pygame.display.set_mode((C4.width, C4.height))
-	clock = pygame.time.Clock()
-
-	sound = SoundManager()
-	sound.play_bgm()
-
-	board = CF.create_board()
-
-	# Randomize who starts
-	human_piece, ai_piece = (C4.player1, C4.player2) if random.choice([True, False]) else (C4.player2, C4.player1)
-	turn = human_piece if random.choice([True, False]) else ai_piece
-
-	game_over = False
-	winner: Optional[int] = None
-
-	# Add a small handoff delay after human move so the landing frame renders
-	ai_ready_time: Optional[int] = None
-
-	# Back to menu button
-	button_width, button_height = 150, 40
-	button_x = C4.width - button_width - 10
-	button_y = 10
-	menu_button_rect = pygame.Rect(button_x, button_y, button_width, button_height)
-
-	while True:
-		mouse_pos = pygame.mouse.get_pos()
-		
-		for event in pygame.event.get():
-			if event.type == pygame.QUIT:
-				try:
-					sound.cleanup()
-				finally:
-					pygame.quit()
-					sys.exit(0)
-			if event.type == pygame.KEYDOWN:
-				if event.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
-					sound.cleanup()
-					screen.fill(C4.bg_color)
-					pygame.display.flip()
-					return
-				if game_over and event.key == pygame.K_r:
-					board = CF.create_board()
-					human_piece, ai_piece = (C4.player1, C4.player2) if random.choice([True, False]) else (C4.player2, C4.player1)
-					turn = human_piece if random.choice([True, False]) else ai_piece
-					game_over = False
-					winner = None
-
-			# Human move
-			if event.type == pygame.MOUSEBUTTONDOWN:
-				if menu_button_rect.collidepoint(event.pos):
-					sound.cleanup()
-					screen.fill(C4.bg_color)
-					pygame.display.flip()
-					return  
-				if not game_over and turn == human_piece:
-					col = CF.get_col_from_mouse(event.pos[0])
-					row = CF.get_next_open_row(board, col)
-					if row is not None:
-						# Animate the falling piece; piece is applied at the end of the animation
-						def _extra_draw(surf: pygame.Surface) -> None:
-							CF.draw_button(surf, "Back to Menu", menu_button_rect, pygame.mouse.get_pos())
-						status_color = C4.player1_color if human_piece == C4.player1 else C4.player2_color
-						CF.animate_falling_piece(
-							screen,
-							board,
-							col,
-							row,
-							human_piece,
-							clock,
-							sfx=sound,
-							extra_draw=_extra_draw,
-							status_text=("Your move", status_color),
-							speed_px_per_frame=30,
-							easing="ease_out",
-						)
-						if CF.winning_move(board, human_piece):
-							game_over = True
-							winner = human_piece
-						elif CF.is_draw(board):
-							game_over = True
-							winner = None
-						else:
-							turn = ai_piece
-							# Set a short delay before AI starts thinking to ensure smooth landing frame
-							ai_ready_time = pygame.time.get_ticks() + 80
-
-		# AI move
-		if not game_over and turn == ai_piece and (ai_ready_time is None or pygame.time.get_ticks() >= ai_ready_time):
-			# Clear the readiness once we begin the AI move computation
-			ai_ready_time = None
-			pygame.event.pump()
-			
-			
-			if flag == "normal" and random.random() < 0.25:
-				valid_cols = get_valid_locations(board)
-				if valid_cols:
-					col = random.choice(valid_cols)
-				else:
-					col = ai_choose_column(board, ai_piece, depth=depth)
-			elif flag == "easy" and random.random() < 0.5:
-				valid_cols = get_valid_locations(board)
-				if valid_cols:
-					col = random.choice(valid_cols)
-				else:
-					col = ai_choose_column(board, ai_piece, depth=depth)
+from SceneManager import SceneManager
+from AICore import get_valid_locations, order_moves_by_heuristic, simulate_drop
+import engines
+from FrameScheduler import FrameScheduler
+from game_records import DRAW, GameRecorder
+from ponder import Ponderer
+
+
+# ---- Scene (Human vs AI) ----
+class HumanVsAIScene(CF.BoardScene):
+	caption = "Connect Four - vs AI"
+	stats_label = "vs AI"
+
+	def __init__(self, flag: str = "easy", ponder: Optional[bool] = None, engine: str = "ai1",
+			depth: Optional[int] = None) -> None:
+		super().__init__()
+		self.flag = flag
+		# 'depth' overrides the difficulty's search depth
+		options = dict(engines.DIFFICULTIES[flag], **({} if depth is None else {"depth": depth}))
+		self.engine = engines.get(engine, **options)
+		self.depth = self.engine.depth
+		self.ponder = os.environ.get("CONNECT4_PONDER", "1") != "0" if ponder is None else ponder
+		self.ponderer: Optional[Ponderer] = None
+		self.new_game()
+
+	def new_game(self) -> None:
+		self.cancel_drops()
+		if self.recorder is not None:
+			self.recorder.close()
+		if self.ponderer is not None:
+			self.ponderer.reset()
+		self.board = CF.create_board()
+
+		# Randomize who starts
+		self.human_piece, self.ai_piece = (C4.player1, C4.player2) if random.choice([True, False]) else (C4.player2, C4.player1)
+		self.turn = self.human_piece if random.choice([True, False]) else self.ai_piece
+
+		self.game_over = False
+		self.winner: Optional[int] = None
+		self.recorder = GameRecorder("vs_ai", difficulty=self.flag, engine=self.engine.name, depth=self.depth, human=self.human_piece)
+
+		# Search for the AI's move (a stale one from a previous game is ignored)
+		self.ai_future: Optional[Future] = None
+		if self.ponder:
+			self.ponderer = Ponderer(self.engine.name, self.ai_piece, self.engine.options, on_done=FrameScheduler.wake)
+		if self.turn == self.human_piece:
+			self._start_pondering()
+
+	def exit(self) -> None:
+		if self.ponderer is not None:
+			self.ponderer.reset()
+		self.engine.report("vs AI")
+		super().exit()
+
+	def _ai_pending(self) -> bool:
+		return not self.game_over and self.turn == self.ai_piece
+
+	def _play(self, col: int, row: int, piece: int) -> None:
+		"""Drop 'piece'; the outcome is decided now but announced when it lands."""
+		outcome: Optional[str] = None
+		# The board holds the piece from here on; 'outcome' is read when it lands
+		self.drop(self.board, col, row, piece, on_land=lambda: self._landed(piece, outcome))
+		self.recorder.move(col)
+		if CF.winning_move(self.board, piece):
+			outcome = "win"
+			self.recorder.finish(piece)
+		elif CF.is_draw(self.board):
+			outcome = "draw"
+			self.recorder.finish(DRAW)
+		else:
+			self.turn = self.ai_piece if piece == self.human_piece else self.human_piece
+			if self._ai_pending():
+				# Think (or pick up the pondered reply) while the human's piece is still falling
+				self._start_ai()
 			else:
-				col = ai_choose_column(board, ai_piece, depth=depth)
-			
-			row = CF.get_next_open_row(board, col)
-			if row is not None:
-				# Animate AI falling piece
-				def _extra_draw_ai(surf: pygame.Surface) -> None:
-					CF.draw_button(surf, "Back to Menu", menu_button_rect, pygame.mouse.get_pos())
-				status_color = C4.player1_color if ai_piece == C4.player1 else C4.player2_color
-				CF.animate_falling_piece(
-					screen,
-					board,
-					col,
-					row,
-					ai_piece,
-					clock,
-					sfx=sound,
-					extra_draw=_extra_draw_ai,
-					status_text=("AI moving...", status_color),
-					speed_px_per_frame=30,
-					easing="ease_out",
-				)
-				if CF.winning_move(board, ai_piece):
-					game_over = True
-					winner = ai_piece
-				elif CF.is_draw(board):
-					game_over = True
-					winner = None
+				self._start_pondering()
+
+	def _start_pondering(self) -> None:
+		"""Search the AI's reply to each human move, the column under the mouse first."""
+		if self.ponderer is None:
+			return
+		hovered = CF.get_col_from_mouse(pygame.mouse.get_pos()[0])
+		cols = sorted(order_moves_by_heuristic(get_valid_locations(self.board)), key=lambda c: c != hovered)
+		positions = []
+		for col in cols:
+			child = simulate_drop(self.board, col, self.human_piece)
+			if not CF.winning_move(child, self.human_piece):
+				positions.append(child)
+		self.ponderer.start(positions)
+
+	def _start_ai(self) -> None:
+		board = [r[:] for r in self.board]
+		future = self.ponderer.take(board) if self.ponderer is not None else None
+		self.ai_future = future or self.submit_ai(self.search, board)
+
+	def _landed(self, piece: int, outcome: Optional[str]) -> None:
+		if outcome is None:
+			return
+		self.game_over = True
+		self.winner = piece if outcome == "win" else None
+		self.sound.play_sfx(outcome)
+
+	def handle_event(self, event: pygame.event.Event) -> None:
+		if event.type == pygame.KEYDOWN:
+			if event.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
+				self.manager.pop()
+				return
+			if self.game_over and event.key == pygame.K_r:
+				self.new_game()
+
+		# Human move
+		if event.type == pygame.MOUSEBUTTONDOWN:
+			if self.menu_button_rect.collidepoint(event.pos):
+				self.manager.pop()
+				return
+			if not self.game_over and self.turn == self.human_piece and not self.drops:
+				col = CF.get_col_from_mouse(event.pos[0])
+				row = CF.get_next_open_row(self.board, col)
+				if row is not None:
+					self._play(col, row, self.human_piece)
 				else:
-					turn = human_piece
-
-		# Draw
-		CF.draw_board(screen, board)
-		
-		# Draw back to menu button
-		CF.draw_button(screen, "Back to Menu", menu_button_rect, mouse_pos)
-		
-		if game_over:
-			if winner is None:
-				CF.render_text(screen, "Draw! Press R to restart", C4.text_color, C4.cell_size // 2)
+					self.sound.play_sfx("invalid")
+
+	def search(self, board: CF.Board) -> int:
+		return self.engine.choose_move(board, self.ai_piece)
+
+	def update(self) -> None:
+		self.update_animations()
+		# AI move, once the human's piece has landed and the search is done
+		if not self._ai_pending() or self.drops:
+			return
+		if self.ai_future is None:
+			# AI opens the game
+			self.ai_future = self.submit_ai(self.search, [r[:] for r in self.board])
+			return
+		if not self.ai_future.done():
+			return
+		if self.ai_future.exception() is not None:
+			# A pondered search failed (e.g. its worker died): search here instead
+			self.ai_future = self.submit_ai(self.search, [r[:] for r in self.board])
+			return
+		col = self.ai_future.result()
+		self.ai_future = None
+		row = CF.get_next_open_row(self.board, col)
+		if row is not None:
+			self._play(col, row, self.ai_piece)
+		self.sched.request_redraw()
+
+	def draw(self, screen: pygame.Surface) -> List[pygame.Rect]:
+		if self.game_over:
+			if self.winner is None:
+				status, color = "Draw! Press R to restart", C4.text_color
 			else:
-				color = C4.player1_color if winner == C4.player1 else C4.player2_color
-				label = "AI wins!" if winner == ai_piece else "You win!"
-				CF.render_text(screen, f"{label} Press R", color, C4.cell_size // 2)
+				color = C4.player1_color if self.winner == C4.player1 else C4.player2_color
+				label = "AI wins!" if self.winner == self.ai_piece else "You win!"
+				status = f"{label} Press R"
 		else:
-			if turn == human_piece:
-				color = C4.player1_color if human_piece == C4.player1 else C4.player2_color
-				CF.render_text(screen, "Your turn", color, C4.cell_size // 2)
+			if self.turn == self.human_piece:
+				color = C4.player1_color if self.human_piece == C4.player1 else C4.player2_color
+				status = "Your turn"
 			else:
-				color = C4.player1_color if ai_piece == C4.player1 else C4.player2_color
-				CF.render_text(screen, "AI thinking...", color, C4.cell_size // 2)
+				color = C4.player1_color if self.ai_piece == C4.player1 else C4.player2_color
+				status = "AI thinking..."
+
+		return self.draw_board(screen, self.board, status, color)
+
 
-		pygame.display.flip()
-		clock.tick(C4.fps)
+def game_loop_ai(depth: Optional[int] = None, flag: str = "easy") -> None:
+	SceneManager.instance().run(HumanVsAIScene(depth=depth, flag=flag))
 
 
 def main() -> None:
@@ -4,17 +4,17 @@ from ConnectFour import ConnectFour as C4
 import ConnectFour as CF
 import socket
 from button import Button
+import fonts
+from SceneManager import Scene, SceneManager
 
-class Lobby:
-    def __init__(self, on_return=None):
-        pygame.init()
+class Lobby(Scene):
+    caption = "Connect 4"
+    stats_label = "lobby"
 
-        self.WIDTH, self.HEIGHT = C4.width, C4.height
-        self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
-
-        pygame.display.set_caption("Connect 4")
+    def __init__(self):
+        super().__init__()
 
-        self.on_return = on_return
+        self.WIDTH, self.HEIGHT = C4.width, C4.height
 
         self.text_color = C4.text_color
         self.bg_color = C4.bg_color
@@ -24,16 +24,18 @@ class Lobby:
         self.bx = (self.WIDTH - self.bw) // 2
         self.base_y = C4.cell_size * 2
         self.gap = 20
+        # The menu has one more button than the other screens, so it starts a slot higher
+        self.menu_y = self.base_y - (self.bh + self.gap)
 
-        self.text_font = pygame.font.SysFont(None, 36)
+        self.text_font = fonts.get_font(36)
 
-        self.button_font = pygame.font.SysFont(None, 48)
+        self.button_font = fonts.get_font(48)
         self.button_fg = (20, 20, 25)
         self.button_bg = (230, 230, 240)
         self.button_hover = (200, 220, 240)
 
         self.host_btn = Button(
-            pygame.Rect(self.bx, self.base_y, self.bw, self.bh),
+            pygame.Rect(self.bx, self.menu_y, self.bw, self.bh),
             "Host a room",
             self.button_font,
 			self.button_fg,
@@ -41,7 +43,7 @@ class Lobby:
 			self.button_hover,
         )
         self.join_btn = Button(
-            pygame.Rect(self.bx, self.base_y + (self.bh + self.gap), self.bw, self.bh),
+            pygame.Rect(self.bx, self.menu_y + (self.bh + self.gap), self.bw, self.bh),
             "Join a room",
             self.button_font,
 			self.button_fg,
@@ -56,8 +58,32 @@ class Lobby:
 			self.button_bg,
 			self.button_hover,
         )
+        self.quick_btn = Button(
+            pygame.Rect(self.bx, self.menu_y + 2 * (self.bh + self.gap), self.bw, self.bh),
+            "Quick match",
+            self.button_font,
+			self.button_fg,
+			self.button_bg,
+			self.button_hover,
+        )
+        self.bot_btn = Button(
+            pygame.Rect(self.bx, self.menu_y + 3 * (self.bh + self.gap), self.bw, self.bh),
+            "Play vs bot",
+            self.button_font,
+			self.button_fg,
+			self.button_bg,
+			self.button_hover,
+        )
+        self.watch_btn = Button(
+            pygame.Rect(self.bx, self.menu_y + 4 * (self.bh + self.gap), self.bw, self.bh),
+            "Watch a room",
+            self.button_font,
+			self.button_fg,
+			self.button_bg,
+			self.button_hover,
+        )
         self.exit_btn = Button(
-            pygame.Rect(self.bx, self.base_y + 2 * (self.bh + self.gap), self.bw, self.bh),
+            pygame.Rect(self.bx, self.menu_y + 5 * (self.bh + self.gap), self.bw, self.bh),
             "Exit multiplayer",
             self.button_font,
 			self.button_fg,
@@ -103,25 +129,41 @@ class Lobby:
         self.code_len = 5
         self.other_joined = False
         self.player_num = None
+        self.in_match = False  # a game/spectator scene is on top of the lobby
 
-    def generate_code(self):
-        from random import randrange
-        num = randrange(1, 100000, 1)
-        return str(num).zfill(self.code_len)
-    
     def host_game(self):
         self.mode = "host"
-        self.room_code = self.generate_code()
+        self.room_code = "..."  # allocated by the server, arrives as HOSTED:<code>
 
         try:
             self.network = Network()
-            self.network.send(f"HOST:{self.room_code}")
+            self.network.send("HOST")
             self.waiting = True
             self.connection_message = "Hosting..."
-            print(f"[HOST] Room code: {self.room_code}")
+        except socket.error as e:
+            self.connection_message = f"Error: {e}"
+
+    def quick_match(self):
+        self.mode = "quick"
+        self.connection_message = "Searching for an opponent..."
+        try:
+            self.network = Network()
+            self.network.send("QUICKMATCH")
+            self.waiting = True
         except socket.error as e:
             self.connection_message = f"Error: {e}"
             
+    def play_bot(self, level="normal"):
+        # The server plays seat 2 and starts the game right away (HOSTED, then ROLE:1)
+        self.mode = "quick"
+        self.connection_message = "Starting a game against the bot..."
+        try:
+            self.network = Network()
+            self.network.send(f"BOT:{level}")
+            self.waiting = True
+        except socket.error as e:
+            self.connection_message = f"Error: {e}"
+
     def leave_game(self):
         if self.network:
             try:
@@ -147,7 +189,16 @@ class Lobby:
         self.input_active = True
         self.connection_message = ""
 
+    def watch_game(self):
+        self.mode = "watch"
+        self.joining_code = ""
+        self.input_active = True
+        self.connection_message = ""
+
     def connect_to_game(self):
+        if self.mode == "watch":
+            self.connect_as_spectator()
+            return
         try:
             self.network = Network()
             self.network.send(f"JOIN:{self.joining_code}")
@@ -157,6 +208,16 @@ class Lobby:
         except socket.error:
             self.connection_message = "Connection failed!"
 
+    def connect_as_spectator(self):
+        if self.network:
+            self.network.close()
+        try:
+            self.network = Network()
+            self.network.send(f"WATCH:{self.joining_code}")
+            self.connection_message = "Connecting..."
+        except socket.error:
+            self.connection_message = "Connection failed!"
+
     def toggle_ready(self):
         self.ready = not self.ready
         try:
@@ -180,20 +241,23 @@ class Lobby:
                     self.joining_code += str(event.unicode)
             
     
-    def draw(self):
+    def draw(self, screen=None):
         self.screen.fill(self.bg_color)
         mouse = pygame.mouse.get_pos()
 
         if not self.mode:
             self.host_btn.draw(self.screen, mouse)
             self.join_btn.draw(self.screen, mouse)
+            self.quick_btn.draw(self.screen, mouse)
+            self.bot_btn.draw(self.screen, mouse)
+            self.watch_btn.draw(self.screen, mouse)
             self.exit_btn.draw(self.screen, mouse)
         elif self.mode == "host":
-            code_text = self.text_font.render(f"Room Code: {self.room_code}", True, self.text_color)
+            code_text = fonts.render_text(f"Room Code: {self.room_code}", 36, self.text_color)
             self.screen.blit(code_text, (self.WIDTH // 2 - code_text.get_width() // 2, self.base_y - 40))
 
             msg = "Waiting for another player..." if not self.other_joined else "Another player joined!"
-            status_text = self.text_font.render(msg, True, self.text_color)
+            status_text = fonts.render_text(msg, 36, self.text_color)
             self.screen.blit(status_text, (self.WIDTH // 2 - status_text.get_width() // 2, self.base_y + self.bh // 2))
 
             if self.other_joined:
@@ -201,16 +265,21 @@ class Lobby:
                 self.ready_btn.draw(self.screen, mouse)
 
             self.leave_room_btn.draw(self.screen, mouse)
-        elif self.mode == "join":
+        elif self.mode == "quick":
+            msg = fonts.render_text(self.connection_message, 36, self.text_color)
+            self.screen.blit(msg, (self.WIDTH // 2 - msg.get_width() // 2, self.base_y - 40))
+            self.cancel_btn.draw(self.screen, mouse)
+        elif self.mode in ("join", "watch"):
             if not self.other_joined: # Show input code stuff if not joined
-                prompt = self.text_font.render("Enter room code: ", True, self.text_color)
+                label = "Enter room code to watch: " if self.mode == "watch" else "Enter room code: "
+                prompt = fonts.render_text(label, 36, self.text_color)
                 self.screen.blit(prompt, (self.WIDTH // 2 - prompt.get_width() // 2, self.base_y - 40))
 
                 pygame.draw.rect(self.screen, self.button_bg, self.input_rect, border_radius=10)
-                text_surface = self.text_font.render(self.joining_code, True, self.button_fg)
+                text_surface = fonts.render_text(self.joining_code, 36, self.button_fg)
                 self.screen.blit(text_surface, (self.input_rect.x + 10, self.input_rect.y + 10))
 
-                
+                self.submit_btn.text = "Watch" if self.mode == "watch" else "Join"
                 self.submit_btn.draw(self.screen, mouse)
                 self.cancel_btn.draw(self.screen, mouse)
             else:
@@ -218,85 +287,103 @@ class Lobby:
                 self.ready_btn.draw(self.screen, mouse)
                 self.leave_room_btn.draw(self.screen, mouse)
 
-            msg = self.text_font.render(self.connection_message, True, self.text_color)
+            msg = fonts.render_text(self.connection_message, 36, self.text_color)
             self.screen.blit(msg, (self.WIDTH // 2 - msg.get_width() // 2, self.base_y - 40))
 
-        pygame.display.flip()
-
-    def run(self):
-        clock = pygame.time.Clock()
-        running = True
-
-        while running:
-            mouse = pygame.mouse.get_pos()
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-
-                mouse_down = (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1)
-
-                if not self.mode:
-                    if self.host_btn.is_clicked(mouse, mouse_down):
-                        self.host_game()
-                    elif self.join_btn.is_clicked(mouse, mouse_down):
-                        self.join_game()
-                    elif self.exit_btn.is_clicked(mouse, mouse_down):
-                        running = False
-                        if self.on_return:
-                            self.on_return()
-                        else:
-                            print("No return callback; Staying in lobby.")
-                elif self.mode == "host":
-                    if self.leave_room_btn.is_clicked(mouse, mouse_down):
-                        self.leave_game()
-                    elif self.other_joined and self.ready_btn.is_clicked(mouse, mouse_down):
-                        self.toggle_ready()
-                elif self.mode == "join":
-                    if not self.other_joined:
-                        self.input_active = True
-                        self.handle_join_input(event)
-                        
-                        if self.submit_btn.is_clicked(mouse, mouse_down):
-                            if self.joining_code:
-                                print("[CLI] Code entered: ", self.joining_code)
-                                self.connect_to_game()
-                        elif self.cancel_btn.is_clicked(mouse, mouse_down):
-                            self.mode = ""
-                    else:
-                            
-                        if self.leave_room_btn.is_clicked(mouse, mouse_down):
-                            self.leave_game()
-                        elif self.ready_btn.is_clicked(mouse, mouse_down):
-                            self.toggle_ready()
-            
-            if self.network:
-                msg: str = self.network.get_message() 
-                if msg:
-                    if msg.startswith("ROLE:"):
-                        self.player_num = int(msg.split(":")[1])
-                        self.connection_message = f"Role assigned: Player {self.player_num}"
-                        self.connection_message = "Starting game..."
-                        CF.game_loop(self.network, self.player_num)
+    def resume(self):
+        if self.in_match:
+            # Back from a match or spectating: leave the room on the server
+            self.in_match = False
+            self.leave_game()
+
+    def exit(self):
+        self.leave_game()
+
+    def wait_timeout(self):
+        # One message is handled per frame; don't sleep while more are queued
+        return 0 if self.network and self.network.messages else None
+
+    def handle_event(self, event):
+        mouse = getattr(event, "pos", None) or pygame.mouse.get_pos()
+        mouse_down = (event.type == pygame.MOUSEBUTTONDOWN and event.button == 1)
+
+        if not self.mode:
+            if self.host_btn.is_clicked(mouse, mouse_down):
+                self.host_game()
+            elif self.join_btn.is_clicked(mouse, mouse_down):
+                self.join_game()
+            elif self.quick_btn.is_clicked(mouse, mouse_down):
+                self.quick_match()
+            elif self.bot_btn.is_clicked(mouse, mouse_down):
+                self.play_bot()
+            elif self.watch_btn.is_clicked(mouse, mouse_down):
+                self.watch_game()
+            elif self.exit_btn.is_clicked(mouse, mouse_down):
+                self.manager.pop()
+        elif self.mode == "host":
+            if self.leave_room_btn.is_clicked(mouse, mouse_down):
+                self.leave_game()
+            elif self.other_joined and self.ready_btn.is_clicked(mouse, mouse_down):
+                self.toggle_ready()
+        elif self.mode == "quick":
+            if self.cancel_btn.is_clicked(mouse, mouse_down):
+                self.leave_game()
+        elif self.mode in ("join", "watch"):
+            if not self.other_joined:
+                self.input_active = True
+                self.handle_join_input(event)
+                
+                if self.submit_btn.is_clicked(mouse, mouse_down):
+                    if self.joining_code:
+                        print("[CLI] Code entered: ", self.joining_code)
+                        self.connect_to_game()
+                elif self.cancel_btn.is_clicked(mouse, mouse_down):
+                    if self.mode == "watch":
                         self.leave_game()
-                    if msg == "JOINED":
-                        self.other_joined = True
-                        self.connection_message = "A player has joined!"
-                    # elif msg == "START":
-                    #     player_role = self.player_num
-                    elif msg.startswith("ERR"):
-                        self.connection_message = msg
-                    elif msg == "LEFT":
-                        self.connection_message = "Opponent left!"
-                        self.other_joined = False
-
-            self.draw()
-            clock.tick(30)
-
-        pygame.quit()
+                    self.mode = ""
+            else:
+                    
+                if self.leave_room_btn.is_clicked(mouse, mouse_down):
+                    self.leave_game()
+                elif self.ready_btn.is_clicked(mouse, mouse_down):
+                    self.toggle_ready()
+
+    def update(self):
+        if not self.network:
+            return
+        self.network.on_message = self.sched.wake
+        msg: str = self.network.get_message() 
+        if msg:
+            self.sched.request_redraw()
+            if msg.startswith("ROLE:"):
+                self.player_num = int(msg.split(":")[1])
+                self.connection_message = f"Role assigned: Player {self.player_num}"
+                self.connection_message = "Starting game..."
+                self.in_match = True
+                self.manager.push(CF.OnlineGameScene(self.network, self.player_num))
+            elif msg.startswith("WATCHING:"):
+                self.connection_message = "Watching..."
+                self.in_match = True
+                self.manager.push(CF.SpectatorScene(self.network))
+            elif msg.startswith("HOSTED:"):
+                self.room_code = msg.split(":")[1]
+                print(f"[HOST] Room code: {self.room_code}")
+            elif msg.startswith("MATCHED:"):
+                self.room_code = msg.split(":")[1]
+                self.connection_message = "Opponent found! Starting game..."
+            elif msg == "JOINED":
+                self.other_joined = True
+                self.connection_message = "A player has joined!"
+            # elif msg == "START":
+            #     player_role = self.player_num
+            elif msg.startswith("ERR"):
+                self.connection_message = msg
+            elif msg == "LEFT":
+                self.connection_message = "Opponent left!"
+                self.other_joined = False
 
 def lobby():
-    lobby = Lobby()
-    lobby.run()
+    SceneManager.instance().run(Lobby())
 
 if __name__ == "__main__":
-    lobby()
\ No newline at end of file
+    lobby()
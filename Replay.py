@@ -0,0 +1,126 @@
+"""
+Replay viewer for recorded games (see game_records.py)
+
+Keys: Left/Right step one ply (forward steps are animated), Home/End jump to
+the start/end, Up/Down or PgUp/PgDn switch games, Esc/Backspace goes back.
+Seeking rebuilds the position from the move list, so any ply is instant.
+
+Run standalone with --list to print the log without opening a window.
+"""
+import argparse
+import time
+from typing import List, Optional
+
+import pygame
+
+import ConnectFour as CF
+from ConnectFour import ConnectFour as C4
+from SceneManager import SceneManager
+from game_records import DRAW, GameLog, GameRecord, default_log
+
+MODE_LABELS = {"pvp": "PvP", "vs_ai": "vs AI", "ai_vs_ai": "AI-AI", "online": "Online"}
+
+
+class ReplayScene(CF.BoardScene):
+	caption = "Connect Four - Replays"
+	stats_label = "replay"
+
+	def __init__(self, log: Optional[GameLog] = None, game: Optional[int] = None, ply: Optional[int] = None) -> None:
+		super().__init__()
+		self.log = log if log is not None else default_log()
+		self.count = len(self.log) if self.log is not None else 0
+		self.game = -1
+		self.record: Optional[GameRecord] = None
+		self.ply = 0
+		self.board = CF.create_board()
+		if self.count:
+			# Newest game by default, shown at its final position
+			self.open_game(self.count - 1 if game is None else max(0, min(game, self.count - 1)), ply)
+
+	def open_game(self, index: int, ply: Optional[int] = None) -> None:
+		self.game = index
+		self.record = self.log.read(index)
+		self.seek(len(self.record) if ply is None else ply)
+
+	def seek(self, ply: int) -> None:
+		"""Show the position after 'ply' moves, without animation."""
+		self.cancel_drops()
+		self.ply = max(0, min(ply, len(self.record)))
+		self.board = self.record.position(self.ply).to_board()
+		self.sched.request_redraw()
+
+	def step_forward(self) -> None:
+		if self.ply >= len(self.record):
+			return
+		bb = self.record.position(self.ply)
+		piece = bb.current_piece
+		col = self.record.moves[self.ply]
+		row = bb.play(col)
+		self.drop(self.board, col, row, piece)
+		self.ply += 1
+
+	def handle_event(self, event: pygame.event.Event) -> None:
+		if event.type == pygame.MOUSEBUTTONDOWN and self.menu_button_rect.collidepoint(event.pos):
+			self.manager.pop()
+			return
+		if event.type != pygame.KEYDOWN:
+			return
+		if event.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
+			self.manager.pop()
+		elif self.record is None:
+			return
+		elif event.key == pygame.K_RIGHT:
+			self.step_forward()
+		elif event.key == pygame.K_LEFT:
+			self.seek(self.ply - 1)
+		elif event.key == pygame.K_HOME:
+			self.seek(0)
+		elif event.key == pygame.K_END:
+			self.seek(len(self.record))
+		elif event.key in (pygame.K_UP, pygame.K_PAGEUP) and self.game > 0:
+			self.open_game(self.game - 1)
+		elif event.key in (pygame.K_DOWN, pygame.K_PAGEDOWN) and self.game < self.count - 1:
+			self.open_game(self.game + 1)
+
+	def update(self) -> None:
+		self.update_animations()
+
+	def draw(self, screen: pygame.Surface) -> List[pygame.Rect]:
+		if self.record is None:
+			status, color = "No recorded games", C4.text_color
+		elif self.ply == len(self.record) and self.record.result in (C4.player1, C4.player2):
+			color = C4.player1_color if self.record.result == C4.player1 else C4.player2_color
+			status = f"#{self.game + 1}: Player {self.record.result} wins"
+		else:
+			label = MODE_LABELS.get(self.record.mode, self.record.mode)
+			result = " draw" if self.ply == len(self.record) and self.record.result == DRAW else ""
+			status, color = f"{label} #{self.game + 1}: {self.ply}/{len(self.record)}{result}", C4.text_color
+
+		return self.draw_board(screen, self.board, status, color)
+
+
+def list_games(log: GameLog) -> None:
+	for entry, record in zip(log.entries(), log):
+		started = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["started_at"]))
+		print(f"{entry['index']:5d}  {started}  {entry['mode']:8s}  {record.result_text:15s}  {record.move_string()}")
+
+
+def main(argv: Optional[list] = None) -> None:
+	parser = argparse.ArgumentParser(description="Replay recorded Connect Four games")
+	parser.add_argument("--log", metavar="PATH", help="game log to read (default: CONNECT4_RECORDS or records/games.c4log)")
+	parser.add_argument("--list", action="store_true", help="print the recorded games and exit")
+	parser.add_argument("--game", type=int, help="game index to open (default: newest)")
+	parser.add_argument("--ply", type=int, help="ply to open the game at (default: final position)")
+	args = parser.parse_args(argv)
+
+	log = GameLog(args.log) if args.log else default_log()
+	if log is None:
+		parser.error("recording is disabled (CONNECT4_RECORDS=0); pass --log PATH")
+	if args.list:
+		list_games(log)
+		return
+	SceneManager.instance().run(ReplayScene(log, args.game, args.ply))
+
+
+if __name__ == "__main__":
+	main()
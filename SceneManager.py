@@ -0,0 +1,197 @@
+from typing import List, Optional, Tuple
+
+import pygame
+
+import asset_cache
+import fonts
+import profiling
+from FrameScheduler import FrameScheduler
+from SoundManager import SoundManager
+
+
+class Scene:
+    """
+    One screen of the game: a menu, the lobby, a match...
+
+    Each frame the SceneManager calls, for the scene on top of its stack:
+      handle_event(event)  for every pending event (QUIT is handled by the manager)
+      update()             timers, network polling, AI turns
+      draw(screen)         only when a redraw is due; return the dirty rects,
+                           or None to flip the whole display
+    enter()/exit() run when the scene is pushed/popped; pause()/resume() when
+    another scene is pushed on top of it / popped off it.
+
+    Scenes share the manager's display, clock, sound and scheduler, so
+    switching modes never re-initialises SDL or reloads audio.
+    """
+
+    caption = "Connect Four"
+    stats_label = "scene"
+
+    def __init__(self) -> None:
+        self.manager = SceneManager.instance()
+        self.screen: pygame.Surface = self.manager.screen
+        self.sound: SoundManager = self.manager.sound
+        self.clock: pygame.time.Clock = self.manager.clock
+        self.sched: FrameScheduler = self.manager.sched
+
+    # ---- Lifecycle hooks ----
+    def enter(self) -> None:
+        pass
+
+    def exit(self) -> None:
+        pass
+
+    def pause(self) -> None:
+        pass
+
+    def resume(self) -> None:
+        pass
+
+    # ---- Per-frame hooks ----
+    def handle_event(self, event: pygame.event.Event) -> None:
+        pass
+
+    def update(self) -> None:
+        pass
+
+    def draw(self, screen: pygame.Surface) -> Optional[List[pygame.Rect]]:
+        return None
+
+    def wait_timeout(self) -> Optional[int]:
+        """Longest the manager may sleep while idle (ms), e.g. until an AI move is due."""
+        return None
+
+
+class SceneManager:
+    """
+    Owns the display, clock, frame scheduler and sound for the whole process
+    and runs a stack of scenes in a single loop.
+
+    - push(scene):    open a screen on top (menus -> game, lobby -> match)
+    - pop():          go back to the screen underneath
+    - replace(scene): swap the top screen (difficulty picker -> match)
+    - quit():         close every scene and end run()
+    """
+
+    _instance: Optional["SceneManager"] = None
+
+    def __init__(self, size: Tuple[int, int], caption: str = "Connect Four", fps: int = 60) -> None:
+        SoundManager.configure_mixer()  # buffer/frequency must be chosen before pygame.init
+        pygame.init()
+        # Decode the menu art and load sound effects while the window opens
+        asset_cache.preload(images=[asset_cache.asset_path("bg.jpeg")],
+                            sounds=[asset_cache.asset_path(name) for name in SoundManager.SFX_FILES.values()])
+        self.screen = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+        fonts.get_font(36)  # font module is initialised once, with the display
+
+        self.sched = FrameScheduler(fps)
+        self.clock = self.sched.clock
+        self.sound = SoundManager()
+        self.sound.play_bgm()
+
+        self.stack: List[Scene] = []
+        self.running = False
+        self._label = "scene"  # stats label of the scene on screen
+
+    @classmethod
+    def instance(cls) -> "SceneManager":
+        """The process-wide manager; the display is created on first use."""
+        if cls._instance is None:
+            from ConnectFour import ConnectFour as C4
+            cls._instance = cls((C4.width, C4.height), C4.title, C4.fps)
+        return cls._instance
+
+    @property
+    def top(self) -> Optional[Scene]:
+        return self.stack[-1] if self.stack else None
+
+    # ---- Stack operations ----
+    def push(self, scene: Scene) -> None:
+        if self.stack:
+            self.stack[-1].pause()
+        self.stack.append(scene)
+        self._switched(scene)
+        scene.enter()
+
+    def pop(self) -> None:
+        if not self.stack:
+            return
+        scene = self.stack.pop()
+        scene.exit()
+        if self.stack:
+            self._switched(self.stack[-1])
+            self.stack[-1].resume()
+
+    def replace(self, scene: Scene) -> None:
+        if self.stack:
+            self.stack.pop().exit()
+        self.push(scene)
+
+    def quit(self) -> None:
+        while self.stack:
+            self.stack.pop().exit()
+
+    def _switched(self, scene: Scene) -> None:
+        if self.sched.frames:
+            self.sched.report(self._label)
+        self.sched.reset_stats()
+        self._label = scene.stats_label
+        pygame.display.set_caption(scene.caption)
+        self.sched.request_redraw()
+
+    # ---- Main loop ----
+    def run(self, scene: Optional[Scene] = None) -> None:
+        """Run until the stack is empty, then shut pygame down.
+
+        Called while the loop is already running, this only pushes 'scene'.
+        """
+        if scene is not None:
+            self.push(scene)
+        if self.running:
+            return
+        self.running = True
+        try:
+            # One profile per session when profiling is on (see profiling.py)
+            with profiling.session(type(self.stack[0]).__name__ if self.stack else "session"):
+                self._loop()
+        finally:
+            self.running = False
+            self.shutdown()
+
+    def _loop(self) -> None:
+        while self.stack:
+            top = self.stack[-1]
+            events = self.sched.wait(top.wait_timeout())
+            for event in events:
+                if event.type == pygame.QUIT:
+                    self.quit()
+                    break
+                top.handle_event(event)
+                if self.top is not top:
+                    break
+            else:
+                top.update()
+            if self.top is not top:
+                continue  # the new scene paints itself from scratch
+
+            if self.sched.dirty:
+                dirty = top.draw(self.screen)
+                if dirty is None:
+                    pygame.display.flip()
+                elif dirty:
+                    pygame.display.update(dirty)
+                self.sched.frame_done()
+
+    def shutdown(self) -> None:
+        if self.sched.frames:
+            self.sched.report(self._label)
+        self.quit()
+        try:
+            self.sound.cleanup()
+        finally:
+            pygame.quit()
+            asset_cache.clear()
+            fonts.clear()  # the next pygame.init() would otherwise hand out dead Font objects
+            SceneManager._instance = None
@@ -1,8 +1,10 @@
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 
 import pygame
 
+import asset_cache
+
 
 class SoundManager:
     """
@@ -20,9 +22,39 @@ class SoundManager:
 
     Default file resolution tries these locations:
       assets/bgm.wav, bgm.wav
-      assets/sfx_move.wav, sfx_move.wav
+      assets/sfx_move.wav, sfx_move.wav (and the other SFX_FILES alike)
+
+    Sound effects come from asset_cache, so every SoundManager shares one
+    decoded Sound per file, and the BGM is only (re)loaded when the track
+    or the mixer changed.
+
+    SFX are looked up per game event (see SFX_FILES; all of them ship in
+    assets/, and an event whose file was removed stays silent) and played
+    on a pool of reserved mixer channels, so a burst of effects never steals
+    a channel from another sound or waits for a free one. A repeated trigger of the same event within DEDUP_MS plays
+    only once.
+
+    Mixer latency is fixed when pygame initialises the mixer: call
+    configure_mixer() before pygame.init(). CONNECT4_AUDIO_BUFFER and
+    CONNECT4_AUDIO_FREQ override the defaults below.
     """
 
+    SFX_FILES: Dict[str, str] = {
+        "drop": "sfx_move.wav",
+        "win": "sfx_win.wav",
+        "draw": "sfx_draw.wav",
+        "invalid": "sfx_invalid.wav",
+    }
+    SFX_CHANNELS = 4  # mixer channels reserved for sound effects
+    DEDUP_MS = 30  # about two frames
+
+    # Smaller buffers mean less delay between play() and sound; 256 samples
+    # at 44.1 kHz is ~6 ms (pygame's default of 512 is ~12 ms)
+    MIXER_FREQUENCY = 44100
+    MIXER_BUFFER = 256
+
+    _music_loaded: Optional[str] = None  # path currently loaded into pygame.mixer.music
+
     def __init__(
         self,
         bgm_path: Optional[str] = None,
@@ -32,13 +64,29 @@ class SoundManager:
     ) -> None:
         self.bgm_path = bgm_path or self._find_default("bgm.wav")
         self.sfx_path = sfx_path or self._find_default("sfx_move.wav")
+        self.sfx_paths: Dict[str, str] = {event: self._find_default(name) for event, name in self.SFX_FILES.items()}
+        self.sfx_paths["drop"] = self.sfx_path
         # Store as percent 0..100
         self.bgm_volume = self._to_percent(bgm_volume)
         self.sfx_volume = self._to_percent(sfx_volume)
 
-        self._sfx: Optional[pygame.mixer.Sound] = None
+        self._sfx: Optional[pygame.mixer.Sound] = None  # the "drop" effect
+        self._sounds: Dict[str, pygame.mixer.Sound] = {}
+        self._channels: List[pygame.mixer.Channel] = []
+        self._next_channel = 0
+        self._last_played: Dict[str, int] = {}
         self._mixer_ready: bool = False
 
+    @classmethod
+    def configure_mixer(cls, frequency: Optional[int] = None, buffer: Optional[int] = None) -> None:
+        """Select mixer frequency and buffer size; must run before pygame.init()."""
+        try:
+            frequency = int(frequency or os.environ.get("CONNECT4_AUDIO_FREQ") or cls.MIXER_FREQUENCY)
+            buffer = int(buffer or os.environ.get("CONNECT4_AUDIO_BUFFER") or cls.MIXER_BUFFER)
+        except ValueError:
+            frequency, buffer = cls.MIXER_FREQUENCY, cls.MIXER_BUFFER
+        pygame.mixer.pre_init(frequency=frequency, size=-16, channels=2, buffer=buffer)
+
     def _find_default(self, filename: str) -> str:
         base = os.path.dirname(os.path.abspath(__file__))
         candidates = [
@@ -60,24 +108,37 @@ class SoundManager:
                 return
         self._mixer_ready = True
 
-        # Load BGM
+        # Load BGM (streamed by mixer.music; skip if this track is already loaded)
         if self.bgm_path and os.path.isfile(self.bgm_path):
-            try:
-                pygame.mixer.music.load(self.bgm_path)
-                pygame.mixer.music.set_volume(self._percent_to_norm(self.bgm_volume))
-            except Exception as e:
-                print(f"[SoundManager] Failed to load BGM '{self.bgm_path}': {e}")
+            if SoundManager._music_loaded != self.bgm_path:
+                try:
+                    pygame.mixer.music.load(self.bgm_path)
+                    SoundManager._music_loaded = self.bgm_path
+                except Exception as e:
+                    print(f"[SoundManager] Failed to load BGM '{self.bgm_path}': {e}")
+            pygame.mixer.music.set_volume(self._percent_to_norm(self.bgm_volume))
         else:
             print(f"[SoundManager] BGM file not found at '{self.bgm_path}'")
 
-        # Load SFX
-        if self.sfx_path and os.path.isfile(self.sfx_path):
-            try:
-                self._sfx = pygame.mixer.Sound(self.sfx_path)
-                self._sfx.set_volume(self._percent_to_norm(self.sfx_volume))
-            except Exception as e:
-                print(f"[SoundManager] Failed to load SFX '{self.sfx_path}': {e}")
-        else:
+        # Reserve a channel pool for SFX; pygame.mixer.find_channel() and
+        # Sound.play() never pick reserved channels
+        try:
+            pygame.mixer.set_num_channels(max(8, self.SFX_CHANNELS * 2))
+            pygame.mixer.set_reserved(self.SFX_CHANNELS)
+            self._channels = [pygame.mixer.Channel(i) for i in range(self.SFX_CHANNELS)]
+        except Exception as e:
+            print(f"[SoundManager] Failed to reserve SFX channels: {e}")
+            self._channels = []
+
+        # Load SFX (decoded once per process)
+        self._sounds = {}
+        for event, path in self.sfx_paths.items():
+            sound = asset_cache.get_sound(path) if os.path.isfile(path) else None
+            if sound is not None:
+                sound.set_volume(self._percent_to_norm(self.sfx_volume))
+                self._sounds[event] = sound
+        self._sfx = self._sounds.get("drop")
+        if self._sfx is None:
             print(f"[SoundManager] SFX file not found at '{self.sfx_path}'")
 
     def play_bgm(self, loops: int = -1, fade_ms: int = 500) -> None:
@@ -97,12 +158,38 @@ class SoundManager:
         except Exception as e:
             print(f"[SoundManager] Failed to stop BGM: {e}")
 
-    def play_sfx(self) -> None:
+    def _free_channel(self) -> Optional[pygame.mixer.Channel]:
+        """An idle channel from the pool, or the least recently started one."""
+        n = len(self._channels)
+        for i in range(n):
+            channel = self._channels[(self._next_channel + i) % n]
+            if not channel.get_busy():
+                self._next_channel = (self._next_channel + i + 1) % n
+                return channel
+        if not n:
+            return None
+        channel = self._channels[self._next_channel]
+        self._next_channel = (self._next_channel + 1) % n
+        return channel
+
+    def play_sfx(self, event: str = "drop") -> None:
+        """Play the effect registered for 'event' (drop, win, draw, invalid)."""
         if not self._mixer_ready:
             self.init()
+        sound = self._sounds.get(event)
+        if sound is None:
+            return
+        now = pygame.time.get_ticks()
+        last = self._last_played.get(event)
+        if last is not None and now - last < self.DEDUP_MS:
+            return  # same event already triggered this frame
+        self._last_played[event] = now
         try:
-            if self._sfx is not None:
-                self._sfx.play()
+            channel = self._free_channel()
+            if channel is not None:
+                channel.play(sound)
+            else:
+                sound.play()
         except Exception as e:
             print(f"[SoundManager] Failed to play SFX: {e}")
 
@@ -125,9 +212,9 @@ class SoundManager:
         are treated as normalized and converted to percent. Stored value is percent.
         """
         self.sfx_volume = self._to_percent(volume)
-        if self._sfx is not None:
+        for sound in self._sounds.values():
             try:
-                self._sfx.set_volume(self._percent_to_norm(self.sfx_volume))
+                sound.set_volume(self._percent_to_norm(self.sfx_volume))
             except Exception:
                 pass
 
@@ -139,6 +226,12 @@ class SoundManager:
         except Exception:
             pass
 
+        # Loaded audio does not survive the mixer
+        SoundManager._music_loaded = None
+        asset_cache.clear_sounds()
+        self._sfx = None
+        self._sounds = {}
+        self._channels = []
         self._mixer_ready = False
 
     @staticmethod
@@ -0,0 +1,210 @@
+"""
+Batch position analysis without a window.
+
+Reads positions from files (or stdin) as a stream, searches each with one
+of the engines in a process pool and writes one JSON object per position,
+in input order:
+
+    python analyze.py suite.txt --engine ai2 --depth 7 --workers 8 > results.jsonl
+    echo 4453 | python analyze.py - --time-ms 500
+
+Input formats (may be mixed):
+
+    4453                  a 1-based move string ("-" or an empty string
+    opening-3  4453       is the start position), optionally preceded by an id
+    {"id": "a", "moves": "4453"}
+    {"id": "b", "board": [[0, 0, ...], ...]}      ConnectFour board list
+    # name                a board dump: an optional "# id" line followed by
+    .......               six rows of seven cells, top row first;
+    ...x...               "." empty, "x" player 1, "o" player 2
+    ...
+
+Output fields: id, moves (when known), to_move, best (1-based column),
+score (for the side to move), pv (1-based move string), depth and time_ms;
+or id and error for unusable positions.
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import engines
+from BitBoard import BitBoard, COLS, ROWS
+
+CELLS = {".": 0, "x": 1, "o": 2}
+
+# A parsed position: id, move string (None for board input), board list
+Position = Tuple[str, Optional[str], List[List[int]]]
+
+
+# ---- Input ----
+def _board_from_dump(rows: List[str]) -> List[List[int]]:
+    return [[CELLS[ch] for ch in row.lower()] for row in rows]
+
+
+def _is_dump_row(line: str) -> bool:
+    return len(line) == COLS and all(ch in CELLS for ch in line.lower())
+
+
+def read_positions(lines: Iterable[str], source: str = "-") -> Iterator[Position]:
+    """Parse positions one by one; unreadable input yields a position with neither moves nor board."""
+    dump: List[str] = []
+    start = 0
+    name: Optional[str] = None  # from a "# id" line; names the next position
+    for lineno, raw in enumerate(lines, 1):
+        line = raw.strip()
+        if _is_dump_row(line):
+            if not dump:
+                start = lineno
+            dump.append(line)
+            if len(dump) == ROWS:
+                yield name or f"{source}:{start}", None, _board_from_dump(dump)
+                dump, name = [], None
+            continue
+        if dump:
+            yield name or f"{source}:{start}", None, None  # board dump cut short
+            dump, name = [], None
+        if not line:
+            continue
+        if line.startswith("#"):
+            name = line[1:].strip() or None
+            continue
+        pos_id, name = name or f"{source}:{lineno}", None
+        if line.startswith("{"):
+            try:
+                obj = json.loads(line)
+                pos_id = str(obj.get("id", pos_id))
+                if "board" in obj:
+                    yield pos_id, None, obj["board"]
+                else:
+                    yield pos_id, str(obj.get("moves", "")), None
+            except (ValueError, AttributeError):
+                yield pos_id, None, None
+            continue
+        parts = line.split()
+        if len(parts) > 2:
+            yield pos_id, None, None
+            continue
+        if len(parts) == 2:
+            pos_id = parts[0]
+        yield pos_id, "" if parts[-1] == "-" else parts[-1], None
+    if dump:
+        yield name or f"{source}:{start}", None, None
+
+
+def _open_inputs(paths: List[str]) -> Iterator[Tuple[str, TextIO]]:
+    for path in paths or ["-"]:
+        if path == "-":
+            yield "-", sys.stdin
+        else:
+            with open(path) as f:
+                yield path, f
+
+
+# ---- Search (runs in the workers) ----
+def principal_variation(engine, board: List[List[int]], piece: int, depth: int, first: int) -> List[int]:
+    """Follow the engine's best replies below the root move (each one a shallower search)."""
+    from AICore import is_terminal_node, simulate_drop
+    opp = 3 - piece
+    pv = [first]
+    child = simulate_drop(board, first, piece)
+    maximizing = False
+    for d in range(depth - 1, 0, -1):
+        if child is None or is_terminal_node(child):
+            break
+        _, col = engine.minimax(child, d, -10**9, 10**9, maximizing, piece)
+        if col is None:
+            break
+        pv.append(col)
+        child = simulate_drop(child, col, piece if maximizing else opp)
+        maximizing = not maximizing
+    return pv
+
+
+def analyze_position(task: Tuple[Position, str, int, Optional[float]]) -> Dict:
+    (pos_id, moves, board), engine_name, max_depth, time_ms = task
+    result: Dict = {"id": pos_id}
+    try:
+        if board is None and moves is None:
+            raise ValueError("unreadable position")
+        if board is None:
+            state = BitBoard.from_moves(moves)
+            result["moves"] = state.move_string()
+        else:
+            if len(board) != ROWS or any(len(row) != COLS for row in board):
+                raise ValueError("board must be 6 rows of 7 cells")
+            state = BitBoard.from_board(board)
+        board = state.to_board()
+        if state.is_over():
+            raise ValueError("game is already over")
+    except ValueError as e:
+        result["error"] = str(e)
+        return result
+
+    engine = engines.get(engine_name, depth=max_depth, time_ms=time_ms)
+    piece = state.current_piece
+    # With a time budget the engine deepens until the budget runs out and
+    # reports the deepest search that finished; a fixed depth searches once.
+    analysis = engine.analyze(board, piece)
+    best, score, depth = analysis["best"], analysis["score"], analysis["depth"]
+    if best is None:
+        best = state.valid_moves()[0]
+        score = 0
+    pv = principal_variation(engine.module, board, piece, depth, best) if depth else [best]
+    result.update({
+        "to_move": piece,
+        "best": best + 1,
+        "score": score,
+        "pv": "".join(str(c + 1) for c in pv),
+        "depth": depth,
+        "time_ms": analysis["time_ms"],
+    })
+    return result
+
+
+# ---- Driver ----
+def analyze_stream(positions: Iterable[Position], engine: str = "ai1", depth: int = 6, time_ms: Optional[float] = None,
+                   workers: Optional[int] = None) -> Iterator[Dict]:
+    """Analyse positions in parallel, yielding results in input order.
+
+    Only a bounded number of positions is in flight, so arbitrarily large
+    inputs stream through in constant memory.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = 4 * (workers or os.cpu_count() or 1)
+        pending: Deque[Future] = deque()
+        for pos in positions:
+            pending.append(pool.submit(analyze_position, (pos, engine, depth, time_ms)))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Analyse Connect Four positions and print JSON lines")
+    parser.add_argument("inputs", nargs="*", help="position files ('-' or none for stdin)")
+    parser.add_argument("--engine", choices=engines.names(), default="ai1", help="engine to search with (default: %(default)s)")
+    parser.add_argument("--depth", type=int, help="search depth (default: 6), or the depth cap with --time-ms")
+    parser.add_argument("--time-ms", type=float, help="per-position time budget (iterative deepening)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--output", "-o", metavar="PATH", help="write results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    max_depth = args.depth or (ROWS * COLS if args.time_ms else 6)
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        positions = (pos for source, f in _open_inputs(args.inputs) for pos in read_positions(f, source))
+        for result in analyze_stream(positions, args.engine, max_depth, args.time_ms, args.workers):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Non-blocking tweens driven by the main loop.
+
+An Animator holds any number of running Tweens. The scene calls
+animator.update() once per frame; each tween derives its progress from the
+clock (not from a frame count), so animations take the same wall time at any
+frame rate and never block event, network or AI processing. Finished tweens
+run their on_complete callback, which is where game state that depends on
+the animation (sounds, turn hand-off, results) is applied.
+
+Easing curves are sampled once into lookup tables; evaluating one is an
+index plus a linear interpolation between neighbouring samples.
+"""
+from typing import Callable, Dict, List, Optional
+
+import pygame
+
+LUT_SIZE = 256
+
+
+def _ease_linear(t: float) -> float:
+    return t
+
+
+def _ease_out_cubic(t: float) -> float:
+    # Fast, smooth ease-out
+    return 1.0 - (1.0 - t) ** 3
+
+
+def _ease_out_bounce(t: float) -> float:
+    # Standard easeOutBounce (0..1)
+    n1 = 7.5625
+    d1 = 2.75
+    if t < 1 / d1:
+        return n1 * t * t
+    elif t < 2 / d1:
+        t -= 1.5 / d1
+        return n1 * t * t + 0.75
+    elif t < 2.5 / d1:
+        t -= 2.25 / d1
+        return n1 * t * t + 0.9375
+    else:
+        t -= 2.625 / d1
+        return n1 * t * t + 0.984375
+
+
+EASING_FUNCTIONS: Dict[str, Callable[[float], float]] = {
+    "linear": _ease_linear,
+    "ease_out": _ease_out_cubic,
+    "bounce": _ease_out_bounce,
+}
+
+_TABLES: Dict[str, List[float]] = {}
+
+
+def register_easing(name: str, fn: Callable[[float], float]) -> None:
+    """Add an easing curve; it is sampled into a lookup table right away."""
+    EASING_FUNCTIONS[name] = fn
+    _TABLES[name] = [fn(i / (LUT_SIZE - 1)) for i in range(LUT_SIZE)]
+
+
+for _name, _fn in list(EASING_FUNCTIONS.items()):
+    register_easing(_name, _fn)
+
+
+def ease(name: str, t: float) -> float:
+    """Eased progress for t in [0, 1]; unknown names fall back to ease_out."""
+    table = _TABLES.get(name) or _TABLES["ease_out"]
+    if t <= 0.0:
+        return table[0]
+    if t >= 1.0:
+        return table[-1]
+    x = t * (LUT_SIZE - 1)
+    i = int(x)
+    return table[i] + (table[i + 1] - table[i]) * (x - i)
+
+
+class Tween:
+    """Moves 'value' from start to end over duration_ms along an easing curve."""
+
+    def __init__(
+        self,
+        start: float,
+        end: float,
+        duration_ms: int,
+        easing: str = "ease_out",
+        on_complete: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.start = start
+        self.end = end
+        self.duration_ms = max(1, duration_ms)
+        self.easing = easing
+        self.on_complete = on_complete
+        self.started_at: Optional[int] = None
+        self.value = start
+        self.done = False
+
+    def step(self, now: int) -> bool:
+        """Advance to 'now' (pygame ticks); returns True once finished."""
+        if self.started_at is None:
+            self.started_at = now
+        t = (now - self.started_at) / self.duration_ms
+        self.value = self.start + ease(self.easing, t) * (self.end - self.start)
+        if t >= 1.0:
+            self.value = self.end
+            self.done = True
+        return self.done
+
+
+class Animator:
+    """The running tweens of one scene."""
+
+    def __init__(self) -> None:
+        self.tweens: List[Tween] = []
+
+    @property
+    def active(self) -> bool:
+        return bool(self.tweens)
+
+    def add(self, tween: Tween) -> Tween:
+        self.tweens.append(tween)
+        return tween
+
+    def update(self, now: Optional[int] = None) -> None:
+        """Advance every tween and run completion callbacks (which may add new tweens)."""
+        if not self.tweens:
+            return
+        now = pygame.time.get_ticks() if now is None else now
+        finished = [tween for tween in self.tweens if tween.step(now)]
+        if finished:
+            self.tweens = [tween for tween in self.tweens if not tween.done]
+            for tween in finished:
+                if tween.on_complete is not None:
+                    tween.on_complete()
+
+    def clear(self) -> None:
+        self.tweens = []
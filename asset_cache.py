@@ -0,0 +1,142 @@
+"""
+Process-wide cache for images and sound effects.
+
+Files are read and decoded once and the results are shared by every scene
+and SoundManager. preload() can do the disk reads and decoding in a
+background thread at startup while SDL opens the window. Images handed out
+by get_image() are converted to the display pixel format once a display
+exists, which makes each blit a plain copy. Returned objects are shared:
+blit or play them, never draw on them.
+"""
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import pygame
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+_lock = threading.Lock()
+_decoded: Dict[str, pygame.Surface] = {}  # path -> surface straight from the decoder
+_images: Dict[Tuple[str, Optional[Tuple[int, int]], bool], pygame.Surface] = {}
+_sounds: Dict[str, Optional[pygame.mixer.Sound]] = {}
+_preload_thread: Optional[threading.Thread] = None
+
+
+def asset_path(filename: str) -> str:
+	return os.path.join(ASSET_DIR, filename)
+
+
+def _decode(path: str) -> pygame.Surface:
+	with _lock:
+		surf = _decoded.get(path)
+	if surf is None:
+		surf = pygame.image.load(path)
+		with _lock:
+			_decoded[path] = surf
+	return surf
+
+
+def _wait_for_preload() -> None:
+	if _preload_thread is not None and _preload_thread.is_alive() and _preload_thread is not threading.current_thread():
+		_preload_thread.join()
+
+
+def loading(path: str) -> bool:
+	"""True while the preload thread has yet to decode 'path' (get_image would wait for it)."""
+	return (path not in _decoded and _preload_thread is not None and _preload_thread.is_alive()
+			and os.path.isfile(path))
+
+
+def get_image(path: str, size: Optional[Tuple[int, int]] = None, alpha: bool = False) -> Optional[pygame.Surface]:
+	"""The image at 'path', scaled to 'size' and converted for the display; None if it cannot be loaded."""
+	key = (path, size, alpha)
+	surf = _images.get(key)
+	if surf is not None:
+		return surf
+	if not os.path.isfile(path):
+		return None
+	if path not in _decoded:
+		_wait_for_preload()
+	try:
+		surf = _decode(path)
+	except (pygame.error, OSError) as e:
+		print(f"[asset_cache] Failed to load image '{path}': {e}")
+		return None
+	if size is not None and surf.get_size() != tuple(size):
+		surf = pygame.transform.scale(surf, size)
+	if pygame.display.get_surface() is not None:
+		surf = surf.convert_alpha() if alpha else surf.convert()
+		_images[key] = surf  # only cache display-format surfaces
+	return surf
+
+
+def get_sound(path: str) -> Optional[pygame.mixer.Sound]:
+	"""A shared Sound for 'path' (the mixer must be initialised); None if it cannot be loaded."""
+	with _lock:
+		if path in _sounds:
+			return _sounds[path]
+	_wait_for_preload()
+	with _lock:
+		if path in _sounds:
+			return _sounds[path]
+	sound = None
+	if os.path.isfile(path) and pygame.mixer.get_init():
+		try:
+			sound = pygame.mixer.Sound(path)
+		except pygame.error as e:
+			print(f"[asset_cache] Failed to load sound '{path}': {e}")
+	with _lock:
+		_sounds[path] = sound
+	return sound
+
+
+def preload(images: Iterable[str] = (), sounds: Iterable[str] = (), background: bool = True) -> Optional[threading.Thread]:
+	"""Decode images and load sounds ahead of first use.
+
+	Sounds are only loaded when the mixer is already initialised. With
+	background=True the work runs in a daemon thread; lookups that need a
+	file still being loaded wait for the thread.
+	"""
+	global _preload_thread
+	images, sounds = list(images), list(sounds)
+
+	def _run() -> None:
+		for path in images:
+			if os.path.isfile(path):
+				try:
+					_decode(path)
+				except (pygame.error, OSError):
+					pass  # reported again by get_image
+		if pygame.mixer.get_init():
+			for path in sounds:
+				if path not in _sounds and os.path.isfile(path):
+					try:
+						sound = pygame.mixer.Sound(path)
+					except pygame.error:
+						sound = None
+					with _lock:
+						_sounds[path] = sound
+
+	if not background:
+		_run()
+		return None
+	_preload_thread = threading.Thread(target=_run, name="asset-preload", daemon=True)
+	_preload_thread.start()
+	return _preload_thread
+
+
+def clear_sounds() -> None:
+	"""Forget loaded sounds; they are invalid once the mixer is shut down."""
+	_wait_for_preload()
+	with _lock:
+		_sounds.clear()
+
+
+def clear() -> None:
+	"""Drop everything (e.g. after pygame.quit(), which invalidates the surfaces and sounds)."""
+	_wait_for_preload()
+	with _lock:
+		_decoded.clear()
+		_images.clear()
+		_sounds.clear()
@@ -0,0 +1,131 @@
+"""
+Shared engine workers for server-hosted bots.
+
+Every bot move in every room is one request to a single process pool, so
+the number of bot games is bounded by queueing, not by processes. A room
+has at most one request waiting (it asks for the next move only after the
+previous one was played); waiting requests are dispatched in arrival order,
+at most one per worker at a time, so every room gets its move before any
+room gets a second one.
+
+Each request has a time budget (on top of the level's own depth and node
+limits). When more requests are waiting than there are workers, the budget
+shrinks in proportion, down to MIN_BUDGET_MS, so a burst of bot moves makes
+every bot play a little faster rather than making some players wait.
+
+The pool is driven from the server's selector thread: submit() and poll()
+are called there, and on_ready() is called from the pool's callback thread
+when a result is waiting (the server uses it to wake its select()). The
+workers are started with the "spawn" method, like ponder.py's, since the
+server already runs threads (metrics endpoint and dumps) when the first
+bot move forks a worker.
+"""
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+import engines
+from BitBoard import BitBoard
+
+MIN_BUDGET_MS = 50.0
+
+
+def search(engine: str, options: Dict, moves: str) -> int:
+    """Worker entry point: the engine's move in the position after 'moves' (1-based move string)."""
+    state = BitBoard.from_moves(moves)
+    return engines.get(engine, **options).choose_move(state.to_board(), state.current_piece)
+
+
+class BotRequest:
+    def __init__(self, key: Hashable, engine: str, options: Dict, moves: str, time_ms: float, tag) -> None:
+        self.key = key
+        self.engine = engine
+        self.options = options
+        self.moves = moves
+        self.time_ms = time_ms
+        self.tag = tag  # returned with the result, e.g. to spot a game that has moved on
+        self.submitted = time.perf_counter()
+
+
+def _new_executor(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class BotPool:
+    """Queue of bot move requests, one per key (room), served by a process pool."""
+
+    def __init__(self, workers: int, on_ready: Optional[Callable[[], None]] = None) -> None:
+        self.workers = workers
+        self.on_ready = on_ready
+        self.executor = _new_executor(workers)
+        self.waiting: "OrderedDict[Hashable, BotRequest]" = OrderedDict()
+        self.running: Dict[Future, BotRequest] = {}  # occupies a worker, even if cancelled
+        self.current: Dict[Hashable, Future] = {}  # the search whose result each key still wants
+        self.done: Deque[Future] = deque()
+        self.lock = threading.Lock()  # guards 'done' (filled from the callback thread)
+
+    def submit(self, key: Hashable, engine: str, options: Dict, moves: str, time_ms: float, tag=None) -> None:
+        """Ask for a move for 'key', replacing any request of that key still waiting."""
+        self.waiting.pop(key, None)
+        self.waiting[key] = BotRequest(key, engine, options, moves, time_ms, tag)
+        self._dispatch()
+
+    def cancel(self, key: Hashable) -> None:
+        """Forget the request of 'key'; a search already running finishes but is discarded."""
+        self.waiting.pop(key, None)
+        self.current.pop(key, None)
+
+    def poll(self) -> List[Tuple[BotRequest, Optional[int], float]]:
+        """Finished requests as (request, column or None on failure, seconds since submit)."""
+        with self.lock:
+            finished, self.done = list(self.done), deque()
+        results = []
+        for future in finished:
+            request = self.running.pop(future)
+            if self.current.get(request.key) is not future:
+                continue  # cancelled or superseded
+            del self.current[request.key]
+            col = None if future.cancelled() or future.exception() is not None else future.result()
+            results.append((request, col, time.perf_counter() - request.submitted))
+        self._dispatch()
+        return results
+
+    def _dispatch(self) -> None:
+        while self.waiting and len(self.running) < self.workers:
+            key, request = self.waiting.popitem(last=False)
+            # Shrink the budget while more requests wait than there are workers
+            share = min(1.0, self.workers / float(max(1, len(self.waiting))))
+            budget = max(MIN_BUDGET_MS, request.time_ms * share)
+            args = (search, request.engine, dict(request.options, time_ms=budget), request.moves)
+            try:
+                future = self.executor.submit(*args)
+            except BrokenProcessPool:
+                # A worker died (its searches fail and are reported by poll()): start a fresh pool
+                self.executor = _new_executor(self.workers)
+                future = self.executor.submit(*args)
+            self.running[future] = request
+            self.current[key] = future
+            future.add_done_callback(self._finished)
+
+    def _finished(self, future: Future) -> None:
+        with self.lock:
+            self.done.append(future)
+        if self.on_ready is not None:
+            self.on_ready()
+
+    @property
+    def queued(self) -> int:
+        return len(self.waiting)
+
+    @property
+    def busy(self) -> int:
+        return len(self.running)
+
+    def close(self) -> None:
+        self.waiting.clear()
+        self.current.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import Optional, Tuple
 import pygame
 
 class Button:
@@ -18,11 +18,22 @@ class Button:
 		self.bg = bg
 		self.hover = hover
 
+		# Rendered label, re-rendered only when text or colour change
+		self._label: Optional[pygame.Surface] = None
+		self._label_key: Optional[Tuple] = None
+
+	def _get_label(self) -> pygame.Surface:
+		key = (self.text, self.fg, self.font)
+		if self._label is None or key != self._label_key:
+			self._label = self.font.render(self.text, True, self.fg)
+			self._label_key = key
+		return self._label
+
 	def draw(self, screen: pygame.Surface, mouse_pos: Tuple[int, int]) -> None:
 		is_hover = self.rect.collidepoint(mouse_pos)
 		color = self.hover if is_hover else self.bg
 		pygame.draw.rect(screen, color, self.rect, border_radius=10)
-		label = self.font.render(self.text, True, self.fg)
+		label = self._get_label()
 		screen.blit(label, label.get_rect(center=self.rect.center))
 
 	def is_clicked(self, mouse_pos: Tuple[int, int], mouse_down: bool) -> bool:
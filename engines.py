@@ -0,0 +1,315 @@
+"""
+Engine registry: AI strategies by name, behind one interface.
+
+Game loops and tools ask for an engine by name instead of importing a
+strategy module:
+
+    engine = engines.get("ai1", depth=6)
+    col = engine.choose_move(board, piece)
+
+The module behind an engine is only imported on its first search, so
+startup does not pay for engines that are never played. A strategy module
+provides score_position(board, piece), ai_choose_column(board, piece,
+depth=, evaluate=) and search(board, depth, piece, evaluate=) -> (score,
+column), like AIStrategy1 and AIStrategy2; the engine passes a wrapped
+score_position as 'evaluate' to count nodes and to enforce its budget. If
+the module has an EVAL_CACHE (AICore.EvalCache), leaves are scored through
+it, and its hit rate is part of the engine's stats().
+
+Deployments can add or replace engines without touching the UI:
+
+    CONNECT4_ENGINES="ai1=fast_strategy:7,ai3=my_strategy"
+
+(name=module, optionally followed by the default depth).
+
+When CONNECT4_POSITION_CACHE is set, results of exact searches (no
+evaluation noise) are kept in the persistent position cache
+(position_cache.py), so a position an engine has already searched as deep
+is answered without searching, in any session or process.
+"""
+import importlib
+import importlib.util
+import os
+import random
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import position_cache
+
+Board = List[List[int]]
+
+# name -> (module, default depth, description)
+_registry: Dict[str, Tuple[str, int, str]] = {}
+
+# Module -> "size:mtime" of its source file, see Engine.tag
+_versions: Dict[str, str] = {}
+# Modules every strategy searches with; editing them retires all cached results
+SHARED_SOURCES = ("AICore",)
+# Strategy module settings that change search results without editing its file
+SEARCH_SETTINGS = ("SEARCH", "ASPIRATION_WINDOW")
+
+# Engine settings per difficulty (keyword arguments for get()). Lower levels
+# search less (a leaf budget) and misjudge positions (evaluation noise)
+# instead of playing random moves, so they still take wins and block
+# threats. In a calibration match easy scored 0/10 against normal and
+# normal 0.5/10 against hard, using about 0.3% and 8% of hard's evaluated
+# positions per move.
+DIFFICULTIES: Dict[str, Dict] = {
+    "easy": {"depth": 1, "noise": 400},
+    "normal": {"depth": 3, "nodes": 300, "noise": 150},
+    "hard": {"depth": 6},
+}
+
+
+def _source_version(module_name: str) -> str:
+    """Size and mtime of a module's source file (looked up once per process)."""
+    if module_name not in _versions:
+        spec = importlib.util.find_spec(module_name)
+        origin = spec.origin if spec is not None and spec.origin else ""
+        stat = os.stat(origin) if os.path.isfile(origin) else None
+        _versions[module_name] = f"{stat.st_size}:{stat.st_mtime_ns}" if stat is not None else ""
+    return _versions[module_name]
+
+
+class SearchAborted(Exception):
+    """Raised inside a search when the engine's time or node budget runs out."""
+
+
+class _Counter:
+    """Wraps an evaluation function, counting calls and raising SearchAborted over budget.
+
+    The budget is only enforced once armed, so the first search always completes.
+    With 'noise', each position's score is off by up to +-noise; the error is
+    fixed per position for the whole move decision, so re-searches agree.
+    """
+
+    def __init__(self, evaluate: Callable[[Board, int], int], limit: Optional[int], deadline: Optional[float],
+                 noise: int = 0) -> None:
+        self.evaluate = evaluate
+        self.limit = limit
+        self.deadline = deadline
+        self.noise = noise
+        self.salt = random.getrandbits(32)
+        self.nodes = 0
+        self.armed = False
+
+    def __call__(self, board: Board, piece: int) -> int:
+        self.nodes += 1
+        if self.armed:
+            if self.limit is not None and self.nodes > self.limit:
+                raise SearchAborted
+            if self.deadline is not None and self.nodes % 32 == 0 and time.perf_counter() > self.deadline:
+                raise SearchAborted
+        if self.noise:
+            error = hash((self.salt, *map(tuple, board))) % (2 * self.noise + 1) - self.noise
+            return self.evaluate(board, piece) + error
+        return self.evaluate(board, piece)
+
+
+class Engine:
+    """One configured engine: a strategy module plus a search budget.
+
+    depth is the deepest search; with time_ms and/or nodes (leaf
+    evaluations) set, the engine deepens one ply at a time up to depth and
+    plays the deepest search that finished within the budget. Depth 1 is
+    always completed, however small the budget. noise blurs the evaluation
+    by up to +-noise points, for weaker but still sensible play.
+    """
+
+    def __init__(self, name: str, module: str, depth: int, time_ms: Optional[float] = None,
+                 nodes: Optional[int] = None, noise: int = 0) -> None:
+        self.name = name
+        self.module_name = module
+        self.depth = depth
+        self.time_ms = time_ms
+        self.nodes = nodes
+        self.noise = noise
+        self._module = None
+        self.reset()
+
+    @property
+    def module(self):
+        if self._module is None:
+            # The strategies pull in pygame via ConnectFour
+            os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+            self._module = importlib.import_module(self.module_name)
+        return self._module
+
+    @property
+    def options(self) -> Dict:
+        """Keyword arguments for get() that configure an equal engine (e.g. in another process)."""
+        return {"depth": self.depth, "time_ms": self.time_ms, "nodes": self.nodes, "noise": self.noise}
+
+    @property
+    def budgeted(self) -> bool:
+        return self.time_ms is not None or self.nodes is not None
+
+    @property
+    def tag(self) -> int:
+        """Identifies this engine's results in the position cache.
+
+        Derived from the name, the module, the size and mtime of its source
+        file and of SHARED_SOURCES, and its SEARCH_SETTINGS. Editing a
+        strategy or AICore, or switching the search mode, retires the
+        results stored before.
+        """
+        sources = "|".join(f"{name}:{_source_version(name)}" for name in (self.module_name,) + SHARED_SOURCES)
+        settings = "|".join(f"{name}={getattr(self.module, name, '')}" for name in SEARCH_SETTINGS)
+        return zlib.crc32(f"{self.name}|{sources}|{settings}".encode())
+
+    def _cache(self) -> Optional[position_cache.PositionCache]:
+        # Noisy results are random per decision; they are neither stored nor answered from the cache
+        return position_cache.default_cache() if not self.noise else None
+
+    def reset(self) -> None:
+        """Clear the statistics (the configuration is kept)."""
+        self.searches = 0
+        self.total_nodes = 0
+        self.total_ms = 0.0
+        self.cache_hits = 0
+        self.last: Dict = {}
+
+    def stats(self) -> Dict:
+        stats = {
+            "engine": self.name,
+            "searches": self.searches,
+            "nodes": self.total_nodes,
+            "time_ms": round(self.total_ms, 1),
+            "cache_hits": self.cache_hits,
+            "last": dict(self.last),
+        }
+        eval_cache = getattr(self._module, "EVAL_CACHE", None)
+        if eval_cache is not None:
+            stats["eval_cache"] = eval_cache.stats()  # shared by every engine on this module
+        return stats
+
+    def report(self, label: str) -> None:
+        """Print the statistics when CONNECT4_AI_STATS is set (e.g. when a game screen closes)."""
+        if not os.environ.get("CONNECT4_AI_STATS") or not self.searches:
+            return
+        s = self.stats()
+        avg = s["time_ms"] / s["searches"] if s["searches"] else 0.0
+        line = (f"[engines] {label} ({self.name}): {s['searches']} searches, {s['nodes']} leaves, "
+                f"avg {avg:.1f} ms, {s['cache_hits']} from the position cache")
+        if "eval_cache" in s:
+            e = s["eval_cache"]
+            line += (f"; eval cache {100.0 * e['hit_rate']:.1f}% hits "
+                     f"({e['size']}/{e['max_size']} positions, {e['policy']})")
+        print(line)
+
+    def _counter(self, started: float) -> _Counter:
+        deadline = started + self.time_ms / 1000.0 if self.time_ms is not None else None
+        evaluate = getattr(self.module, "EVAL_CACHE", None) or self.module.score_position
+        return _Counter(evaluate, self.nodes, deadline, self.noise)
+
+    def _finish(self, started: float, nodes: int, depth: int, **extra) -> None:
+        elapsed = (time.perf_counter() - started) * 1000.0
+        self.searches += 1
+        self.total_nodes += nodes
+        self.total_ms += elapsed
+        self.cache_hits += bool(extra.get("cached"))
+        self.last = {"depth": depth, "nodes": nodes, "time_ms": round(elapsed, 1), **extra}
+
+    def choose_move(self, board: Board, piece: int) -> int:
+        """The column to play for 'piece' (0-based)."""
+        started = time.perf_counter()
+        cache = self._cache()
+        key, tag = (position_cache.position_key(board, piece), self.tag) if cache is not None else (None, None)
+        if cache is not None:
+            hit = cache.get(key, tag)
+            if hit is not None and hit[0] >= self.depth and hit[2] is not None:
+                self._finish(started, 0, hit[0], cached=True)
+                return hit[2]
+        counter = self._counter(started)
+        if not self.budgeted:
+            col = self.module.ai_choose_column(board, piece, depth=self.depth, evaluate=counter)
+            self._finish(started, counter.nodes, self.depth)
+            if cache is not None:
+                cache.put(key, tag, self.depth, None, col)
+            return col
+        col, depth = None, 0
+        for d in range(1, self.depth + 1):
+            before = counter.nodes
+            try:
+                col = self.module.ai_choose_column(board, piece, depth=d, evaluate=counter)
+            except SearchAborted:
+                break
+            depth = d
+            if counter.nodes == before:
+                break  # a forced move (win or block): deeper searches would not change it
+            counter.armed = True
+        self._finish(started, counter.nodes, depth)
+        if cache is not None and depth:
+            cache.put(key, tag, depth, None, col)
+        return col
+
+    def analyze(self, board: Board, piece: int) -> Dict:
+        """Best move and score for 'piece' within the budget: best, score, depth, nodes, time_ms.
+
+        best is None when the position has no legal move.
+        """
+        started = time.perf_counter()
+        cache = self._cache()
+        key, tag = (position_cache.position_key(board, piece), self.tag) if cache is not None else (None, None)
+        if cache is not None:
+            hit = cache.get(key, tag)
+            if hit is not None and hit[0] >= self.depth and hit[1] is not None:
+                self._finish(started, 0, hit[0], score=hit[1], cached=True)
+                return {"best": hit[2], "score": hit[1], **self.last}
+        counter = self._counter(started)
+        score, best, depth = 0, None, 0
+        for d in (range(1, self.depth + 1) if self.budgeted else (self.depth,)):
+            try:
+                s, col = self.module.search(board, d, piece, evaluate=counter)
+            except SearchAborted:
+                break
+            if col is None:
+                break
+            score, best, depth = s, col, d
+            counter.armed = True
+        self._finish(started, counter.nodes, depth, score=score)
+        if cache is not None and best is not None:
+            cache.put(key, tag, depth, score, best)
+        return {"best": best, "score": score, **self.last}
+
+
+def register(name: str, module: str, depth: int = 5, description: str = "") -> None:
+    """Make 'module' available as engine 'name' (replacing an engine of that name)."""
+    _registry[name] = (module, depth, description)
+
+
+def names() -> List[str]:
+    return sorted(_registry)
+
+
+def describe(name: str) -> str:
+    return _lookup(name)[2]
+
+
+def get(name: str, depth: Optional[int] = None, time_ms: Optional[float] = None,
+        nodes: Optional[int] = None, noise: int = 0) -> Engine:
+    """A new engine instance; depth defaults to the engine's registered depth."""
+    module, default_depth, _ = _lookup(name)
+    return Engine(name, module, default_depth if depth is None else depth, time_ms, nodes, noise)
+
+
+def _lookup(name: str) -> Tuple[str, int, str]:
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError(f"unknown engine {name!r} (available: {', '.join(names())})") from None
+
+
+def _register_from_env(spec: str) -> None:
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, sep, target = item.partition("=")
+        if not sep:
+            raise ValueError(f"CONNECT4_ENGINES: expected name=module[:depth], got {item!r}")
+        module, _, depth = target.partition(":")
+        register(name.strip(), module.strip(), int(depth) if depth else 5, f"{module.strip()} (CONNECT4_ENGINES)")
+
+
+register("ai1", "AIStrategy1", 5, "balanced offense/defense with center control")
+register("ai2", "AIStrategy2", 6, "aggressive, offense first")
+_register_from_env(os.environ.get("CONNECT4_ENGINES", ""))
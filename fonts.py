@@ -0,0 +1,47 @@
+"""
+Shared font registry and rendered-text cache.
+
+pygame.font.SysFont is expensive (font lookup and load) and Font.render
+rasterizes the glyphs every call, so screens fetch fonts here once per size
+and reuse the rendered surfaces for text that does not change between frames.
+Returned surfaces are shared: blit them, never draw on them.
+"""
+from functools import lru_cache
+from typing import Dict, Tuple
+
+import pygame
+
+_fonts: Dict[int, pygame.font.Font] = {}
+
+
+def get_font(size: int) -> pygame.font.Font:
+	"""Return the default font at 'size', loading it on first use."""
+	if not pygame.font.get_init():
+		# pygame.quit() invalidated every Font we handed out
+		pygame.font.init()
+		clear()
+	font = _fonts.get(size)
+	if font is None:
+		font = _fonts[size] = pygame.font.SysFont(None, size)
+	return font
+
+
+@lru_cache(maxsize=512)
+def _render(text: str, size: int, color: Tuple[int, ...]) -> pygame.Surface:
+	return get_font(size).render(text, True, color)
+
+
+def render_text(text: str, size: int, color: Tuple[int, ...]) -> pygame.Surface:
+	"""Rendered (antialiased) text, cached by (text, size, color) with LRU eviction."""
+	if not pygame.font.get_init():
+		get_font(size)
+	return _render(text, size, tuple(color))
+
+
+def cache_info():
+	return _render.cache_info()
+
+
+def clear() -> None:
+	_fonts.clear()
+	_render.cache_clear()
@@ -0,0 +1,265 @@
+"""
+Compact game records and an append-only binary game log.
+
+A game is stored as its move list, one nibble per move (0-based column,
+two moves per byte), plus a little metadata: mode, result, start time and a
+small JSON dict (player names, AI depths, room code...). Any position of a
+game is rebuilt by replaying its first N moves, so seeking is instant and no
+boards are ever stored.
+
+On disk a log is two files:
+
+    games.c4log   records appended back to back:
+                  header (magic, plies, mode, result, started_at, meta length),
+                  meta JSON, packed moves
+    games.c4idx   one fixed-size entry per record (offset, length, plies,
+                  mode, result, started_at), so record N is one seek away
+
+Games are kept in memory while they are played (GameRecorder) and written
+with a single append when they end; nothing is written per move. The index
+is rebuilt from the log if it is missing or out of date.
+
+Set CONNECT4_RECORDS to the log path to use, or to "0" to disable recording.
+"""
+import json
+import os
+import struct
+import time
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from BitBoard import BitBoard, COLS
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "records", "games.c4log")
+
+MAGIC = b"C4G1"
+_HEADER = struct.Struct("<4sHBBdH")  # magic, plies, mode, result, started_at, meta length
+_ENTRY = struct.Struct("<QIHBBd")    # offset, record length, plies, mode, result, started_at
+
+# Mode codes; names are what the UI and the replay viewer show
+MODES = {"pvp": 1, "vs_ai": 2, "ai_vs_ai": 3, "online": 4}
+MODE_NAMES = {code: name for name, code in MODES.items()}
+
+# Result codes (players are 1 and 2)
+UNFINISHED = 0
+DRAW = 3
+
+_PAD = 0xF  # high nibble of the last byte when the number of moves is odd
+
+
+def pack_moves(moves: Sequence[int]) -> bytes:
+    """Two 0-based columns per byte, first move in the low nibble."""
+    out = bytearray((len(moves) + 1) // 2)
+    for i, col in enumerate(moves):
+        if not 0 <= col < COLS:
+            raise ValueError(f"invalid column {col} at ply {i}")
+        out[i >> 1] |= col << (4 * (i & 1))
+    if len(moves) & 1:
+        out[-1] |= _PAD << 4
+    return bytes(out)
+
+
+def unpack_moves(data: bytes, plies: int) -> List[int]:
+    moves = []
+    for byte in data:
+        moves.append(byte & 0xF)
+        moves.append(byte >> 4)
+    return moves[:plies]
+
+
+class GameRecord:
+    """One game: mode, 0-based move list, result and metadata."""
+
+    def __init__(
+        self,
+        mode: str,
+        moves: Optional[List[int]] = None,
+        result: int = UNFINISHED,
+        started_at: Optional[float] = None,
+        meta: Optional[Dict] = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode!r}")
+        self.mode = mode
+        self.moves: List[int] = moves if moves is not None else []
+        self.result = result
+        self.started_at = time.time() if started_at is None else started_at
+        self.meta: Dict = meta or {}
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    @property
+    def result_text(self) -> str:
+        if self.result == DRAW:
+            return "draw"
+        if self.result in (1, 2):
+            return f"player {self.result} wins"
+        return "unfinished"
+
+    def move_string(self) -> str:
+        """1-based move string (the BitBoard / SYNC convention)."""
+        return "".join(str(c + 1) for c in self.moves)
+
+    def position(self, ply: Optional[int] = None) -> BitBoard:
+        """The position after the first 'ply' moves (all of them by default)."""
+        bb = BitBoard()
+        for col in self.moves[:len(self.moves) if ply is None else max(0, ply)]:
+            bb.play(col)
+        return bb
+
+    # ---- Serialization ----
+    def to_bytes(self) -> bytes:
+        meta = json.dumps(self.meta, separators=(",", ":")).encode() if self.meta else b""
+        return (_HEADER.pack(MAGIC, len(self.moves), MODES[self.mode], self.result, self.started_at, len(meta))
+                + meta + pack_moves(self.moves))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GameRecord":
+        magic, plies, mode, result, started_at, meta_len = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a game record")
+        pos = _HEADER.size
+        meta = json.loads(data[pos:pos + meta_len]) if meta_len else {}
+        pos += meta_len
+        moves = unpack_moves(data[pos:pos + (plies + 1) // 2], plies)
+        return cls(MODE_NAMES.get(mode, "pvp"), moves, result, started_at, meta)
+
+
+class GameLog:
+    """Append-only log of GameRecords with a fixed-size index for random access.
+
+    Meant for one writing process per file (each game client and the server
+    keep their own log); any number of readers.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH) -> None:
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + ".c4idx"
+        self._entries: Optional[List[tuple]] = None  # loaded on first use
+
+    # ---- Index ----
+    def _load_index(self) -> List[tuple]:
+        if self._entries is not None:
+            return self._entries
+        entries: List[tuple] = []
+        log_size = os.path.getsize(self.path) if os.path.isfile(self.path) else 0
+        if os.path.isfile(self.index_path):
+            with open(self.index_path, "rb") as f:
+                data = f.read()
+            usable = len(data) - len(data) % _ENTRY.size
+            entries = [_ENTRY.unpack_from(data, i) for i in range(0, usable, _ENTRY.size)]
+        end = entries[-1][0] + entries[-1][1] if entries else 0
+        if end != log_size:
+            entries = self._rebuild_index()
+        self._entries = entries
+        return entries
+
+    def _rebuild_index(self) -> List[tuple]:
+        """Scan the log and rewrite the index (after a crash or a copied log)."""
+        entries = []
+        if os.path.isfile(self.path):
+            with open(self.path, "rb") as f:
+                data = f.read()
+            pos = 0
+            while pos + _HEADER.size <= len(data):
+                magic, plies, mode, result, started_at, meta_len = _HEADER.unpack_from(data, pos)
+                length = _HEADER.size + meta_len + (plies + 1) // 2
+                if magic != MAGIC or pos + length > len(data):
+                    break  # torn write at the end; the next append overwrites it
+                entries.append((pos, length, plies, mode, result, started_at))
+                pos += length
+            if pos != len(data):
+                with open(self.path, "r+b") as f:
+                    f.truncate(pos)
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        with open(self.index_path, "wb") as f:
+            f.write(b"".join(_ENTRY.pack(*e) for e in entries))
+        return entries
+
+    def __len__(self) -> int:
+        return len(self._load_index())
+
+    def entries(self) -> List[Dict]:
+        """Summary of every game without reading the records themselves."""
+        return [
+            {"index": i, "plies": e[2], "mode": MODE_NAMES.get(e[3], "?"), "result": e[4], "started_at": e[5]}
+            for i, e in enumerate(self._load_index())
+        ]
+
+    # ---- Access ----
+    def append(self, record: GameRecord) -> int:
+        """Write one record (a single append to each file); returns its index."""
+        entries = self._load_index()
+        data = record.to_bytes()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            f.write(data)
+        entry = (offset, len(data), len(record.moves), MODES[record.mode], record.result, record.started_at)
+        with open(self.index_path, "ab") as f:
+            f.write(_ENTRY.pack(*entry))
+        entries.append(entry)
+        return len(entries) - 1
+
+    def read(self, index: int) -> GameRecord:
+        entries = self._load_index()
+        offset, length = entries[index][:2]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return GameRecord.from_bytes(f.read(length))
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        for i in range(len(self)):
+            yield self.read(i)
+
+
+_default_log: Optional[GameLog] = None
+
+
+def default_log() -> Optional[GameLog]:
+    """The process-wide log (CONNECT4_RECORDS); None when recording is disabled."""
+    global _default_log
+    path = os.environ.get("CONNECT4_RECORDS", DEFAULT_PATH)
+    if path in ("", "0"):
+        return None
+    if _default_log is None or _default_log.path != path:
+        _default_log = GameLog(path)
+    return _default_log
+
+
+class GameRecorder:
+    """Collects one game's moves in memory and appends the record when it ends.
+
+    Call move() for every move, finish() with the result (or close() when
+    the game is abandoned); a record is written at most once and only if at
+    least one move was played.
+    """
+
+    def __init__(self, mode: str, log: Optional[GameLog] = None, **meta) -> None:
+        self.log = log if log is not None else default_log()
+        self.record = GameRecord(mode, meta=meta)
+        self.saved = False
+
+    def move(self, col: int) -> None:
+        self.record.moves.append(col)
+
+    def set_moves(self, moves: Sequence[int]) -> None:
+        """Replace the move list (e.g. from an authoritative SYNC)."""
+        self.record.moves = list(moves)
+
+    def finish(self, result: int) -> None:
+        """result: winning player (1/2) or DRAW."""
+        self.record.result = result
+        self._save()
+
+    def close(self) -> None:
+        self._save()
+
+    def _save(self) -> None:
+        if self.saved or self.log is None or not self.record.moves:
+            return
+        self.saved = True
+        try:
+            self.log.append(self.record)
+        except OSError as e:
+            print(f"[game_records] Failed to save game: {e}")
@@ -0,0 +1,360 @@
+"""
+Load generator for server.py.
+
+Spins up pairs of simulated clients on one asyncio loop. Each pair HOSTs and
+JOINs a room (or queues with QUICKMATCH when --quickmatch is given), READYs up
+and plays complete games through the real protocol (random moves, or
+AIStrategy1 with --policy ai), while the harness records connect latency,
+matchmaking latency, move relay latency (mover's send -> opponent's receive),
+throughput and error counts. AI moves are searched in a process pool
+(--search-workers), so a search never stalls the event loop that every
+simulated client shares. With --bot LEVEL each room is a single client
+playing the server's bot, and the move latency includes the bot's search.
+
+Example (spawns a local server on a spare port unless --port is given):
+
+    python loadtest.py --spawn-server --rooms 2000 --games 3 --ramp 5
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import engines
+from BitBoard import BitBoard
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.connect_ms: List[float] = []
+        self.move_ms: List[float] = []
+        self.match_ms: List[float] = []
+        self.games = 0
+        self.moves = 0
+        self.messages_in = 0
+        self.messages_out = 0
+        self.errors: Dict[str, int] = {}
+
+    def error(self, kind: str) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def summary(self, elapsed: float) -> dict:
+        def dist(values: List[float]) -> dict:
+            return {
+                "count": len(values),
+                "p50": round(percentile(values, 0.50), 3),
+                "p90": round(percentile(values, 0.90), 3),
+                "p99": round(percentile(values, 0.99), 3),
+                "max": round(max(values), 3) if values else 0.0,
+            }
+
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "games_completed": self.games,
+            "moves": self.moves,
+            "moves_per_second": round(self.moves / elapsed, 1) if elapsed else 0.0,
+            "messages_per_second": round((self.messages_in + self.messages_out) / elapsed, 1) if elapsed else 0.0,
+            "connect_latency_ms": dist(self.connect_ms),
+            "move_latency_ms": dist(self.move_ms),
+            "match_latency_ms": dist(self.match_ms),
+            "errors": dict(self.errors),
+        }
+
+
+class SimClient:
+    """One simulated player speaking the newline-framed protocol."""
+
+    def __init__(self, stats: Stats) -> None:
+        self.stats = stats
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self, host: str, port: int, timeout: float) -> None:
+        started = time.perf_counter()
+        self.reader, self.writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        greeting = await self.recv(timeout)
+        if greeting != "CONNECTED":
+            raise ConnectionError(f"unexpected greeting {greeting!r}")
+        self.stats.connect_ms.append((time.perf_counter() - started) * 1000.0)
+
+    async def send(self, message: str) -> None:
+        self.writer.write((message + "\n").encode())
+        self.stats.messages_out += 1
+        await self.writer.drain()
+
+    async def recv(self, timeout: float) -> str:
+        line = await asyncio.wait_for(self.reader.readline(), timeout)
+        if not line:
+            raise ConnectionError("server closed the connection")
+        self.stats.messages_in += 1
+        return line.decode().strip()
+
+    async def expect(self, prefix: str, timeout: float) -> str:
+        """Read until a message starting with 'prefix' arrives."""
+        while True:
+            msg = await self.recv(timeout)
+            if msg.startswith(prefix):
+                return msg
+            if msg.startswith("ERR"):
+                raise RuntimeError(msg)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+class Game:
+    """Timing shared by both simulated players of one game (same process, same clock)."""
+
+    def __init__(self) -> None:
+        self.sent_at: Optional[float] = None
+
+
+# Searches for --policy ai, see run()
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def ai_move(moves: str, depth: int) -> int:
+    """Worker entry point: AIStrategy1's move in the position after 'moves' (1-based move string)."""
+    state = BitBoard.from_moves(moves)
+    return engines.get("ai1", depth=depth).choose_move(state.to_board(), state.current_piece)
+
+
+async def choose_move(state: BitBoard, policy: str, depth: int) -> int:
+    if policy == "ai":
+        # Off the event loop: a search here would delay every other client's messages
+        return await asyncio.get_running_loop().run_in_executor(_pool, ai_move, state.move_string(), depth)
+    return random.choice(state.valid_moves())
+
+
+async def play_side(client: SimClient, role: int, game: Game, args, stats: Stats) -> None:
+    """Play one game as 'role' until the server announces WIN or DRAW."""
+    state = BitBoard()  # this player's own view, updated from MOVE messages
+    while True:
+        if state.current_piece == role and not state.is_over():
+            if args.think_ms:
+                await asyncio.sleep(args.think_ms / 1000.0 * random.uniform(0.5, 1.5))
+            col = await choose_move(state, args.policy, args.depth)
+            state.play(col)
+            game.sent_at = time.perf_counter()
+            await client.send(f"MOVE:{col}")
+            stats.moves += 1
+            continue
+
+        msg = await client.recv(args.timeout)
+        if msg.startswith("MOVE:"):
+            state.play(int(msg.split(":")[1]))
+            if game.sent_at is not None:
+                stats.move_ms.append((time.perf_counter() - game.sent_at) * 1000.0)
+                game.sent_at = None
+        elif msg.startswith("WIN:") or msg == "DRAW":
+            return
+        elif msg.startswith("SYNC:"):
+            state = BitBoard.from_moves(msg.split(":", 1)[1])
+        elif msg.startswith("ERR"):
+            stats.error("move_rejected")
+        elif msg == "LEFT":
+            raise ConnectionError("opponent left")
+
+
+async def run_quickmatch(args, stats: Stats, games: Dict[str, Game]) -> None:
+    """One client that queues for a quick match and plays whoever it is paired with."""
+    client = SimClient(stats)
+    try:
+        await client.connect(args.host, args.port, args.timeout)
+        for _ in range(args.games):
+            started = time.perf_counter()
+            await client.send("QUICKMATCH")
+            code = (await client.expect("MATCHED:", args.timeout)).split(":")[1]
+            stats.match_ms.append((time.perf_counter() - started) * 1000.0)
+            role = int((await client.expect("ROLE:", args.timeout)).split(":")[1])
+            # Both partners share the Game record through the room code
+            game = games.setdefault(code, Game())
+            await play_side(client, role, game, args, stats)
+            if role == 1:
+                stats.games += 1
+                games.pop(code, None)
+            # The next QUICKMATCH leaves this room on the server side
+    except asyncio.TimeoutError:
+        stats.error("timeout")
+    except (ConnectionError, OSError):
+        stats.error("connection")
+    except RuntimeError as e:
+        stats.error(str(e).split(":", 1)[0])
+    finally:
+        client.close()
+
+
+async def run_room(args, stats: Stats) -> None:
+    host, guest = SimClient(stats), SimClient(stats)
+    try:
+        await asyncio.gather(host.connect(args.host, args.port, args.timeout),
+                             guest.connect(args.host, args.port, args.timeout))
+        await host.send("HOST")
+        code = (await host.expect("HOSTED:", args.timeout)).split(":")[1]
+        await guest.send(f"JOIN:{code}")
+        await host.expect("JOINED", args.timeout)
+
+        for _ in range(args.games):
+            await host.send("READY")
+            await guest.send("READY")
+            roles = await asyncio.gather(host.expect("ROLE:", args.timeout), guest.expect("ROLE:", args.timeout))
+            game = Game()
+            await asyncio.gather(
+                play_side(host, int(roles[0].split(":")[1]), game, args, stats),
+                play_side(guest, int(roles[1].split(":")[1]), game, args, stats),
+            )
+            stats.games += 1
+    except asyncio.TimeoutError:
+        stats.error("timeout")
+    except (ConnectionError, OSError):
+        stats.error("connection")
+    except RuntimeError as e:
+        stats.error(str(e).split(":", 1)[0])
+    finally:
+        for client in (host, guest):
+            try:
+                if client.writer is not None:
+                    await client.send("LEAVE")
+            except Exception:
+                pass
+            client.close()
+
+
+async def run_bot_room(args, stats: Stats) -> None:
+    """One client playing games against the server's bot (it is always player 1)."""
+    client = SimClient(stats)
+    try:
+        await client.connect(args.host, args.port, args.timeout)
+        for i in range(args.games):
+            await client.send(f"BOT:{args.bot}" if i == 0 else "READY")
+            await client.expect("ROLE:", args.timeout)
+            await play_side(client, 1, Game(), args, stats)
+            stats.games += 1
+    except asyncio.TimeoutError:
+        stats.error("timeout")
+    except (ConnectionError, OSError):
+        stats.error("connection")
+    except RuntimeError as e:
+        stats.error(str(e).split(":", 1)[0])
+    finally:
+        try:
+            if client.writer is not None:
+                await client.send("LEAVE")
+        except Exception:
+            pass
+        client.close()
+
+
+async def run(args) -> dict:
+    global _pool
+    if args.policy == "ai":
+        _pool = ProcessPoolExecutor(max_workers=args.search_workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        return await _run(args)
+    finally:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+async def _run(args) -> dict:
+    stats = Stats()
+    started = time.perf_counter()
+    tasks = []
+    games: Dict[str, Game] = {}
+    for _ in range(args.rooms):
+        if args.bot:
+            tasks.append(asyncio.ensure_future(run_bot_room(args, stats)))
+        elif args.quickmatch:
+            tasks.append(asyncio.ensure_future(run_quickmatch(args, stats, games)))
+            tasks.append(asyncio.ensure_future(run_quickmatch(args, stats, games)))
+        else:
+            tasks.append(asyncio.ensure_future(run_room(args, stats)))
+        if args.ramp and args.rooms > 1:
+            await asyncio.sleep(args.ramp / args.rooms)
+    await asyncio.gather(*tasks)
+    return stats.summary(time.perf_counter() - started)
+
+
+def spare_port(host: str) -> int:
+    """A port on 'host' that nothing listens on right now."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def raise_fd_limit() -> None:
+    """Each simulated client needs a descriptor; lift the soft limit to the hard one."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Load-test the Connect Four server with simulated clients")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="server port (default: 8080, or a spare one with --spawn-server)")
+    parser.add_argument("--rooms", type=int, default=100, help="rooms to open (two clients each)")
+    parser.add_argument("--games", type=int, default=1, help="games to play per room")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which rooms are started")
+    parser.add_argument("--policy", choices=("random", "ai"), default="random", help="how simulated players move")
+    parser.add_argument("--depth", type=int, default=2, help="search depth for --policy ai")
+    parser.add_argument("--search-workers", type=int, default=os.cpu_count() or 1,
+                        help="processes searching --policy ai moves (default: CPU count)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean think time before each move")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-message timeout in seconds")
+    parser.add_argument("--quickmatch", action="store_true", help="pair clients via QUICKMATCH instead of HOST/JOIN")
+    parser.add_argument("--bot", choices=sorted(engines.DIFFICULTIES), help="play against the server's bot at this level")
+    parser.add_argument("--spawn-server", action="store_true", help="start a local server.py for the run")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    raise_fd_limit()
+    proc = None
+    if args.spawn_server:
+        if args.port is None:
+            args.port = spare_port(args.host)
+        server_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+        proc = subprocess.Popen([sys.executable, server_py, "--host", args.host, "--port", str(args.port),
+                                 "--metrics-port", "0", "--log-level", "WARNING"])
+        time.sleep(0.5)
+    elif args.port is None:
+        args.port = 8080
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"Rooms: {args.rooms}  games completed: {report['games_completed']}  in {report['elapsed_seconds']}s")
+    print(f"Throughput: {report['moves_per_second']} moves/s, {report['messages_per_second']} messages/s")
+    for name in ("connect_latency_ms", "match_latency_ms", "move_latency_ms"):
+        d = report[name]
+        print(f"{name}: p50={d['p50']} p90={d['p90']} p99={d['p99']} max={d['max']} (n={d['count']})")
+    print(f"Errors: {report['errors'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
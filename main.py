@@ -1,26 +1,57 @@
 from __future__ import annotations
-import sys
+import time
+
+_STARTED = time.perf_counter()  # for the startup report
+
+import argparse
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 import pygame
 
-from SoundManager import SoundManager
-import Human_vs_AI as HUAI
-import AI_vs_AI as AIAI
-import ConnectFour as CF
+import asset_cache
+import fonts
+from SceneManager import Scene, SceneManager
 from ConnectFour import ConnectFour as C4
-from MultiplayerLobby import Lobby
+import profiling
 from button import Button
 
+# The game modes (AI, networking, replays) are imported when first opened,
+# so the menu's first frame only waits for what the menu itself needs
+if TYPE_CHECKING:
+	from MultiplayerLobby import Lobby
+
+
+class StartupTimer:
+	"""Time from launch to the menu's first frame, by phase; CONNECT4_STARTUP_STATS=1 prints it."""
+
+	def __init__(self, started: float) -> None:
+		self.started = started
+		self.last = started
+		self.phases: List[Tuple[str, float]] = []
+
+	def mark(self, phase: str) -> None:
+		now = time.perf_counter()
+		self.phases.append((phase, (now - self.last) * 1000.0))
+		self.last = now
 
-class DifficultySelectionScreen:
-	def __init__(self, screen: pygame.Surface, sound: SoundManager, main_menu: MainMenu) -> None:
-		self.screen = screen
-		self.sound = sound
+	def report(self) -> None:
+		if os.environ.get("CONNECT4_STARTUP_STATS"):
+			phases = ", ".join(f"{name} {ms:.1f} ms" for name, ms in self.phases)
+			print(f"[startup] {phases}; first frame after {(self.last - self.started) * 1000.0:.1f} ms")
+
+
+class DifficultySelectionScreen(Scene):
+	"""Pick a difficulty for Human vs AI; replaces itself with the game (Esc goes back)."""
+
+	caption = "Connect 4 - Difficulty"
+	stats_label = "difficulty"
+
+	def __init__(self, main_menu: MainMenu) -> None:
+		super().__init__()
 		self.width, self.height = self.screen.get_size()
-		self.title_font = pygame.font.SysFont(None, 72)
-		self.button_font = pygame.font.SysFont(None, 48)
+		self.title_font = fonts.get_font(72)
+		self.button_font = fonts.get_font(48)
 		
 		self.main_menu = main_menu
 		# Buttons layout
@@ -54,68 +85,54 @@ class DifficultySelectionScreen:
 			(200, 220, 240),
 		)
 
-	def run(self) -> Optional[int]:
-		"""Returns selected depth (1, 3, or 6), or None if cancelled"""
-		clock = pygame.time.Clock()
-		running = True
-		selected_depth = None
-
-		while running:
-			mouse_pos = pygame.mouse.get_pos()
-			mouse_down = False
-
-			for event in pygame.event.get():
-				if event.type == pygame.QUIT:
-					running = False
-				elif event.type == pygame.KEYDOWN:
-					if event.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
-						running = False
-				elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-					mouse_down = True
-
-			# Handle clicks
-			if mouse_down:
-				if self.btn_easy.is_clicked(mouse_pos, mouse_down):
-					selected_depth = 1
-					running = False
-				elif self.btn_normal.is_clicked(mouse_pos, mouse_down):
-					selected_depth = 3
-					running = False
-				elif self.btn_hard.is_clicked(mouse_pos, mouse_down):
-					selected_depth = 6
-					running = False
-
-			# Background
-			self.main_menu._draw_background()
-
-			# Title
-			title = self.title_font.render("Select Difficulty", True, C4.text_color)
-			self.screen.blit(title, title.get_rect(center=(self.width // 2, C4.cell_size // 2)))
-
-			# Buttons
-			self.btn_easy.draw(self.screen, mouse_pos)
-			self.btn_normal.draw(self.screen, mouse_pos)
-			self.btn_hard.draw(self.screen, mouse_pos)
-
-			# Footer hint
-			hint = pygame.font.SysFont(None, 28).render("Esc/Backspace: Back", True, (180, 180, 180))
-			self.screen.blit(hint, hint.get_rect(center=(self.width // 2, self.height - 30)))
-
-   
-			pygame.display.flip()
-			clock.tick(C4.fps)
-
-		return selected_depth
-
-
-class MusicSettingsScreen:
-	def __init__(self, screen: pygame.Surface, sound: SoundManager) -> None:
-		self.screen = screen
-		self.sound = sound
+	def _start(self, flag: str) -> None:
+		import Human_vs_AI as HUAI
+		# Search depth, budget and noise per level: engines.DIFFICULTIES
+		self.manager.replace(HUAI.HumanVsAIScene(flag=flag))
+
+	def handle_event(self, event: pygame.event.Event) -> None:
+		if event.type == pygame.KEYDOWN:
+			if event.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
+				self.manager.pop()
+		elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+			mouse_pos = event.pos
+			if self.btn_easy.is_clicked(mouse_pos, True):
+				self._start("easy")
+			elif self.btn_normal.is_clicked(mouse_pos, True):
+				self._start("normal")
+			elif self.btn_hard.is_clicked(mouse_pos, True):
+				self._start("hard")
+
+	def draw(self, screen: pygame.Surface) -> None:
+		mouse_pos = pygame.mouse.get_pos()
+
+		# Background
+		self.main_menu._draw_background()
+
+		# Title
+		title = fonts.render_text("Select Difficulty", 72, C4.text_color)
+		self.screen.blit(title, title.get_rect(center=(self.width // 2, C4.cell_size // 2)))
+
+		# Buttons
+		self.btn_easy.draw(self.screen, mouse_pos)
+		self.btn_normal.draw(self.screen, mouse_pos)
+		self.btn_hard.draw(self.screen, mouse_pos)
+
+		# Footer hint
+		hint = fonts.render_text("Esc/Backspace: Back", 28, (180, 180, 180))
+		self.screen.blit(hint, hint.get_rect(center=(self.width // 2, self.height - 30)))
+
+
+class MusicSettingsScreen(Scene):
+	caption = "Connect 4 - Music Settings"
+	stats_label = "music settings"
+
+	def __init__(self) -> None:
+		super().__init__()
 		self.width, self.height = self.screen.get_size()
-		self.title_font = pygame.font.SysFont(None, 72)
-		self.ui_font = pygame.font.SysFont(None, 36)
-		self.small_font = pygame.font.SysFont(None, 28)
+		self.title_font = fonts.get_font(72)
+		self.ui_font = fonts.get_font(36)
+		self.small_font = fonts.get_font(28)
 
 		# Slider geometry
 		self.slider_w = int(self.width * 0.5)
@@ -123,8 +140,11 @@ class MusicSettingsScreen:
 		self.slider_x = (self.width - self.slider_w) // 2
 		self.bgm_slider_y = C4.cell_size * 2
 		self.sfx_slider_y = C4.cell_size * 3
+		self._bgm_track = pygame.Rect(self.slider_x, self.bgm_slider_y, self.slider_w, self.slider_h)
+		self._sfx_track = pygame.Rect(self.slider_x, self.sfx_slider_y, self.slider_w, self.slider_h)
 
 		self.active: Optional[str] = None  # 'bgm' or 'sfx'
+		self.dragging: Optional[str] = None
 
 	def _draw_slider(self, y: int, value: float, label: str) -> pygame.Rect:
 		# Track
@@ -140,7 +160,7 @@ class MusicSettingsScreen:
 		knob_x = self.slider_x + fill_w
 		pygame.draw.circle(self.screen, (220, 220, 220), (knob_x, y + self.slider_h // 2), 10)
 		# Label
-		text = self.ui_font.render(f"{label}: {int(round(pct))}%", True, C4.text_color)
+		text = fonts.render_text(f"{label}: {int(round(pct))}%", 36, C4.text_color)
 		self.screen.blit(text, text.get_rect(midbottom=(self.width // 2, y - 10)))
 
 		return track_rect
@@ -152,80 +172,69 @@ class MusicSettingsScreen:
 			return 0.0
 		return (rel / track.w) * 100.0
 
-	def run(self) -> None:
-		clock = pygame.time.Clock()
-		running = True
-		dragging: Optional[str] = None
-
-		while running:
-			mouse_pos = pygame.mouse.get_pos()
-			mouse_down = False
-			for event in pygame.event.get():
-				if event.type == pygame.QUIT:
-					running = False
-				elif event.type == pygame.KEYDOWN:
-					if event.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
-						running = False
-				elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-					mouse_down = True
-					dragging = (
-						'bgm' if self._bgm_track.collidepoint(mouse_pos)
-						else ('sfx' if self._sfx_track.collidepoint(mouse_pos) else None)
-					)
-				elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-					dragging = None
-
-			# Background
-			self.screen.fill(C4.bg_color)
-
-			# Title
-			title = self.title_font.render("Music Settings", True, C4.text_color)
-			self.screen.blit(title, title.get_rect(center=(self.width // 2, C4.cell_size // 2)))
-
-			# Sliders
-			self._bgm_track = self._draw_slider(self.bgm_slider_y, self.sound.bgm_volume, "BGM Volume")
-			self._sfx_track = self._draw_slider(self.sfx_slider_y, self.sound.sfx_volume, "SFX Volume")
-
-			# Handle dragging to update values
-			if dragging == 'bgm' and pygame.mouse.get_pressed()[0]:
-				new_val = self._value_from_mouse(self._bgm_track, mouse_pos[0])  # 0..100
-				self.sound.set_bgm_volume(new_val)
-			elif dragging == 'sfx' and pygame.mouse.get_pressed()[0]:
-				new_val = self._value_from_mouse(self._sfx_track, mouse_pos[0])  # 0..100
-				self.sound.set_sfx_volume(new_val)
-
-			# Footer hint
-			hint = self.small_font.render("Esc/Backspace: Back", True, (180, 180, 180))
-			self.screen.blit(hint, hint.get_rect(center=(self.width // 2, self.height - 30)))
-
-			pygame.display.flip()
-			clock.tick(C4.fps)
-
-
-class MainMenu:
+	def handle_event(self, event: pygame.event.Event) -> None:
+		if event.type == pygame.KEYDOWN:
+			if event.key in (pygame.K_ESCAPE, pygame.K_BACKSPACE):
+				self.manager.pop()
+		elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+			self.dragging = (
+				'bgm' if self._bgm_track.collidepoint(event.pos)
+				else ('sfx' if self._sfx_track.collidepoint(event.pos) else None)
+			)
+		elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+			self.dragging = None
+
+	def update(self) -> None:
+		# Handle dragging to update values
+		mouse_pos = pygame.mouse.get_pos()
+		if self.dragging == 'bgm' and pygame.mouse.get_pressed()[0]:
+			new_val = self._value_from_mouse(self._bgm_track, mouse_pos[0])  # 0..100
+			self.sound.set_bgm_volume(new_val)
+		elif self.dragging == 'sfx' and pygame.mouse.get_pressed()[0]:
+			new_val = self._value_from_mouse(self._sfx_track, mouse_pos[0])  # 0..100
+			self.sound.set_sfx_volume(new_val)
+
+	def draw(self, screen: pygame.Surface) -> None:
+		# Background
+		self.screen.fill(C4.bg_color)
+
+		# Title
+		title = fonts.render_text("Music Settings", 72, C4.text_color)
+		self.screen.blit(title, title.get_rect(center=(self.width // 2, C4.cell_size // 2)))
+
+		# Sliders
+		self._bgm_track = self._draw_slider(self.bgm_slider_y, self.sound.bgm_volume, "BGM Volume")
+		self._sfx_track = self._draw_slider(self.sfx_slider_y, self.sound.sfx_volume, "SFX Volume")
+
+		# Footer hint
+		hint = fonts.render_text("Esc/Backspace: Back", 28, (180, 180, 180))
+		self.screen.blit(hint, hint.get_rect(center=(self.width // 2, self.height - 30)))
+
+
+class MainMenu(Scene):
+	caption = "Connect 4 - Main Menu"
+	stats_label = "main menu"
+
 	def __init__(self) -> None:
-		pygame.init()
-		pygame.display.set_caption("Connect 4 - Main Menu")
+		super().__init__()
 		self.width, self.height = C4.width, C4.height
-		self.screen = pygame.display.set_mode((self.width, self.height))
-		self.clock = pygame.time.Clock()
 
-		self.lobby = Lobby(on_return=main)
+		# The lobby is built the first time PvP is opened, then reused
+		self.lobby: Optional[Lobby] = None
 
-		# Background image (optional)
+		# Background image (optional), decoded once per process by asset_cache.
+		# Until the startup preload has decoded it, frames use the plain color.
+		self.background_path = asset_cache.asset_path('bg.jpeg')
 		self.background: Optional[pygame.Surface] = None
-		bg_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'bg.jpeg')
-		if os.path.isfile(bg_path):
-			try:
-				img = pygame.image.load(bg_path)
-				self.background = pygame.transform.scale(img, (self.width, self.height))
-			except Exception as e:
-				print(f"[MainMenu] Failed to load background: {e}")
-				self.background = None
+		self._background_pending = True
+		self._backdrop: Optional[pygame.Surface] = None  # background with the dim panel baked in
+
+		# Set by main(); reported once the first frame is on screen
+		self.startup: Optional[StartupTimer] = None
 
 		# Fonts
-		self.title_font = pygame.font.SysFont(None, 96)
-		self.button_font = pygame.font.SysFont(None, 48)
+		self.title_font = fonts.get_font(96)
+		self.button_font = fonts.get_font(48)
 
 		# Colors
 		self.title_color = C4.text_color
@@ -262,8 +271,16 @@ class MainMenu:
 			self.button_bg,
 			self.button_hover,
 		)
-		self.btn_music = Button(
+		self.btn_replays = Button(
 			pygame.Rect(bx, base_y + 3 * (bh + gap), bw, bh),
+			"Replays",
+			self.button_font,
+			self.button_fg,
+			self.button_bg,
+			self.button_hover,
+		)
+		self.btn_music = Button(
+			pygame.Rect(bx, base_y + 4 * (bh + gap), bw, bh),
 			"Music Settings",
 			self.button_font,
 			self.button_fg,
@@ -275,23 +292,30 @@ class MainMenu:
 		self.toast_text: Optional[str] = None
 		self.toast_until: int = 0
 
-		# Sound
-		self.sound = SoundManager()
-		self.sound.play_bgm()
-
-	def _draw_background(self) -> None:
+	def _build_backdrop(self) -> pygame.Surface:
+		backdrop = pygame.Surface((self.width, self.height)).convert()
 		if self.background is not None:
-			self.screen.blit(self.background, (0, 0))
+			backdrop.blit(self.background, (0, 0))
 		else:
-			self.screen.fill(C4.bg_color)
+			backdrop.fill(C4.bg_color)
 
 		# Dim panel for board area feel (semi-transparent)
 		overlay = pygame.Surface((self.width, self.height - C4.cell_size), pygame.SRCALPHA)
 		overlay.fill((0, 0, 0, 60))
-		self.screen.blit(overlay, (0, C4.cell_size))
+		backdrop.blit(overlay, (0, C4.cell_size))
+		return backdrop
+
+	def _draw_background(self) -> None:
+		if self._background_pending and not asset_cache.loading(self.background_path):
+			self.background = asset_cache.get_image(self.background_path, (self.width, self.height))
+			self._background_pending = False
+			self._backdrop = None
+		if self._backdrop is None:
+			self._backdrop = self._build_backdrop()
+		self.screen.blit(self._backdrop, (0, 0))
 
 	def _draw_title(self) -> None:
-		title_surf = self.title_font.render("Connect 4", True, self.title_color)
+		title_surf = fonts.render_text("Connect 4", 96, self.title_color)
 		self.screen.blit(title_surf, title_surf.get_rect(center=(self.width // 2, C4.cell_size // 2)))
 
 	def _draw_buttons(self) -> None:
@@ -299,62 +323,30 @@ class MainMenu:
 		self.btn_pvp.draw(self.screen, mouse_pos)
 		self.btn_ai.draw(self.screen, mouse_pos)
 		self.btn_ai_vs_ai.draw(self.screen, mouse_pos)
+		self.btn_replays.draw(self.screen, mouse_pos)
 		self.btn_music.draw(self.screen, mouse_pos)
 
-	def _handle_clicks(self, mouse_down: bool) -> None:
-		mouse_pos = pygame.mouse.get_pos()
-		if self.btn_pvp.is_clicked(mouse_pos, mouse_down):
-			# Stop menu BGM and jump to game loop
-			try:
-				self.sound.cleanup()
-			except Exception:
-				pass
-			self.lobby.run()
-			# Restart menu BGM when returning from game
-			try:
-				self.sound.play_bgm()
-			except Exception:
-				pass
-		elif self.btn_ai.is_clicked(mouse_pos, mouse_down):
-			# Show difficulty selection screen
-			difficulty_screen = DifficultySelectionScreen(self.screen, self.sound, self)
-			selected_depth = difficulty_screen.run()
-			
-			if selected_depth is not None:
-				try:
-					self.sound.cleanup()
-				except Exception:
-					pass
-				
-				if selected_depth == 1:
-					flag = "easy"
-				elif selected_depth == 3:
-					flag = "normal"
-				else:
-					flag = "hard"
-				HUAI.game_loop_ai(depth=selected_depth, flag=flag)
-				try:
-					self.sound.play_bgm()
-				except Exception:
-					pass
-		elif self.btn_ai_vs_ai.is_clicked(mouse_pos, mouse_down):
-			# Stop menu BGM and start AI vs AI game loop
-			try:
-				self.sound.cleanup()
-			except Exception:
-				pass
-			AIAI.game_loop_ai_vs_ai(ai1_depth=6, ai2_depth=6, delay_ms=500)
-			# Restart menu BGM when returning from game
-			try:
-				self.sound.play_bgm()
-			except Exception:
-				pass
-		elif self.btn_music.is_clicked(mouse_pos, mouse_down):
-			MusicSettingsScreen(self.screen, self.sound).run()
+	def _handle_clicks(self, mouse_pos) -> None:
+		if self.btn_pvp.is_clicked(mouse_pos, True):
+			if self.lobby is None:
+				from MultiplayerLobby import Lobby
+				self.lobby = Lobby()
+			self.manager.push(self.lobby)
+		elif self.btn_ai.is_clicked(mouse_pos, True):
+			# Show difficulty selection screen; it replaces itself with the game
+			self.manager.push(DifficultySelectionScreen(self))
+		elif self.btn_ai_vs_ai.is_clicked(mouse_pos, True):
+			import AI_vs_AI as AIAI
+			self.manager.push(AIAI.AIVsAIScene(ai1_depth=6, ai2_depth=6, delay_ms=500))
+		elif self.btn_replays.is_clicked(mouse_pos, True):
+			from Replay import ReplayScene
+			self.manager.push(ReplayScene())
+		elif self.btn_music.is_clicked(mouse_pos, True):
+			self.manager.push(MusicSettingsScreen())
 
 	def _draw_toast(self) -> None:
 		if self.toast_text and pygame.time.get_ticks() < self.toast_until:
-			surf = pygame.font.SysFont(None, 36).render(self.toast_text, True, C4.text_color)
+			surf = fonts.render_text(self.toast_text, 36, C4.text_color)
 			bg_rect = surf.get_rect(center=(self.width // 2, self.height - 40)).inflate(20, 10)
 			toast_overlay = pygame.Surface(bg_rect.size, pygame.SRCALPHA)
 			pygame.draw.rect(toast_overlay, (0, 0, 0, 160), toast_overlay.get_rect(), border_radius=8)
@@ -363,45 +355,53 @@ class MainMenu:
 		else:
 			self.toast_text = None
 
-	def run(self) -> None:
-		running = True
-		while running:
-			mouse_down = False
-			for event in pygame.event.get():
-				if event.type == pygame.QUIT:
-					running = False
-				elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-					mouse_down = True
-				elif event.type == pygame.KEYDOWN:
-					if event.key in (pygame.K_ESCAPE, pygame.K_q):
-						running = False
-
-			# Draw
-			self._draw_background()
-			self._draw_title()
-			self._draw_buttons()
-			self._draw_toast()
-
-			# Handle clicks after drawing to avoid visual lag
-			if mouse_down:
-				self._handle_clicks(mouse_down)
-
-			pygame.display.flip()
-			self.clock.tick(C4.fps)
-
-		# Cleanup on exit
-		try:
-			self.sound.cleanup()
-		finally:
-			pygame.quit()
-			sys.exit(0)
-
-
-def main() -> None:
+	def wait_timeout(self) -> Optional[int]:
+		if self.startup is not None:
+			return 0  # come back right after the first frame to report startup
+		if self._background_pending:
+			return 20  # poll until the background is decoded
+		# Wake up to take an expired toast down
+		return self.toast_until - pygame.time.get_ticks() if self.toast_text else None
+
+	def update(self) -> None:
+		if self.startup is not None and self.sched.frames:
+			self.startup.mark("first frame")
+			self.startup.report()
+			self.startup = None
+		if self._background_pending and not asset_cache.loading(self.background_path):
+			self.sched.request_redraw()
+
+	def handle_event(self, event: pygame.event.Event) -> None:
+		if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+			self._handle_clicks(event.pos)
+		elif event.type == pygame.KEYDOWN:
+			if event.key in (pygame.K_ESCAPE, pygame.K_q):
+				self.manager.quit()
+
+	def draw(self, screen: pygame.Surface) -> None:
+		self._draw_background()
+		self._draw_title()
+		self._draw_buttons()
+		self._draw_toast()
+
+
+def main(argv: Optional[list] = None) -> None:
+	parser = argparse.ArgumentParser(description="Connect Four")
+	profiling.add_argument(parser)
+	args = parser.parse_args(argv)
+	try:
+		profiling.configure(args.profile)
+	except ValueError as e:
+		parser.error(str(e))
+	startup = StartupTimer(_STARTED)
+	startup.mark("imports")
+	manager = SceneManager.instance()
+	startup.mark("window")
 	menu = MainMenu()
-	menu.run()
+	menu.startup = startup
+	startup.mark("menu")
+	manager.run(menu)
 
 
 if __name__ == "__main__":
 	main()
-
@@ -0,0 +1,197 @@
+"""
+Lightweight metrics for the game server: counters, gauges and fixed-bucket
+histograms, rendered as Prometheus-style plain text or JSON.
+
+Recording is a dict lookup plus an integer add, cheap enough for the
+server's per-message hot path. The HTTP endpoint and the periodic JSON dump
+run in daemon threads so a slow scraper never stalls the game loop.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, List, Sequence, Tuple
+
+# Upper bounds in seconds; the last implicit bucket is +Inf
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+# Upper bounds in bytes for per-client send queue depth
+QUEUE_BUCKETS = (0, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile: the upper bound of the bucket holding it."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+        }
+
+
+class RateMeter:
+    """Events per second over a short sliding window of one-second slots."""
+
+    def __init__(self, window: int = 10) -> None:
+        self.window = window
+        self.slots: Deque[List[int]] = deque()  # [second, count]
+
+    def mark(self, n: int = 1) -> None:
+        now = int(time.monotonic())
+        if self.slots and self.slots[-1][0] == now:
+            self.slots[-1][1] += n
+        else:
+            self.slots.append([now, n])
+            while self.slots and self.slots[0][0] <= now - self.window:
+                self.slots.popleft()
+
+    def rate(self) -> float:
+        now = int(time.monotonic())
+        total = sum(n for sec, n in list(self.slots) if sec > now - self.window and sec < now)
+        return total / float(self.window - 1)
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.started = time.time()
+        self.counters: Dict[str, int] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.rates: Dict[str, RateMeter] = {}
+
+    # ---- Recording ----
+    def inc(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def mark(self, name: str, n: int = 1) -> None:
+        """Count an event and feed its per-second rate."""
+        self.inc(name, n)
+        meter = self.rates.get(name)
+        if meter is None:
+            meter = self.rates[name] = RateMeter()
+        meter.mark(n)
+
+    def observe(self, name: str, value: float, label: str = "", buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        hist = self.histograms.get((name, label))
+        if hist is None:
+            hist = self.histograms[(name, label)] = Histogram(buckets)
+        hist.observe(value)
+
+    def gauge(self, name: str, fn: Callable[[], float]) -> None:
+        """Register a gauge whose value is computed when metrics are read."""
+        self.gauges[name] = fn
+
+    # ---- Reading ----
+    def _gauge_values(self) -> Dict[str, float]:
+        values = {}
+        for name, fn in list(self.gauges.items()):
+            try:
+                values[name] = fn()
+            except Exception:
+                values[name] = float("nan")
+        return values
+
+    def to_dict(self) -> dict:
+        return {
+            "uptime_seconds": time.time() - self.started,
+            "counters": dict(self.counters),
+            "gauges": self._gauge_values(),
+            "rates_per_second": {name: meter.rate() for name, meter in list(self.rates.items())},
+            "histograms": {
+                f"{name}{{{label}}}" if label else name: hist.to_dict()
+                for (name, label), hist in list(self.histograms.items())
+            },
+        }
+
+    def render_text(self) -> str:
+        lines = [f"uptime_seconds {time.time() - self.started:.1f}"]
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name}_total {value}")
+        for name, value in sorted(self._gauge_values().items()):
+            lines.append(f"{name} {value:g}")
+        for name, meter in sorted(self.rates.items()):
+            lines.append(f"{name}_per_second {meter.rate():.2f}")
+        for (name, label), hist in sorted(self.histograms.items()):
+            tag = f'type="{label}",' if label else ""
+            cumulative = 0
+            for bound, n in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{tag}le="{bound}"}} {cumulative}')
+            suffix = f"{{{tag[:-1]}}}" if tag else ""
+            lines.append(f"{name}_sum{suffix} {hist.sum:.6f}")
+            lines.append(f"{name}_count{suffix} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+def start_http_server(metrics: Metrics, host: str = "127.0.0.1", port: int = 9100) -> ThreadingHTTPServer:
+    """Serve metrics on http://host:port/metrics (plain text) and /metrics.json."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.startswith("/metrics.json"):
+                body = json.dumps(metrics.to_dict()).encode()
+                content_type = "application/json"
+            elif self.path in ("/", "/metrics"):
+                body = metrics.render_text().encode()
+                content_type = "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass  # keep scrapes out of the server log
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True).start()
+    return httpd
+
+
+def start_json_dump(metrics: Metrics, path: str, interval: float = 10.0) -> threading.Thread:
+    """Periodically write a metrics snapshot to 'path' (atomically replaced)."""
+
+    def _run() -> None:
+        while True:
+            time.sleep(interval)
+            tmp = f"{path}.tmp"
+            try:
+                with open(tmp, "w") as f:
+                    json.dump(metrics.to_dict(), f, indent=2)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+
+    thread = threading.Thread(target=_run, name="metrics-dump", daemon=True)
+    thread.start()
+    return thread
@@ -11,6 +11,7 @@ class Network:
         self.connected = False
         self.running = False
         self.messages = []
+        self.on_message = None  # optional callback, e.g. FrameScheduler.wake to stop an idle wait
 
         self.move = self.connect()
     
@@ -18,7 +19,7 @@ class Network:
         try:
             self.client.connect(self.addr)
             msg = self.client.recv(2048).decode()
-            print(f"[Network] {msg}")
+            print(f"[Network] {msg.strip()}")
             self.connected = True
             self.running = True
             start_new_thread(self.listen, ())
@@ -27,14 +28,23 @@ class Network:
             self.connected = False
 
     def listen(self):
+        buffer = ""
         while self.running:
             try:
-                msg = self.client.recv(2048).decode()
-                if msg:
+                chunk = self.client.recv(2048).decode()
+                if not chunk:
+                    print("[Network] Server closed the connection.")
+                    break
+                # Server messages are newline-terminated; one recv may hold several
+                buffer += chunk
+                *lines, buffer = buffer.split("\n")
+                for msg in lines:
                     msg = msg.strip()
-                    print(f"[Server] {msg}")
-                    self.messages.append(msg)
-                    print(self.messages)
+                    if msg:
+                        print(f"[Server] {msg}")
+                        self.messages.append(msg)
+                if lines and self.on_message:
+                    self.on_message()
             except ConnectionResetError:
                 print("[Network] Server disconnected.")
                 break
@@ -46,13 +56,15 @@ class Network:
         
         self.connected = False
         self.running = False
+        if self.on_message:
+            self.on_message()  # let the UI notice the disconnect
     
     def send(self, data):
         if not self.connected:
             print("[Network] Cannot send: Not connected.")
             return
         try:
-            self.client.sendall(str.encode(data))
+            self.client.sendall(str.encode(data + "\n"))
         except OSError as e:
             print(f"[Network] Send error: {e}")
             self.close()
@@ -72,7 +84,7 @@ class Network:
         self.connected = False
 
         try:
-            self.client.sendall(b"LEAVE")
+            self.client.sendall(b"LEAVE\n")
         except Exception:
             pass
 
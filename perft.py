@@ -0,0 +1,210 @@
+"""
+Perft: count the positions reachable in exactly N moves, to validate and
+time move generation and win detection.
+
+perft(position, 0) is 1; a finished position (a win or a full board) has no
+moves; otherwise perft(position, n) sums perft(child, n - 1) over the legal
+moves. Every move sequence counts separately (no transpositions), as in
+chess perft. Each backend walks the same tree with its own board
+representation:
+
+    list       ConnectFour board lists through AICore (get_valid_locations,
+               simulate_drop, is_terminal_node): the path the AI search uses
+    bitboard   BitBoard.play/undo with its shift-based four-in-a-row test
+
+At depth 1 a backend counts the legal moves without playing them (bulk
+counting), as usual for perft. Counts from the start position are checked
+against REFERENCE and the backends against each other; any difference
+points at a move generation or win detection bug. A new representation
+is checked by adding it to BACKENDS.
+
+Deep counts split the tree a few plies below the root and count the
+subtrees in a process pool:
+
+    python perft.py --depth 8                    # both backends, compared
+    python perft.py --depth 10 --backend bitboard --workers 8
+    python perft.py --depth 5 --moves 4453 --divide
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from BitBoard import BitBoard
+
+# perft from the start position. Up to depth 7 these follow from counting
+# (7**n sequences, minus the 7 that put seven pieces in one column at depth
+# 7; no game ends before the 7th ply). Depth 8 was counted with both
+# backends, 9 and 10 with the bitboard (9 split over workers, 10 in one).
+REFERENCE: Dict[int, int] = {
+    0: 1,
+    1: 7,
+    2: 49,
+    3: 343,
+    4: 2401,
+    5: 16807,
+    6: 117649,
+    7: 823536,
+    8: 5673234,
+    9: 39394572,
+    10: 268031646,
+}
+
+
+# ---- Backends (run in the workers) ----
+def perft_bitboard(bb: BitBoard, depth: int) -> int:
+    if depth == 0:
+        return 1
+    if bb.is_over():
+        return 0
+    moves = bb.valid_moves()
+    if depth == 1:
+        return len(moves)
+    total = 0
+    for col in moves:
+        bb.play(col)
+        total += perft_bitboard(bb, depth - 1)
+        bb.undo()
+    return total
+
+
+def perft_list(board, piece: int, depth: int) -> int:
+    from AICore import get_valid_locations, is_terminal_node, simulate_drop
+    return _perft_list(board, piece, depth, get_valid_locations, is_terminal_node, simulate_drop)
+
+
+def _perft_list(board, piece: int, depth: int, valid: Callable, terminal: Callable, drop: Callable) -> int:
+    if depth == 0:
+        return 1
+    if terminal(board):
+        return 0
+    cols = valid(board)
+    if depth == 1:
+        return len(cols)
+    total = 0
+    for col in cols:
+        total += _perft_list(drop(board, col, piece), 3 - piece, depth - 1, valid, terminal, drop)
+    return total
+
+
+def _count_bitboard(moves: str, depth: int) -> int:
+    return perft_bitboard(BitBoard.from_moves(moves), depth)
+
+
+def _count_list(moves: str, depth: int) -> int:
+    # AICore pulls in pygame via ConnectFour
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    state = BitBoard.from_moves(moves)
+    return perft_list(state.to_board(), state.current_piece, depth)
+
+
+# name -> count(moves, depth): perft of the position after a 1-based move string
+BACKENDS: Dict[str, Callable[[str, int], int]] = {
+    "list": _count_list,
+    "bitboard": _count_bitboard,
+}
+
+
+def count(backend: str, moves: str, depth: int) -> int:
+    """Worker entry point: perft of one subtree."""
+    return BACKENDS[backend](moves, depth)
+
+
+# ---- Driver ----
+def split(moves: str, plies: int) -> List[str]:
+    """Move strings 'plies' moves below 'moves' (lines that end the game earlier have no subtree)."""
+    frontier = [moves]
+    for _ in range(plies):
+        deeper = []
+        for prefix in frontier:
+            state = BitBoard.from_moves(prefix)
+            if not state.is_over():
+                deeper.extend(prefix + str(col + 1) for col in state.valid_moves())
+        frontier = deeper
+    return frontier
+
+
+def perft(backend: str, moves: str, depth: int, workers: int = 1, split_plies: int = 3) -> int:
+    """perft of the position after 'moves', counted in 'workers' processes when more than one."""
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r} (available: {', '.join(BACKENDS)})")
+    BitBoard.from_moves(moves)  # reject illegal input here rather than in a worker
+    plies = min(split_plies, depth)
+    if workers <= 1 or plies == 0:
+        return count(backend, moves, depth)
+    tasks = split(moves, plies)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        counts = pool.map(count, [backend] * len(tasks), tasks, [depth - plies] * len(tasks),
+                          chunksize=max(1, len(tasks) // (8 * workers)))
+        return sum(counts)
+
+
+def divide(backend: str, moves: str, depth: int, workers: int = 1) -> Dict[int, int]:
+    """perft(depth - 1) below each legal move (1-based column), to narrow down a mismatch."""
+    state = BitBoard.from_moves(moves)
+    if depth == 0 or state.is_over():
+        return {}
+    return {col + 1: perft(backend, moves + str(col + 1), depth - 1, workers)
+            for col in state.valid_moves()}
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Count positions N moves deep to validate and time move generation")
+    parser.add_argument("--depth", type=int, default=6, help="moves to look ahead (default: %(default)s)")
+    parser.add_argument("--moves", default="", help="1-based move string of the root position (default: start)")
+    parser.add_argument("--backend", nargs="+", choices=sorted(BACKENDS), default=sorted(BACKENDS),
+                        help="representations to count with (default: all, compared)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (default: %(default)s)")
+    parser.add_argument("--split", type=int, default=3, help="plies below the root to split work at (default: %(default)s)")
+    parser.add_argument("--divide", action="store_true", help="also print the count below each root move")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        BitBoard.from_moves(args.moves)
+    except ValueError as e:
+        parser.error(f"--moves: {e}")
+    if args.depth < 0:
+        parser.error("--depth must not be negative")
+
+    expected = REFERENCE.get(args.depth) if not args.moves else None
+    results = []
+    for backend in args.backend:
+        count(backend, args.moves, 0)  # imports (pygame for "list") are not part of the timing
+        started = time.perf_counter()
+        nodes = perft(backend, args.moves, args.depth, args.workers, args.split)
+        elapsed = time.perf_counter() - started
+        result = {
+            "backend": backend,
+            "depth": args.depth,
+            "positions": nodes,
+            "seconds": round(elapsed, 3),
+            "positions_per_second": round(nodes / elapsed) if elapsed else 0,
+        }
+        if expected is not None:
+            result["reference"] = expected
+        if args.divide:
+            result["divide"] = divide(backend, args.moves, args.depth, args.workers)
+        results.append(result)
+
+    counts = {r["positions"] for r in results} | ({expected} if expected is not None else set())
+    ok = len(counts) == 1
+    if args.json:
+        print(json.dumps({"ok": ok, "results": results}, indent=2))
+    else:
+        for r in results:
+            check = "" if expected is None else (" ok" if r["positions"] == expected else f" MISMATCH (expected {expected})")
+            print(f"{r['backend']:>9}  perft({r['depth']}) = {r['positions']}  in {r['seconds']:.3f} s, "
+                  f"{r['positions_per_second']:,} positions/s{check}")
+            for col, n in r.get("divide", {}).items():
+                print(f"{'':>11}{col}: {n}")
+        if len(results) > 1:
+            print("backends agree" if len({r['positions'] for r in results}) == 1 else "BACKENDS DISAGREE")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Pondering: search the AI's replies while the human is still thinking.
+
+When the human's turn starts, the Ponderer submits one search per legal
+human move (the position after that move) to a process pool, most likely
+moves first. When the human moves, take() returns the finished result (or
+the still running search) for the position that actually arose and cancels
+the rest, so the AI usually answers as soon as the human's piece lands.
+
+The searches run in separate processes, so they neither hold the GIL
+against the game loop nor each other. The pool is shared by every Ponderer
+in the process and uses the "spawn" start method, as the game process has
+SDL and helper threads running that must not be forked.
+"""
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import engines
+
+Board = List[List[int]]
+BoardKey = Tuple[Tuple[int, ...], ...]
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        workers = min(7, os.cpu_count() or 1)
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def search(engine: str, options: Dict, board: Board, ai_piece: int) -> int:
+    """Worker entry point: the move of engine 'engine' (configured by 'options') for 'ai_piece'."""
+    return engines.get(engine, **options).choose_move(board, ai_piece)
+
+
+def board_key(board: Board) -> BoardKey:
+    return tuple(tuple(row) for row in board)
+
+
+class Ponderer:
+    """Speculative searches for one game; results are kept per position until reset()."""
+
+    def __init__(self, engine: str, ai_piece: int, options: Dict, on_done: Optional[Callable[[], None]] = None) -> None:
+        self.engine = engine
+        self.ai_piece = ai_piece
+        self.options = options  # engines.get() keyword arguments, see Engine.options
+        self.on_done = on_done  # called from a pool thread when a search finishes
+        self.pending: Dict[BoardKey, Future] = {}
+        self.results: Dict[BoardKey, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, positions: Sequence[Board]) -> None:
+        """Search each position (the board after a possible human move), in the given order."""
+        global _pool
+        pool = _get_pool()
+        for board in positions:
+            key = board_key(board)
+            if key in self.results or key in self.pending:
+                continue
+            try:
+                future = pool.submit(search, self.engine, self.options, board, self.ai_piece)
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool next turn and play without pondering until then
+                _pool = None
+                return
+            future.add_done_callback(lambda f, key=key: self._finished(key, f))
+            self.pending[key] = future
+
+    def _finished(self, key: BoardKey, future: Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.results[key] = future.result()
+        if self.on_done is not None:
+            self.on_done()
+
+    def take(self, board: Board) -> Optional[Future]:
+        """The search for 'board' (done or still running), or None on a ponder miss.
+
+        Searches that have not started yet are cancelled, including the one for
+        'board': it would queue behind the other running searches, so the caller
+        is better off searching right away.
+        """
+        key = board_key(board)
+        future = self.pending.pop(key, None)
+        if future is not None and not future.running() and not future.done():
+            future.cancel()
+            future = None
+        self.cancel()
+        if key in self.results:
+            future = Future()
+            future.set_result(self.results[key])
+        if future is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return future
+
+    def cancel(self) -> None:
+        for future in self.pending.values():
+            future.cancel()  # searches already running finish in the background and are cached
+        self.pending.clear()
+
+    def reset(self) -> None:
+        self.cancel()
+        self.results.clear()
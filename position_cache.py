@@ -0,0 +1,367 @@
+"""
+Persistent position cache: engine results (depth, score, best move) kept on
+disk across sessions and shared by every process on the host.
+
+The file is a fixed-size hash table, memory-mapped, so opening it costs
+nothing and only the pages that are looked up are ever read:
+
+    positions.c4pc   header (magic, version, slot size, bucket count),
+                     then buckets of BUCKET_SLOTS slots:
+                     key, engine tag, score, depth, best move, checksum
+
+A position's bucket is picked from its key and the engine's tag; a new
+result takes a free slot of the bucket, else replaces the shallowest one.
+Results are kept in memory and written back in batches (every BATCH results
+or FLUSH_SECONDS, and when the process exits, pool workers included).
+Writers lock the file where the platform supports it; readers never lock,
+and a slot caught half-written fails its checksum and reads as a miss. A
+missing or damaged file is replaced by a fresh one through a rename, so
+processes that still map the old file are not disturbed; they move to the
+new one on their next write.
+
+The cache is off unless CONNECT4_POSITION_CACHE is set: to "1" for
+records/positions.c4pc, or to the file to use.
+"""
+import argparse
+import atexit
+import mmap
+import multiprocessing.util
+import os
+import struct
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers do not lock (torn slots are misses)
+    fcntl = None
+
+from BitBoard import BitBoard
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "records", "positions.c4pc")
+
+MAGIC = b"C4PC"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHII")   # magic, version, slot size, buckets, reserved
+_SLOT = struct.Struct("<QIiBBxxI")   # key, engine tag, score, depth, best, checksum
+_BODY = _SLOT.size - 4               # the bytes covered by the checksum
+
+DEFAULT_BUCKETS = 1 << 16            # 4 slots of 24 bytes each: 6 MB
+BUCKET_SLOTS = 4
+BATCH = 64
+FLUSH_SECONDS = 2.0
+NO_SCORE = -(1 << 31)                # stored by choose_move, which has no score
+NO_MOVE = 0xFF
+
+Entry = Tuple[int, Optional[int], Optional[int]]  # depth, score, best column
+
+
+def position_key(board: List[List[int]], piece: int) -> int:
+    """64-bit key of a ConnectFour board with 'piece' to move."""
+    return (piece << 56) | BitBoard.from_board(board).key()
+
+
+class PositionCache:
+    """Fixed-size on-disk table of (key, tag) -> (depth, score, best)."""
+
+    def __init__(self, path: str = DEFAULT_PATH, buckets: int = DEFAULT_BUCKETS) -> None:
+        self.path = path
+        self.buckets = buckets
+        self.pending: Dict[Tuple[int, int], Entry] = {}
+        self.last_flush = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self._map: Optional[mmap.mmap] = None
+        self._fd: Optional[int] = None
+        self._pid: Optional[int] = None
+        self.owner: Optional[int] = None  # pid of the process default_cache() made it for
+
+    # ---- File ----
+    def _open(self) -> mmap.mmap:
+        """Map the file on first use (again in a forked child, which needs its own lock)."""
+        if self._map is not None and self._pid == os.getpid():
+            return self._map
+        self._map = None
+        for _ in range(3):
+            try:
+                fd = os.open(self.path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+            except FileNotFoundError:
+                fd = None
+            size = self._table_size(fd) if fd is not None else None
+            if size is not None:
+                self._map = mmap.mmap(fd, size)
+                self._fd, self._pid = fd, os.getpid()
+                return self._map
+            if fd is not None:
+                os.close(fd)
+            # New, foreign or damaged file: put an empty table in its place
+            self._create()
+        raise OSError(f"{self.path}: cannot create a position cache")
+
+    def _table_size(self, fd: int) -> Optional[int]:
+        """Size of the table in 'fd' (adopting its bucket count), or None if it is not one."""
+        header = os.pread(fd, _HEADER.size, 0) if hasattr(os, "pread") else os.read(fd, _HEADER.size)
+        if len(header) != _HEADER.size:
+            return None
+        magic, version, slot_size, buckets, _ = _HEADER.unpack(header)
+        if (magic, version, slot_size) != (MAGIC, VERSION, _SLOT.size) or not buckets:
+            return None
+        size = _HEADER.size + buckets * BUCKET_SLOTS * _SLOT.size
+        if os.fstat(fd).st_size != size:
+            return None
+        self.buckets = buckets
+        return size
+
+    def _create(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".positions-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, VERSION, _SLOT.size, self.buckets, 0))
+                f.truncate(_HEADER.size + self.buckets * BUCKET_SLOTS * _SLOT.size)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, self.path)
+        except OSError:
+            os.unlink(tmp)
+            raise
+
+    def _replaced(self) -> bool:
+        """True when the mapped file is no longer the one at 'path' (see _create)."""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._fd).st_ino
+        except FileNotFoundError:
+            return True
+
+    @staticmethod
+    def _lock(fd: int) -> None:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+
+    @staticmethod
+    def _unlock(fd: int) -> None:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _bucket(self, key: int, tag: int) -> int:
+        h = ((key ^ (tag << 17)) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        return _HEADER.size + (h >> 32) % self.buckets * BUCKET_SLOTS * _SLOT.size
+
+    def _read(self, data: mmap.mmap, offset: int) -> Optional[tuple]:
+        slot = _SLOT.unpack_from(data, offset)
+        if slot[-1] != zlib.crc32(data[offset:offset + _BODY]):
+            return None  # empty or half-written
+        return slot
+
+    # ---- Access ----
+    def get(self, key: int, tag: int) -> Optional[Entry]:
+        """(depth, score or None, best column or None) stored for the position, or None."""
+        entry = self.pending.get((key, tag))
+        if entry is None:
+            data = self._open()
+            base = self._bucket(key, tag)
+            for i in range(BUCKET_SLOTS):
+                slot = self._read(data, base + i * _SLOT.size)
+                if slot is not None and slot[0] == key and slot[1] == tag:
+                    _, _, score, depth, best, _ = slot
+                    entry = (depth, None if score == NO_SCORE else score, None if best == NO_MOVE else best)
+                    break
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key: int, tag: int, depth: int, score: Optional[int], best: Optional[int]) -> None:
+        """Remember a result; kept unless an equally deep result with a score is known."""
+        old = self.pending.get((key, tag))
+        if old is not None and (old[0] > depth or (old[0] == depth and score is None)):
+            return
+        self.pending[(key, tag)] = (depth, score, best)
+        if len(self.pending) >= BATCH or time.monotonic() - self.last_flush >= FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the pending results to the file."""
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        data = self._open()
+        if self._replaced():
+            self._release()
+            data = self._open()
+        pending, self.pending = self.pending, {}
+        self._lock(self._fd)
+        try:
+            for (key, tag), (depth, score, best) in pending.items():
+                self._store(data, key, tag, depth, score, best)
+        finally:
+            self._unlock(self._fd)
+
+    def _store(self, data: mmap.mmap, key: int, tag: int, depth: int, score: Optional[int],
+               best: Optional[int]) -> None:
+        base = self._bucket(key, tag)
+        target, shallowest = None, None
+        for i in range(BUCKET_SLOTS):
+            offset = base + i * _SLOT.size
+            slot = self._read(data, offset)
+            if slot is None:
+                target = target if target is not None else offset
+                continue
+            if slot[0] == key and slot[1] == tag:
+                if slot[3] > depth or (slot[3] == depth and score is None):
+                    return  # a better result is already stored
+                target = offset
+                break
+            if shallowest is None or slot[3] < shallowest[0]:
+                shallowest = (slot[3], offset)
+        if target is None:
+            target = shallowest[1]
+        score = NO_SCORE if score is None else max(NO_SCORE + 1, min(score, (1 << 31) - 1))
+        body = _SLOT.pack(key, tag, score, min(depth, 0xFF), NO_MOVE if best is None else best, 0)[:_BODY]
+        data[target:target + _SLOT.size] = body + struct.pack("<I", zlib.crc32(body))
+
+    def stats(self) -> Dict:
+        data = self._open()
+        slots = self.buckets * BUCKET_SLOTS
+        used = sum(1 for i in range(slots) if self._read(data, _HEADER.size + i * _SLOT.size) is not None)
+        return {"path": self.path, "slots": slots, "used": used, "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        self.pending.clear()
+        data = self._open()
+        self._lock(self._fd)
+        try:
+            data[_HEADER.size:] = bytes(len(data) - _HEADER.size)
+        finally:
+            self._unlock(self._fd)
+
+    def close(self) -> None:
+        if self.pending:
+            self.flush()
+        self._release()
+
+    def _release(self) -> None:
+        if self._map is not None and self._pid == os.getpid():
+            self._map.close()
+            os.close(self._fd)
+        self._map = self._fd = self._pid = None
+
+
+_default_cache: Optional[PositionCache] = None
+
+
+def configured_path() -> Optional[str]:
+    """The file CONNECT4_POSITION_CACHE selects ("1": DEFAULT_PATH); None when it is unset or "0"."""
+    path = os.environ.get("CONNECT4_POSITION_CACHE", "")
+    if path in ("", "0"):
+        return None
+    return DEFAULT_PATH if path == "1" else path
+
+
+def default_cache() -> Optional[PositionCache]:
+    """The process-wide cache (CONNECT4_POSITION_CACHE); None when it is off."""
+    global _default_cache
+    path = configured_path()
+    if path is None:
+        return None
+    if _default_cache is None or _default_cache.path != path or _default_cache.owner != os.getpid():
+        # A forked child gets its own cache: the parent's pending results and exit hooks are not its own
+        _default_cache = PositionCache(path)
+        _default_cache.owner = os.getpid()
+        atexit.register(_default_cache.close)
+        # Pool workers leave without running atexit hooks, but run multiprocessing finalizers
+        multiprocessing.util.Finalize(_default_cache, _default_cache.close, exitpriority=10)
+    return _default_cache
+
+
+def _worker_put(base: int) -> None:
+    """self_test: store results from a pool worker through the default cache."""
+    cache = default_cache()
+    for i in range(10):
+        cache.put(base + i, 7, 3, i, i % 7)
+
+
+def self_test() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "positions.c4pc")
+
+        # Round trip through the file; a deeper result is not replaced by a shallower one
+        cache = PositionCache(path, buckets=64)
+        cache.put(1, 7, 5, -12, 3)
+        cache.put(2, 7, 4, None, None)
+        cache.put(1, 7, 3, 40, 0)
+        assert cache.get(1, 7) == (5, -12, 3)
+        cache.close()
+        cache = PositionCache(path)
+        assert cache.get(1, 7) == (5, -12, 3) and cache.get(2, 7) == (4, None, None)
+        assert cache.get(1, 8) is None and cache.buckets == 64
+
+        # A full bucket gives up its shallowest slot
+        base = cache._bucket(1, 7)
+        same = [k for k in range(3, 100_000) if cache._bucket(k, 7) == base][:BUCKET_SLOTS]
+        for depth, key in enumerate(same[:-1], 6):
+            cache.put(key, 7, depth, depth, 0)
+        cache.flush()
+        cache.put(same[-1], 7, 9, 9, 0)
+        cache.flush()
+        assert cache.get(1, 7) is None and cache.get(same[-1], 7) == (9, 9, 0)
+        assert all(cache.get(key, 7) is not None for key in same[:-1])
+
+        # A damaged slot reads as a miss
+        offset = next(base + i * _SLOT.size for i in range(BUCKET_SLOTS)
+                      if _SLOT.unpack_from(cache._map, base + i * _SLOT.size)[0] == same[0])
+        cache._map[offset + 12] ^= 0xFF
+        assert cache.get(same[0], 7) is None
+
+        # A damaged file is replaced, not truncated under a process that maps it
+        with open(path + ".bad", "wb") as f:
+            f.write(b"not a cache")
+        os.replace(path + ".bad", path)
+        fresh = PositionCache(path)
+        assert fresh.get(same[-1], 7) is None
+        assert cache.get(same[-1], 7) == (9, 9, 0)  # the old mapping still reads
+        cache.put(5, 7, 2, 1, 1)
+        cache.flush()  # moves to the new file
+        assert fresh.get(5, 7) == (2, 1, 1)
+        cache.close()
+        fresh.close()
+
+        # Pool workers write their results back when they exit
+        os.environ["CONNECT4_POSITION_CACHE"] = path
+        try:
+            with ProcessPoolExecutor(max_workers=2) as pool:
+                list(pool.map(_worker_put, (1000, 2000)))
+        finally:
+            del os.environ["CONNECT4_POSITION_CACHE"]
+        cache = PositionCache(path)
+        assert all(cache.get(base + i, 7) == (3, i, i % 7) for base in (1000, 2000) for i in range(10))
+        cache.close()
+
+    print("Position cache self-tests passed.")
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect or clear the persistent position cache")
+    parser.add_argument("path", nargs="?", default=configured_path() or DEFAULT_PATH)
+    parser.add_argument("--clear", action="store_true", help="forget every stored position")
+    parser.add_argument("--test", action="store_true", help="run self-tests and exit")
+    args = parser.parse_args(argv)
+
+    if args.test:
+        self_test()
+        return
+
+    cache = PositionCache(args.path)
+    if args.clear:
+        cache.clear()
+    s = cache.stats()
+    print(f"{s['path']}: {s['used']}/{s['slots']} slots used")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Built-in profiling for game sessions and headless engine runs.
+
+A profiling session wraps one run of the scene loop (the menu,
+game_loop_ai, game_loop_ai_vs_ai, the lobby) or of a headless search, and
+writes one file per session to CONNECT4_PROFILE_DIR (default: profiles/):
+
+    cprofile      deterministic profile of every function call, as a
+                  pstats file (python -m pstats FILE, snakeviz, ...). Threads
+                  started during the session (e.g. the AI search thread) are
+                  profiled too and merged into the same file.
+    sample[:MS]   statistical profile: every MS milliseconds (default 10) a
+                  background thread records the stack of every other thread.
+                  Cheap enough for normal play; writes collapsed stacks
+                  ("thread;outer;...;inner count" lines) for flamegraph.pl,
+                  speedscope or inferno.
+
+Turn it on with CONNECT4_PROFILE=cprofile|sample[:MS], or --profile on
+main.py and on this module's command line:
+
+    python main.py --profile sample
+    python profiling.py --profile cprofile engine --engine ai2 --depth 7 4453 3344521
+    python profiling.py --profile sample ai      # game_loop_ai
+
+Searches running in other processes (pondering, analyze.py and selfplay.py
+workers, the server's bot pool) are not included.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+DEFAULT_INTERVAL_MS = 10.0
+
+# Set by configure() (e.g. from --profile); CONNECT4_PROFILE otherwise
+_spec: Optional[str] = None
+
+
+def configure(spec: Optional[str]) -> None:
+    """Profile the following sessions with 'spec' ("cprofile", "sample", "sample:MS"; "0" for off).
+
+    None leaves it to CONNECT4_PROFILE.
+    """
+    global _spec
+    if spec not in (None, "", "0"):
+        make_profiler(spec)  # reject typos before the session starts
+    _spec = spec
+
+
+def current_spec() -> str:
+    return _spec if _spec is not None else os.environ.get("CONNECT4_PROFILE", "")
+
+
+class CProfiler:
+    """cProfile for the starting thread and every thread started while it runs."""
+
+    suffix = ".pstats"
+
+    def __init__(self) -> None:
+        self.profiles: List = []  # cProfile.Profile per thread, the starting thread first
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        # cProfile and pstats are only imported when profiling is on (they cost startup time)
+        import cProfile
+        threading.setprofile(self._thread_started)
+        main = cProfile.Profile()
+        self.profiles.append(main)
+        main.enable()
+
+    def _thread_started(self, frame, event, arg) -> None:
+        # First profile event of a new thread: hand the thread to a profiler of its own.
+        # It keeps running until the thread ends (it cannot be stopped from here).
+        import cProfile
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def stop(self, path: str) -> None:
+        import pstats
+        threading.setprofile(None)
+        self.profiles[0].disable()
+        with self.lock:
+            profiles = list(self.profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            try:
+                stats.add(profile)
+            except TypeError:
+                pass  # a thread that never made a call
+        stats.dump_stats(path)
+
+
+class SamplingProfiler:
+    """Samples the stacks of all other threads from a daemon thread."""
+
+    suffix = ".folded"
+
+    def __init__(self, interval_ms: float = DEFAULT_INTERVAL_MS) -> None:
+        if interval_ms <= 0:
+            raise ValueError("sampling interval must be positive")
+        self.interval = interval_ms / 1000.0
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.stopping = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self._run, name="connect4-profiler", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names: Dict[int, str] = {}
+        while not self.stopping.wait(self.interval):
+            frames = sys._current_frames()
+            if len(names) != len(frames):
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident != me:
+                    self.stacks[(names.get(ident, str(ident)), self._stack(frame))] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _stack(frame) -> Tuple[str, ...]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def stop(self, path: str) -> None:
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+        with open(path, "w") as f:
+            for (thread, stack), count in self.stacks.most_common():
+                f.write(";".join((thread,) + stack) + f" {count}\n")
+
+
+def make_profiler(spec: str):
+    """A profiler for "cprofile", "sample" or "sample:MS"; raises ValueError otherwise."""
+    kind, _, arg = spec.partition(":")
+    if kind == "cprofile" and not arg:
+        return CProfiler()
+    if kind == "sample":
+        try:
+            return SamplingProfiler(float(arg) if arg else DEFAULT_INTERVAL_MS)
+        except ValueError:
+            pass
+    raise ValueError(f"unknown profiler {spec!r} (use cprofile, sample or sample:MS)")
+
+
+@contextmanager
+def session(label: str, spec: Optional[str] = None) -> Iterator[Optional[str]]:
+    """Profile the block when profiling is on; yields the output path (None when off)."""
+    spec = spec if spec is not None else current_spec()
+    if spec in ("", "0"):
+        yield None
+        return
+    profiler = make_profiler(spec)
+    directory = os.environ.get("CONNECT4_PROFILE_DIR", DEFAULT_DIR)
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(directory, f"{label}-{stamp}-{os.getpid()}{profiler.suffix}")
+    profiler.start()
+    try:
+        yield path
+    finally:
+        try:
+            profiler.stop(path)
+            print(f"[profiling] {label}: wrote {path}")
+        except OSError as e:
+            print(f"[profiling] {label}: failed to write the profile: {e}")
+
+
+def add_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", metavar="PROFILER",
+                        help="profile the session: cprofile, sample or sample:MS (default: $CONNECT4_PROFILE)")
+
+
+# ---- Headless and game targets ----
+def run_engine(engine: str, depth: Optional[int], positions: List[str], repeat: int) -> None:
+    """Search each position (1-based move strings) 'repeat' times without a window."""
+    # Every search should run: the position cache is off, the evaluation cache starts cold each pass
+    os.environ["CONNECT4_POSITION_CACHE"] = "0"
+    import engines
+    from BitBoard import BitBoard
+
+    eng = engines.get(engine, depth=depth)
+    eval_cache = getattr(eng.module, "EVAL_CACHE", None)
+    for _ in range(repeat):
+        if eval_cache is not None:
+            eval_cache.clear()
+        for moves in positions:
+            state = BitBoard.from_moves(moves)
+            eng.choose_move(state.to_board(), state.current_piece)
+    s = eng.stats()
+    print(f"{s['searches']} searches at depth {eng.depth}: {s['nodes']} leaves in {s['time_ms']:.0f} ms")
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a game mode or an engine benchmark under a profiler")
+    add_argument(parser)
+    sub = parser.add_subparsers(dest="target", required=True)
+    sub.add_parser("menu", help="the main menu (python main.py)")
+    ai = sub.add_parser("ai", help="Human vs AI (game_loop_ai)")
+    ai.add_argument("--difficulty", choices=("easy", "normal", "hard"), default="hard")
+    sub.add_parser("aivai", help="AI vs AI (game_loop_ai_vs_ai)")
+    sub.add_parser("lobby", help="the online lobby")
+    eng = sub.add_parser("engine", help="headless engine searches")
+    eng.add_argument("positions", nargs="*", default=["", "4453", "445362", "3344521"],
+                     help="1-based move strings ('' is the start position)")
+    eng.add_argument("--engine", default="ai1")
+    eng.add_argument("--depth", type=int, help="search depth (default: the engine's)")
+    eng.add_argument("--repeat", type=int, default=1, help="searches per position")
+    args = parser.parse_args(argv)
+
+    try:
+        configure(args.profile or current_spec() or "cprofile")
+    except ValueError as e:
+        parser.error(str(e))
+    if args.target == "engine":
+        with session(f"engine-{args.engine}"):
+            run_engine(args.engine, args.depth, args.positions, args.repeat)
+    elif args.target == "ai":
+        import Human_vs_AI
+        Human_vs_AI.game_loop_ai(flag=args.difficulty)
+    elif args.target == "aivai":
+        import AI_vs_AI
+        AI_vs_AI.main()
+    elif args.target == "lobby":
+        import MultiplayerLobby
+        MultiplayerLobby.lobby()
+    else:
+        import main as game
+        game.main([])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Headless self-play data generator.
+
+Plays engine-vs-engine games across a process pool and streams every
+position, labelled with the game's result, to NumPy shards:
+
+    python selfplay.py --games 20000 --workers 8 --out data/selfplay
+
+Each shard (shard_00000.npy, ...) is a structured array of POSITION_DTYPE:
+the 42 cells in ConnectFour board order (row 0 is the top row), the ply and
+the winner (1/2, 0 for a draw). Shards can be loaded with mmap_mode="r", so
+tune_weights.py streams datasets larger than memory.
+
+Games alternate AIStrategy1/AIStrategy2 on both seats, start from a few
+random plies and play a random move with probability --epsilon, so the data
+covers more than the engines' favourite lines.
+"""
+import argparse
+import glob
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+import engines
+from BitBoard import BitBoard, COLS, ROWS
+
+POSITION_DTYPE = np.dtype([("cells", "i1", (ROWS * COLS,)), ("ply", "u1"), ("result", "i1")])
+
+
+def play_game(rng: random.Random, depth: int, epsilon: float, opening_plies: int) -> Tuple[List[List[List[int]]], int]:
+    """Play one game; returns the board after every ply and the winner (0 for a draw)."""
+    # The strategies are imported on their first move, in the workers only
+    ai1, ai2 = engines.get("ai1", depth=depth), engines.get("ai2", depth=depth)
+    seats = (ai1, ai2) if rng.random() < 0.5 else (ai2, ai1)
+    state = BitBoard()
+    boards = []
+    random_plies = rng.randint(0, opening_plies)
+    while not state.is_over():
+        if state.count < random_plies or rng.random() < epsilon:
+            col = rng.choice(state.valid_moves())
+        else:
+            col = seats[state.count % 2].choose_move(state.to_board(), state.current_piece)
+        state.play(col)
+        boards.append(state.to_board())
+    return boards, state.winner or 0
+
+
+def play_batch(task: Tuple[int, int, int, float, int]) -> np.ndarray:
+    """Worker entry point: play 'games' games and return their positions."""
+    seed, games, depth, epsilon, opening_plies = task
+    rng = random.Random(seed)
+    random.seed(seed)  # the engines shuffle their candidate moves with the global RNG
+    rows = []
+    for _ in range(games):
+        boards, winner = play_game(rng, depth, epsilon, opening_plies)
+        for ply, board in enumerate(boards, 1):
+            rows.append((sum(board, []), ply, winner))
+    return np.array(rows, dtype=POSITION_DTYPE)
+
+
+class ShardWriter:
+    """Buffers positions and writes them as fixed-size .npy shards."""
+
+    def __init__(self, out_dir: str, shard_size: int) -> None:
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        self.pending: List[np.ndarray] = []
+        self.pending_rows = 0
+        self.shards = 0
+        self.rows = 0
+        os.makedirs(out_dir, exist_ok=True)
+        # Continue numbering after existing shards so runs can be appended
+        self.next_index = len(glob.glob(os.path.join(out_dir, "shard_*.npy")))
+
+    def add(self, positions: np.ndarray) -> None:
+        self.pending.append(positions)
+        self.pending_rows += len(positions)
+        while self.pending_rows >= self.shard_size:
+            data = np.concatenate(self.pending)
+            self._write(data[:self.shard_size])
+            rest = data[self.shard_size:]
+            self.pending = [rest] if len(rest) else []
+            self.pending_rows = len(rest)
+
+    def close(self) -> None:
+        if self.pending_rows:
+            self._write(np.concatenate(self.pending))
+        self.pending, self.pending_rows = [], 0
+
+    def _write(self, data: np.ndarray) -> None:
+        path = os.path.join(self.out_dir, f"shard_{self.next_index:05d}.npy")
+        np.save(path, data)
+        self.next_index += 1
+        self.shards += 1
+        self.rows += len(data)
+
+
+def iter_shards(data_dir: str) -> Iterator[np.ndarray]:
+    """Memory-mapped shards of a dataset, in order."""
+    for path in sorted(glob.glob(os.path.join(data_dir, "shard_*.npy"))):
+        yield np.load(path, mmap_mode="r")
+
+
+def generate(out_dir: str, games: int, workers: Optional[int] = None, depth: int = 2, epsilon: float = 0.1,
+             opening_plies: int = 4, shard_size: int = 200_000, batch_games: int = 20, seed: int = 0) -> ShardWriter:
+    writer = ShardWriter(out_dir, shard_size)
+    tasks = []
+    remaining, i = games, 0
+    while remaining > 0:
+        n = min(batch_games, remaining)
+        tasks.append((seed * 1_000_003 + i, n, depth, epsilon, opening_plies))
+        remaining -= n
+        i += 1
+    started = time.perf_counter()
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Results stream back in order and are written as they arrive
+        for (_, n, *_), positions in zip(tasks, pool.map(play_batch, tasks)):
+            writer.add(positions)
+            done += n
+            elapsed = time.perf_counter() - started
+            print(f"\r{done}/{games} games, {writer.rows + writer.pending_rows} positions, "
+                  f"{done / elapsed:.1f} games/s", end="", flush=True)
+    writer.close()
+    print()
+    return writer
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate self-play positions as .npy shards")
+    parser.add_argument("--out", default="data/selfplay", help="output directory (default: %(default)s)")
+    parser.add_argument("--games", type=int, default=1000, help="games to play (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--depth", type=int, default=2, help="engine search depth (default: %(default)s)")
+    parser.add_argument("--epsilon", type=float, default=0.1, help="probability of a random move (default: %(default)s)")
+    parser.add_argument("--opening-plies", type=int, default=4, help="up to this many random opening moves (default: %(default)s)")
+    parser.add_argument("--shard-size", type=int, default=200_000, help="positions per shard (default: %(default)s)")
+    parser.add_argument("--batch-games", type=int, default=20, help="games per worker task (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    writer = generate(args.out, args.games, args.workers, args.depth, args.epsilon, args.opening_plies,
+                      args.shard_size, args.batch_games, args.seed)
+    print(f"Wrote {writer.rows} positions in {writer.shards} shards to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,124 +1,745 @@
+import argparse
+import logging
+import os
+import random
+import selectors
+import signal
 import socket
 import sys
-from _thread import *
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Set
 from utils import get_ip_interface
+import engines
+from BitBoard import BitBoard
+from bot_pool import BotPool
+from game_records import DRAW, GameLog, GameRecorder
+from metrics import Metrics, QUEUE_BUCKETS, start_http_server, start_json_dump
+
+log = logging.getLogger("server")
 
 # server = get_ip_interface()
-server = "0.0.0.0" 
+server = "0.0.0.0"
 port = 8080
 
-s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+SPECTATOR = 0  # role of a watching client (players are 1 = host / 2 = client)
+
+# Per-client cap on bytes queued but not yet accepted by the kernel. A spectator
+# that falls this far behind is dropped; players get far more slack so a burst
+# of spectator traffic can never cost a game.
+SPECTATOR_SEND_LIMIT = 64 * 1024
+PLAYER_SEND_LIMIT = 4 * 1024 * 1024
+MAX_SPECTATORS = 1000
+
+# Message types with their own latency histogram; anything else is "OTHER"
+COMMANDS = ("HOST", "JOIN", "WATCH", "QUICKMATCH", "BOT", "READY", "CANCEL", "MOVE", "QUIT", "LEAVE")
+
+CODE_LEN = 5
+RATING_BUCKET = 200  # quick match pairs players whose ratings fall in the same or an adjacent bucket
+MAX_RATING = 4000    # QUICKMATCH:<rating> is clamped to 0..MAX_RATING
+
+# Bot rooms: the server plays seat 2 with this engine at the requested level
+# (engines.DIFFICULTIES), each move within the level's time budget
+BOT_ENGINE = "ai1"
+BOT_TIME_MS = {"easy": 100.0, "normal": 300.0, "hard": 1000.0}
+# Upper bounds in seconds for bot move latency (queueing plus search)
+BOT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_WAKE = "wake"  # selector data of the socket bot results are signalled on
+
+
+class Client:
+    """One connection: non-blocking socket plus its input and bounded output buffers."""
+
+    def __init__(self, conn: socket.socket, addr) -> None:
+        self.conn = conn
+        self.addr = addr
+        self.inbuf = b""
+        self.outbuf: Deque[memoryview] = deque()
+        self.pending = 0  # bytes queued in outbuf
+        self.room_code: Optional[str] = None
+        self.role: Optional[int] = None
+        self.closed = False
+
+    @property
+    def send_limit(self) -> int:
+        return SPECTATOR_SEND_LIMIT if self.role == SPECTATOR else PLAYER_SEND_LIMIT
+
+
+class Room:
+    """Per-room state. The server owns the board; clients only render it."""
+
+    def __init__(self, code: str, host: Client) -> None:
+        self.code = code
+        self.players: List[Optional[Client]] = [host, None]
+        self.ready = [False, False]
+        self.spectators: Set[Client] = set()
+        self.state: Optional[BitBoard] = None  # created when both players are ready
+        self.recorder: Optional[GameRecorder] = None  # current game, when the server records games
+        self.bot: Optional[str] = None  # level of the server's engine in seat 2 (a bot room)
+
+    def reset_game(self, log: Optional[GameLog] = None) -> None:
+        self.end_recording()
+        self.state = BitBoard()
+        if log is not None:
+            if self.bot is None:
+                self.recorder = GameRecorder("pvp", log, room=self.code)
+            else:
+                self.recorder = GameRecorder("vs_ai", log, room=self.code, difficulty=self.bot, engine=BOT_ENGINE)
+
+    def end_recording(self) -> None:
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def is_empty(self) -> bool:
+        return not any(self.players)
+
+    def is_full(self) -> bool:
+        return self.players[0] is not None and (self.players[1] is not None or self.bot is not None)
+
+
+class CodePool:
+    """Collision-free room codes: a shuffled free list plus the set of codes in use."""
+
+    def __init__(self, length: int = CODE_LEN) -> None:
+        self.length = length
+        codes = [str(n).zfill(length) for n in range(1, 10 ** length)]
+        random.shuffle(codes)
+        self.free: Deque[str] = deque(codes)
+        self.in_use: Dict[str, bool] = {}  # code -> handed out by allocate()
+
+    def allocate(self) -> Optional[str]:
+        while self.free:
+            code = self.free.popleft()
+            if code not in self.in_use:
+                self.in_use[code] = True
+                return code
+        return None
+
+    def valid(self, code: str) -> bool:
+        """True for codes allocate() could hand out: 'length' digits, not all zeros."""
+        return len(code) == self.length and code.isascii() and code.isdigit() and int(code) > 0
+
+    def reserve(self, code: str) -> bool:
+        """Claim a client-chosen code; False if it is already taken."""
+        if code in self.in_use:
+            return False
+        self.in_use[code] = False
+        return True
+
+    def release(self, code: str) -> None:
+        # Reserved codes never left the free list, so only pooled ones go back
+        if self.in_use.pop(code, False):
+            self.free.append(code)
+
+
+class MatchQueue:
+    """Players waiting for a quick match, bucketed by rating."""
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, "OrderedDict[Client, None]"] = {}
+        self.waiting: Dict[Client, int] = {}
+
+    def pair(self, client: Client, rating: int) -> Optional[Client]:
+        """Return a waiting opponent for 'client', or queue it and return None."""
+        bucket = rating // RATING_BUCKET
+        for b in (bucket, bucket - 1, bucket + 1):
+            queue = self.buckets.get(b)
+            if queue:
+                opponent, _ = queue.popitem(last=False)
+                if not queue:
+                    del self.buckets[b]
+                del self.waiting[opponent]
+                return opponent
+        self.buckets.setdefault(bucket, OrderedDict())[client] = None
+        self.waiting[client] = bucket
+        return None
+
+    def remove(self, client: Client) -> bool:
+        bucket = self.waiting.pop(client, None)
+        if bucket is None:
+            return False
+        queue = self.buckets[bucket]
+        del queue[client]
+        if not queue:
+            del self.buckets[bucket]
+        return True
+
+    def __len__(self) -> int:
+        return len(self.waiting)
+
+
+class GameServer:
+    """Single-threaded selector loop serving all rooms, players and spectators."""
+
+    def __init__(self, host: str = server, port: int = port, metrics: Optional[Metrics] = None,
+                 record_log: Optional[GameLog] = None, bot_workers: int = 0) -> None:
+        self.sel = selectors.DefaultSelector()
+        self.record_log = record_log  # append every finished (or abandoned) game here
+        self.rooms: Dict[str, Room] = {}
+        self.clients: Set[Client] = set()
+        self.codes = CodePool()
+        self.match_queue = MatchQueue()
+        self.metrics = metrics or Metrics()
+        self.metrics.gauge("connections_open", lambda: len(self.clients))
+        self.metrics.gauge("rooms_active", lambda: len(self.rooms))
+        self.metrics.gauge("matchmaking_waiting", lambda: len(self.match_queue))
+        self.metrics.gauge("games_in_progress", lambda: sum(
+            1 for r in list(self.rooms.values()) if r.state is not None and not r.state.is_over()))
+        self.metrics.gauge("send_queue_bytes", lambda: sum(c.pending for c in list(self.clients)))
+        self.metrics.gauge("send_queue_max_bytes", lambda: max((c.pending for c in list(self.clients)), default=0))
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((host, port))
+        self.listener.listen(socket.SOMAXCONN)
+        self.listener.setblocking(False)
+        self.sel.register(self.listener, selectors.EVENT_READ, None)
+
+        # Bot moves come back on pool threads; a byte on this socket pair wakes select()
+        self.bots: Optional[BotPool] = None
+        if bot_workers > 0:
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._wake_r.setblocking(False)
+            self._wake_w.setblocking(False)
+            self.sel.register(self._wake_r, selectors.EVENT_READ, _WAKE)
+            self.bots = BotPool(bot_workers, on_ready=self._wake)
+            self.metrics.gauge("bot_requests_queued", lambda: self.bots.queued)
+            self.metrics.gauge("bot_searches_running", lambda: self.bots.busy)
+
+    # ---- Event loop ----
+    def serve_forever(self) -> None:
+        log.info("Waiting for connection, server started.")
+        try:
+            while True:
+                for key, events in self.sel.select():
+                    if key.data is None:
+                        self._accept()
+                        continue
+                    if key.data is _WAKE:
+                        self._bot_moves()
+                        continue
+                    client: Client = key.data
+                    if client.closed:
+                        continue
+                    if events & selectors.EVENT_WRITE:
+                        self._flush(client)
+                    if events & selectors.EVENT_READ and not client.closed:
+                        self._read(client)
+        finally:
+            if self.bots is not None:
+                self.bots.close()
+            self.sel.close()
+            self.listener.close()
+
+    def _accept(self) -> None:
+        try:
+            conn, addr = self.listener.accept()
+        except BlockingIOError:
+            return
+        log.debug("Connected to: %s", addr)
+        conn.setblocking(False)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = Client(conn, addr)
+        self.clients.add(client)
+        self.metrics.inc("connections")
+        self.sel.register(conn, selectors.EVENT_READ, client)
+        self.send_line(client, "CONNECTED")
+
+    def _read(self, client: Client) -> None:
+        try:
+            chunk = client.conn.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            log.debug("Error with %s: %s", client.addr, e)
+            self.metrics.inc("recv_errors")
+            self.drop(client)
+            return
+        if not chunk:
+            log.debug("Disconnected: %s", client.addr)
+            self.drop(client)
+            return
+
+        # Messages are newline-terminated; keep any partial line for the next recv
+        client.inbuf += chunk
+        *lines, client.inbuf = client.inbuf.split(b"\n")
+        for raw in lines:
+            data = raw.decode(errors="replace").strip()
+            if not data:
+                continue
+            log.debug("[%s] %s", client.addr, data)
+            started = time.perf_counter()
+            keep = self.handle_message(client, data)
+            command = data.split(":", 1)[0]
+            self.metrics.observe("message_latency_seconds", time.perf_counter() - started,
+                                 command if command in COMMANDS else "OTHER")
+            self.metrics.mark("messages_in")
+            if not keep:
+                self.drop(client)
+            if client.closed:
+                return
+
+    # ---- Output ----
+    def send(self, client: Client, payload: bytes) -> None:
+        """Queue already-encoded bytes for a client, writing as much as possible right away."""
+        if client.closed:
+            return
+        self.metrics.mark("messages_out")
+        if not client.outbuf:
+            try:
+                sent = client.conn.send(payload)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self.metrics.inc("send_errors")
+                self.drop(client)
+                return
+            if sent == len(payload):
+                return
+            payload = memoryview(payload)[sent:]
+            self.sel.modify(client.conn, selectors.EVENT_READ | selectors.EVENT_WRITE, client)
+        client.outbuf.append(payload if isinstance(payload, memoryview) else memoryview(payload))
+        client.pending += len(payload)
+        self.metrics.observe("send_queue_depth_bytes", client.pending, buckets=QUEUE_BUCKETS)
+        if client.pending > client.send_limit:
+            log.warning("[%s] send buffer full (%d bytes), dropping", client.addr, client.pending)
+            self.metrics.inc("slow_clients_dropped")
+            self.drop(client)
+
+    def _flush(self, client: Client) -> None:
+        while client.outbuf:
+            chunk = client.outbuf[0]
+            try:
+                sent = client.conn.send(chunk)
+            except BlockingIOError:
+                return
+            except OSError:
+                self.metrics.inc("send_errors")
+                self.drop(client)
+                return
+            client.pending -= sent
+            if sent < len(chunk):
+                client.outbuf[0] = chunk[sent:]
+                return
+            client.outbuf.popleft()
+        self.sel.modify(client.conn, selectors.EVENT_READ, client)
+
+    def send_line(self, client: Client, message: str) -> None:
+        """Send one newline-terminated protocol message."""
+        self.send(client, str.encode(message + "\n"))
+
+    def broadcast(self, room: Room, message: str, sender: Optional[Client] = None, spectators: bool = True) -> None:
+        """Encode once and fan out to the room's players (and spectators)."""
+        payload = str.encode(message + "\n")
+        for p in room.players:
+            if p and p is not sender:
+                self.send(p, payload)
+        if spectators:
+            # Copy: a slow spectator may be dropped (and removed) while we iterate
+            for watcher in list(room.spectators):
+                self.send(watcher, payload)
 
-try:
-    s.bind((server, port))
-except socket.error as e:
-    print(e)
-    s.close()
-    sys.exit(1)
+    def drop(self, client: Client) -> None:
+        if client.closed:
+            return
+        client.closed = True
+        self.clients.discard(client)
+        try:
+            self.sel.unregister(client.conn)
+        except (KeyError, ValueError):
+            pass
+        try:
+            client.conn.close()
+        except OSError:
+            pass
+        self._leave_room(client)
 
-s.listen(10)
-print("Waiting for connection, server started.")
+    def _leave_room(self, client: Client) -> None:
+        self.match_queue.remove(client)
+        room = self.rooms.get(client.room_code) if client.room_code else None
+        if room is not None:
+            if client.role == SPECTATOR:
+                room.spectators.discard(client)
+            elif client.role in (1, 2) and room.players[client.role - 1] is client:
+                room.players[client.role - 1] = None
+                room.ready[client.role - 1] = False
+                room.end_recording()
+                # Remove empty room
+                if room.is_empty():
+                    for watcher in list(room.spectators):
+                        self.send_line(watcher, "LEFT")
+                    if room.bot is not None:
+                        self.bots.cancel(room.code)
+                    del self.rooms[room.code]
+                    self.codes.release(room.code)
+        client.room_code = None
+        client.role = None
 
-rooms = {} # {code: [host_conn, client_conn]}
-lock = False
+    # ---- Protocol ----
+    def handle_message(self, client: Client, data: str) -> bool:
+        """Process one protocol line; returns False when the client should be disconnected."""
+        if data == "HOST" or data.startswith("HOST:"):
+            # Plain HOST gets a server-allocated code; HOST:<code> claims a specific one.
+            # The client only leaves its current room once it has the new code.
+            if data == "HOST":
+                code = self.codes.allocate()
+                if code is None:
+                    self.send_line(client, "ERR:No free room codes!")
+                    return True
+            else:
+                code = data.split(":", 1)[1]
+                if not self.codes.valid(code):
+                    self.send_line(client, "ERR:Invalid room code!")
+                    return True
+                if not self.codes.reserve(code):
+                    self.send_line(client, "ERR:Room code in use!")
+                    return True
+            self._leave_room(client)
+            self.rooms[code] = Room(code, client)
+            client.room_code, client.role = code, 1
+            self.send_line(client, f"HOSTED:{code}")
+            log.debug("[ROOM %s] Host created", code)
 
-def broadcast(room_code, message, sender=None):
-    players = rooms.get(room_code, [])
-    for p in players[:2]:
-        if p and p != sender:
+        elif data == "QUICKMATCH" or data.startswith("QUICKMATCH:"):
             try:
-                p.send(str.encode(message))
-            except Exception:
+                rating = int(data.split(":")[1]) if ":" in data else 0
+            except ValueError:
+                rating = 0
+            self._leave_room(client)
+            opponent = self.match_queue.pair(client, min(max(0, rating), MAX_RATING))
+            if opponent is None:
+                self.send_line(client, "QUEUED")
+                return True
+            code = self.codes.allocate()
+            if code is None:
+                self.send_line(client, "ERR:No free room codes!")
+                self.send_line(opponent, "ERR:No free room codes!")
+                return True
+            # The player who waited longer hosts and moves first
+            room = self.rooms[code] = Room(code, opponent)
+            room.players[1] = client
+            opponent.room_code, opponent.role = code, 1
+            client.room_code, client.role = code, 2
+            self.metrics.inc("quick_matches")
+            self.send_line(opponent, f"MATCHED:{code}")
+            self.send_line(client, f"MATCHED:{code}")
+            self._start_game(room)
+
+        elif data == "BOT" or data.startswith("BOT:"):
+            # A room against the server's engine: the client is player 1 and the game starts at once
+            level = data.split(":")[1] if ":" in data else "normal"
+            if self.bots is None:
+                self.send_line(client, "ERR:No bots on this server!")
+                return True
+            if level not in engines.DIFFICULTIES:
+                self.send_line(client, "ERR:Unknown bot level!")
+                return True
+            self._leave_room(client)
+            code = self.codes.allocate()
+            if code is None:
+                self.send_line(client, "ERR:No free room codes!")
+                return True
+            room = self.rooms[code] = Room(code, client)
+            room.bot = level
+            client.room_code, client.role = code, 1
+            self.metrics.inc("bot_games")
+            self.send_line(client, f"HOSTED:{code}")
+            log.debug("[ROOM %s] Bot room (%s)", code, level)
+            self._start_game(room)
+
+        elif data.startswith("JOIN:"):
+            code = data.split(":")[1]
+            room = self.rooms.get(code)
+            if room is not None and client.room_code == code:
+                self.send_line(client, "ERR:Already in this room!")
+            elif room is not None and room.players[1] is None and room.bot is None:
+                self._leave_room(client)
+                room.players[1] = client
+                client.room_code, client.role = code, 2
+                if room.players[0]:
+                    self.send_line(room.players[0], "JOINED")
+                log.debug("[ROOM %s] Player 2 joined", code)
+            else:
+                self.send_line(client, "ERR:Invalid code / room is full!")
+
+        elif data.startswith("WATCH:"):
+            code = data.split(":")[1]
+            room = self.rooms.get(code)
+            if room is None:
+                self.send_line(client, "ERR:No such room!")
+            elif len(room.spectators) >= MAX_SPECTATORS:
+                self.send_line(client, "ERR:Too many spectators!")
+            else:
+                self._leave_room(client)
+                room.spectators.add(client)
+                client.room_code, client.role = code, SPECTATOR
+                self.send_line(client, f"WATCHING:{code}")
+                # Catch the spectator up with the game so far
+                if room.state is not None:
+                    self.send_line(client, f"SYNC:{room.state.move_string()}")
+                log.debug("[ROOM %s] Spectator joined (%d watching)", code, len(room.spectators))
+
+        elif data == "READY":
+            room = self._player_room(client)
+            if room is None or (room.state is not None and not room.state.is_over()):
+                return True  # a game in progress is not restarted
+            room.ready[client.role - 1] = True
+            log.debug("[ROOM %s] Player %d ready", room.code, client.role)
+
+            if all(room.ready) and room.is_full():
+                self._start_game(room)
+
+        elif data == "CANCEL":
+            if self.match_queue.remove(client):
+                self.send_line(client, "UNQUEUED")
+                return True
+            room = self._player_room(client)
+            if room is None:
+                return True
+            room.ready[client.role - 1] = False
+            log.debug("[ROOM %s] Player %d not ready", room.code, client.role)
+
+        elif data.startswith("MOVE:"):
+            self.handle_move(client, data)
+
+        elif data == "QUIT":
+            room = self.rooms.get(client.room_code) if client.room_code else None
+            if room is not None and client.role != SPECTATOR:
+                self.broadcast(room, "LEFT", client)
+            return False
+
+        elif data == "LEAVE":
+            return False
+
+        return True
+
+    def _start_game(self, room: Room) -> None:
+        room.reset_game(self.record_log)
+        room.ready = [True, True]
+        for role, player in enumerate(room.players, 1):
+            if player is not None:
+                self.send_line(player, f"ROLE:{role}")
+        for watcher in list(room.spectators):
+            self.send_line(watcher, "START")
+        self.metrics.inc("games_started")
+        log.info("[ROOM %s] Game started!", room.code)
+
+    def _player_room(self, client: Client) -> Optional[Room]:
+        if client.role not in (1, 2) or not client.room_code:
+            return None
+        return self.rooms.get(client.room_code)
+
+    def handle_move(self, client: Client, data: str) -> None:
+        """Validate a MOVE:<col> against the authoritative board and publish the result."""
+        room = self._player_room(client)
+        state = room.state if room else None
+        error = None
+        col = -1
+        try:
+            col = int(data.split(":")[1])
+        except (IndexError, ValueError):
+            error = "bad move"
+        if error is None:
+            if state is None:
+                error = "no game in progress"
+            elif state.is_over():
+                error = "game over"
+            elif client.role != state.current_piece:
+                error = "not your turn"
+            elif not state.can_play(col):
+                error = "illegal column"
+
+        if error is not None:
+            self.metrics.inc("moves_rejected")
+            # Reject and resynchronise the sender with the authoritative move list
+            self.send_line(client, f"ERR:{error}")
+            self.send_line(client, f"SYNC:{state.move_string() if state else ''}")
+            return
+
+        self._play(room, col, client)
+
+    def _play(self, room: Room, col: int, sender: Optional[Client]) -> None:
+        """Apply a validated move (sender None for the bot) and announce it and any result."""
+        state = room.state
+        state.play(col)
+        if room.recorder is not None:
+            room.recorder.move(col)
+        self.metrics.inc("moves")
+        self.broadcast(room, f"MOVE:{col}", sender)
+        if state.winner is not None:
+            self.broadcast(room, f"WIN:{state.winner}")
+            self.metrics.inc("games_finished")
+            log.info("[ROOM %s] Player %d wins (%s)", room.code, state.winner, state.move_string())
+        elif state.is_full():
+            self.broadcast(room, "DRAW")
+            self.metrics.inc("games_finished")
+            log.info("[ROOM %s] Draw (%s)", room.code, state.move_string())
+        if state.is_over():
+            if room.recorder is not None:
+                room.recorder.finish(state.winner or DRAW)
+                room.recorder = None
+            # Both players must READY again for a rematch (a bot always is)
+            room.ready = [False, room.bot is not None]
+        elif room.bot is not None and state.current_piece == 2:
+            self.bots.submit(room.code, BOT_ENGINE, engines.DIFFICULTIES[room.bot], state.move_string(),
+                             BOT_TIME_MS[room.bot], tag=state)
+
+    # ---- Bots ----
+    def _wake(self) -> None:
+        """Called from a pool thread when a bot move is ready."""
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass  # buffer full: select() is already due to wake
+
+    def _bot_moves(self) -> None:
+        try:
+            while self._wake_r.recv(4096):
                 pass
+        except BlockingIOError:
+            pass
+        for request, col, waited in self.bots.poll():
+            room = self.rooms.get(request.key)
+            state = room.state if room is not None else None
+            if state is None or state is not request.tag or state.move_string() != request.moves:
+                continue  # the player left or a new game started
+            if col is None or not state.can_play(col):
+                log.warning("[ROOM %s] Bot search failed, playing a random move", room.code)
+                self.metrics.inc("bot_failures")
+                col = random.choice(state.valid_moves())
+            self.metrics.observe("bot_move_seconds", waited, room.bot, buckets=BOT_BUCKETS)
+            self.metrics.inc("bot_moves")
+            self._play(room, col, None)
 
-def threaded_client(conn, addr):
-    print("New connection from: ", addr)
-    conn.send(str.encode("CONNECTED"))
 
-    
-    room_code = None
-    player_role = None # 1 = host / 2 = client
+def self_test() -> None:
+    """Play through the protocol against a server on a spare local port."""
+    import threading
 
-    try:
-        while True:
-            data: str = conn.recv(2048).decode()
-            if not data:
-                print("Disconnected")
-                break
-
-            print(f"[{addr}] {data}")
-            
-            if data.startswith("HOST:"):
-                room_code = data.split(":")[1]
-                rooms[room_code] = [conn, None, False, False]
-                player_role = 1
-                print(f"[ROOM {room_code}] Host created")
-
-            elif data.startswith("JOIN:"):
-                room_code = data.split(":")[1]
-                if room_code in rooms and rooms[room_code][1] is None:
-                    rooms[room_code][1] = conn
-                    player_role = 2
-                    host_conn = rooms[room_code][0]
-                    try:
-                        host_conn.send(str.encode("JOINED"))
-                    except:
-                        pass
-                    print(f"[ROOM {room_code}] Player 2 joined")
-                else:
-                    conn.sendall(str.encode("Invalid code / room is full!"))
-
-            elif data == "READY":
-                if not room_code or room_code not in rooms:
-                    continue
-
-                if player_role == 1:
-                    rooms[room_code][2] = True
-                elif player_role == 2:
-                    rooms[room_code][3] = True
-                print(f"[ROOM {room_code}] Player {player_role} ready")
-                print(rooms[room_code])
-
-                if rooms[room_code][2] and rooms[room_code][3]:
-                    p1, p2, *_ = rooms[room_code]
-                    p1.sendall(str.encode("ROLE:1"))
-                    p2.sendall(str.encode("ROLE:2"))
-                    # p1.sendall(str.encode("START"))
-                    # p2.sendall(str.encode("START"))
-                    print(f"[ROOM {room_code}] Game started!")
-
-            elif data == "CANCEL":
-                if not room_code or room_code not in rooms:
-                    continue
-                if player_role == 1:
-                    rooms[room_code][2] = False
-                elif player_role == 2:
-                    rooms[room_code][3] = False
-                print(f"[ROOM {room_code}] Player {player_role} not ready")
-
-            elif data.startswith("MOVE:"):
-                broadcast(room_code, data, conn)
-            elif data == "QUIT":
-                broadcast(room_code, "LEFT", conn)
-                break
-
-            elif data == "LEAVE":
-                break
-    except Exception as e:
-        print(f"Error with {addr}: {e}")
-    finally:
+    game_server = GameServer("127.0.0.1", 0)
+    threading.Thread(target=game_server.serve_forever, daemon=True).start()
+    address = game_server.listener.getsockname()
+
+    def connect():
+        conn = socket.create_connection(address, timeout=5)
+        lines = conn.makefile("r")
+        assert lines.readline().strip() == "CONNECTED"
+        return conn, lines
+
+    def send(conn, message: str) -> None:
+        conn.sendall((message + "\n").encode())
+
+    def expect(lines, message: str) -> None:
+        got = lines.readline().strip()
+        assert got == message, f"expected {message!r}, got {got!r}"
+
+    (host, host_in), (guest, guest_in) = connect(), connect()
+    send(host, "HOST")
+    code = host_in.readline().strip().split(":")[1]
+    send(guest, f"JOIN:{code}")
+    expect(host_in, "JOINED")
+    send(host, "READY")
+    send(guest, "READY")
+    expect(host_in, "ROLE:1")
+    expect(guest_in, "ROLE:2")
+
+    # Player 1 wins vertically in column 0
+    for i, col in enumerate((0, 1, 0, 1, 0, 1, 0)):
+        mover, other = (host, guest_in) if i % 2 == 0 else (guest, host_in)
+        send(mover, f"MOVE:{col}")
+        expect(other, f"MOVE:{col}")
+    for lines in (host_in, guest_in):
+        expect(lines, "WIN:1")
+
+    # No moves after the game; the sender is resynchronised
+    send(host, "MOVE:3")
+    expect(host_in, "ERR:game over")
+    expect(host_in, "SYNC:1212121")
+
+    # The rematch starts once both players are READY again
+    send(host, "READY")
+    send(guest, "READY")
+    expect(host_in, "ROLE:1")
+    expect(guest_in, "ROLE:2")
+    send(host, "MOVE:3")
+    expect(guest_in, "MOVE:3")
+
+    # READY during a game does not restart it
+    send(guest, "READY")
+    send(guest, "MOVE:3")
+    expect(host_in, "MOVE:3")
+
+    # Client-chosen room codes must look like allocated ones
+    for bad in ("", "abcde", "123", "00000", "1234567"):
+        send(host, f"HOST:{bad}")
+        expect(host_in, "ERR:Invalid room code!")
+    # Failed HOST and JOIN requests leave the room as it was
+    send(host, f"HOST:{code}")
+    expect(host_in, "ERR:Room code in use!")
+    send(guest, f"JOIN:{code}")
+    expect(guest_in, "ERR:Already in this room!")
+    send(host, f"JOIN:{code}")
+    expect(host_in, "ERR:Already in this room!")
+    send(host, "MOVE:4")
+    expect(guest_in, "MOVE:4")
+
+    for conn in (host, guest):
+        send(conn, "LEAVE")
         conn.close()
 
-        if room_code in rooms:
-            if player_role == 1:
-                rooms[room_code][0] = None
-            elif player_role == 2:
-                rooms[room_code][1] = None
-            # Remove empty room
-            if not rooms[room_code][0] and not rooms[room_code][1]:
-                del rooms[room_code]
-
-while True:
-    conn, addr = s.accept()
-    print(f"Connected to: {addr}")
-    start_new_thread(threaded_client, (conn, addr))
\ No newline at end of file
+    # The match queue keeps no empty buckets
+    queue = MatchQueue()
+    a, b = Client(None, None), Client(None, None)
+    assert queue.pair(a, 5 * RATING_BUCKET) is None and queue.pair(b, 9 * RATING_BUCKET) is None
+    assert queue.pair(Client(None, None), 5 * RATING_BUCKET) is a
+    assert queue.remove(b) and not queue.buckets and len(queue) == 0
+    print("Server self-tests passed.")
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Connect Four game server")
+    parser.add_argument("--host", default=server, help="address to bind (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=port, help="port to listen on (default: %(default)s)")
+    parser.add_argument("--log-level", default="INFO", help="DEBUG logs every message (default: %(default)s)")
+    parser.add_argument("--metrics-port", type=int, default=9100,
+                        help="local HTTP metrics port, 0 to disable (default: %(default)s)")
+    parser.add_argument("--metrics-json", metavar="PATH", help="periodically dump metrics as JSON to PATH")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="seconds between JSON dumps")
+    parser.add_argument("--record", metavar="PATH", help="append every game to the game log at PATH (e.g. records/server.c4log)")
+    parser.add_argument("--bot-workers", type=int, default=os.cpu_count() or 1,
+                        help="processes serving bot moves for all bot rooms, 0 disables bots (default: CPU count)")
+    parser.add_argument("--test", action="store_true", help="run protocol self-tests and exit")
+    args = parser.parse_args(argv)
+
+    if args.test:
+        self_test()
+        return
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    metrics = Metrics()
+    try:
+        game_server = GameServer(args.host, args.port, metrics, GameLog(args.record) if args.record else None,
+                                 args.bot_workers)
+    except socket.error as e:
+        log.error("%s", e)
+        sys.exit(1)
+    if args.metrics_port:
+        try:
+            start_http_server(metrics, "127.0.0.1", args.metrics_port)
+            log.info("Metrics on http://127.0.0.1:%d/metrics", args.metrics_port)
+        except OSError as e:
+            log.warning("Metrics endpoint disabled: %s", e)
+    if args.metrics_json:
+        start_json_dump(metrics, args.metrics_json, args.metrics_interval)
+    # Exit through serve_forever's cleanup on SIGTERM too, so the bot workers are shut down
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        game_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Fit the evaluation weights of AIStrategy1/AIStrategy2 to self-play results.
+
+Every position of a selfplay.py dataset is turned into the window counts
+that score_position() weighs (open threes, twos, ..., center pieces), once
+for each player, and a logistic regression predicts the game's result from
+them. The fitted coefficients are rescaled so THREE_SCORE keeps its current
+value and printed as constants for the strategy module:
+
+    python tune_weights.py data/selfplay --strategy 1 --out weights1.json
+
+Datasets larger than memory are streamed: shards are read memory-mapped in
+chunks of CHUNK positions, the features are written to memory-mapped files
+(in a temporary directory next to the shards, or --tmp) and every Newton
+step of the fit sums its gradient and Hessian chunk by chunk. Feature
+extraction and fitting are vectorised with NumPy.
+"""
+import argparse
+import importlib
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from BitBoard import COLS, ROWS
+from selfplay import iter_shards
+
+# Feature name -> strategy constant
+CONSTANTS = {
+    "three": "THREE_SCORE",
+    "two": "TWO_SCORE",
+    "one": "ONE_SCORE",
+    "opp_three": "OPP_THREE_SCORE",
+    "opp_two": "OPP_TWO_SCORE",
+    "center": "CENTER_SCORE",
+    "adjacent": "ADJACENT_SCORE",
+}
+
+# Features each strategy's score_position() uses
+STRATEGIES = {
+    1: ["three", "two", "opp_three", "opp_two", "center"],
+    2: ["three", "two", "one", "opp_three", "opp_two", "center", "adjacent"],
+}
+
+CHUNK = 1 << 16  # positions per chunk of work
+
+Chunks = Callable[[], Iterator[Tuple[np.ndarray, np.ndarray]]]
+
+
+def current_weights(strategy: int) -> Dict[str, int]:
+    """The weights AIStrategy<n> uses now, by feature name."""
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    module = importlib.import_module(f"AIStrategy{strategy}")
+    return {name: getattr(module, CONSTANTS[name]) for name in STRATEGIES[strategy]}
+
+
+def _windows() -> np.ndarray:
+    """Cell indices (into the flattened board) of all 69 four-cell windows."""
+    idx = []
+    for r in range(ROWS):
+        for c in range(COLS - 3):
+            idx.append([r * COLS + c + i for i in range(4)])
+    for c in range(COLS):
+        for r in range(ROWS - 3):
+            idx.append([(r + i) * COLS + c for i in range(4)])
+    for r in range(3, ROWS):
+        for c in range(COLS - 3):
+            idx.append([(r - i) * COLS + c + i for i in range(4)])
+    for r in range(ROWS - 3):
+        for c in range(COLS - 3):
+            idx.append([(r + i) * COLS + c + i for i in range(4)])
+    return np.array(idx)
+
+
+WINDOWS = _windows()
+CENTER = np.arange(ROWS) * COLS + COLS // 2
+ADJACENT = np.concatenate([CENTER - 1, CENTER + 1])
+
+
+def window_features(cells: np.ndarray, piece: int, names: List[str]) -> np.ndarray:
+    """(N, 42) boards -> (N, len(names)) feature counts from 'piece''s point of view."""
+    opp = 3 - piece
+    w = cells[:, WINDOWS]
+    mine = (w == piece).sum(axis=2, dtype=np.int8)
+    theirs = (w == opp).sum(axis=2, dtype=np.int8)
+    empty = 4 - mine - theirs
+    columns = {
+        "three": lambda: ((mine == 3) & (empty == 1)).sum(axis=1),
+        "two": lambda: ((mine == 2) & (empty == 2)).sum(axis=1),
+        "one": lambda: ((mine == 1) & (empty == 3)).sum(axis=1),
+        "opp_three": lambda: ((theirs == 3) & (empty == 1)).sum(axis=1),
+        "opp_two": lambda: ((theirs == 2) & (empty == 2)).sum(axis=1),
+        "center": lambda: (cells[:, CENTER] == piece).sum(axis=1),
+        "adjacent": lambda: (cells[:, ADJACENT] == piece).sum(axis=1),
+    }
+    return np.stack([columns[name]() for name in names], axis=1).astype(np.float32)
+
+
+class Dataset:
+    """Features and targets of one split, in memory-mapped .npy files."""
+
+    def __init__(self, path: str, rows: int, features: int) -> None:
+        self.x = np.lib.format.open_memmap(path + ".x.npy", mode="w+", dtype=np.float32, shape=(rows, features))
+        self.y = np.lib.format.open_memmap(path + ".y.npy", mode="w+", dtype=np.float32, shape=(rows,))
+        self.filled = 0
+
+    def __len__(self) -> int:
+        return len(self.y)
+
+    def append(self, x: np.ndarray, y: np.ndarray) -> None:
+        self.x[self.filled:self.filled + len(y)] = x
+        self.y[self.filled:self.filled + len(y)] = y
+        self.filled += len(y)
+
+    def chunks(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        for start in range(0, len(self), CHUNK):
+            yield np.asarray(self.x[start:start + CHUNK]), np.asarray(self.y[start:start + CHUNK])
+
+    def close(self) -> None:
+        # Drop the mappings so the temporary files can be deleted (Windows)
+        del self.x, self.y
+
+
+def _position_chunks(data_dir: str, min_ply: int, holdout: float, seed: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """(positions, hold-out mask) chunks of the dataset; the same split on every pass."""
+    rng = np.random.default_rng(seed)
+    for shard in iter_shards(data_dir):
+        for start in range(0, len(shard), CHUNK):
+            chunk = np.asarray(shard[start:start + CHUNK])
+            chunk = chunk[chunk["ply"] >= min_ply]
+            yield chunk, rng.random(len(chunk)) < holdout
+
+
+def load_dataset(data_dir: str, names: List[str], workdir: str, min_ply: int = 0, holdout: float = 0.0,
+                 seed: int = 0) -> Tuple[Dataset, Dataset]:
+    """Training and hold-out features and targets for every position, seen from both players.
+
+    Target is 1 for the player who went on to win, 0 for the loser and 0.5
+    for both players in a drawn game. Both rows of a position fall into the
+    same split. The arrays are written to files in 'workdir'.
+    """
+    sizes = [0, 0]
+    for chunk, test in _position_chunks(data_dir, min_ply, holdout, seed):
+        sizes[1] += 2 * int(test.sum())
+        sizes[0] += 2 * int(len(chunk) - test.sum())
+    if not sum(sizes):
+        raise SystemExit(f"No shards found in {data_dir}")
+    train = Dataset(os.path.join(workdir, "train"), sizes[0], len(names))
+    test_set = Dataset(os.path.join(workdir, "test"), sizes[1], len(names))
+    for chunk, test in _position_chunks(data_dir, min_ply, holdout, seed):
+        for dataset, rows in ((train, chunk[~test]), (test_set, chunk[test])):
+            cells, result = rows["cells"], rows["result"]
+            for piece in (1, 2):
+                dataset.append(window_features(cells, piece, names),
+                               np.where(result == 0, 0.5, (result == piece).astype(np.float32)))
+    return train, test_set
+
+
+def fit_logistic(chunks: Chunks, l2: float = 1e-4, iterations: int = 50) -> np.ndarray:
+    """Logistic regression without intercept (the evaluation has none), by Newton's method.
+
+    'chunks' returns a fresh iterator of (features, targets) chunks; each
+    step makes one pass over them.
+    """
+    w = None
+    for _ in range(iterations):
+        n, grad, hess = 0, 0.0, 0.0
+        for x, y in chunks():
+            x = x.astype(np.float64)
+            if w is None:
+                w = np.zeros(x.shape[1])
+            p = 1.0 / (1.0 + np.exp(-(x @ w)))
+            n += len(y)
+            grad = grad + x.T @ (p - y)
+            hess = hess + (x * (p * (1.0 - p))[:, None]).T @ x
+        if w is None:
+            raise ValueError("no data to fit")
+        k = len(w)
+        step = np.linalg.solve(hess / n + l2 * np.eye(k), grad / n + l2 * w)
+        w -= step
+        if np.abs(step).max() < 1e-9:
+            break
+    return w
+
+
+def log_loss(chunks: Chunks, w: np.ndarray) -> float:
+    total, n = 0.0, 0
+    for x, y in chunks():
+        p = np.clip(1.0 / (1.0 + np.exp(-(x.astype(np.float64) @ w))), 1e-12, 1 - 1e-12)
+        total += float(-np.sum(y * np.log(p) + (1 - y) * np.log(1 - p)))
+        n += len(y)
+    return total / n
+
+
+def tune(data_dir: str, strategy: int, l2: float = 1e-4, holdout: float = 0.1, min_ply: int = 0,
+         seed: int = 0, workdir: Optional[str] = None) -> Dict:
+    current = current_weights(strategy)
+    names = list(current)
+    w_now = np.array([current[name] for name in names], dtype=np.float64)
+    with tempfile.TemporaryDirectory(prefix=".features-", dir=workdir or data_dir) as tmp:
+        started = time.perf_counter()
+        train, test = load_dataset(data_dir, names, tmp, min_ply, holdout, seed)
+        loaded = time.perf_counter() - started
+
+        w = fit_logistic(train.chunks, l2)
+        # Baseline: the hand-picked weights with the best single scale factor
+        scale = fit_logistic(lambda: (((x @ w_now)[:, None], y) for x, y in train.chunks()), l2)[0]
+        loss = {
+            "tuned": log_loss(test.chunks, w) if len(test) else None,
+            "current": log_loss(test.chunks, w_now * scale) if len(test) else None,
+        }
+        positions = (len(train) + len(test)) // 2
+        train.close()
+        test.close()
+
+    # Express the fit in the strategy's units: keep THREE_SCORE where it is
+    units = current["three"] / w[names.index("three")]
+    return {
+        "strategy": strategy,
+        "positions": positions,
+        "load_seconds": round(loaded, 2),
+        "coefficients": {name: float(c) for name, c in zip(names, w)},
+        "weights": {CONSTANTS[name]: int(round(c * units)) for name, c in zip(names, w)},
+        "current": {CONSTANTS[name]: v for name, v in current.items()},
+        "holdout_log_loss": loss,
+    }
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Fit evaluation weights to self-play data")
+    parser.add_argument("data", help="directory with selfplay.py shards")
+    parser.add_argument("--strategy", type=int, choices=sorted(STRATEGIES), default=1,
+                        help="which strategy's features to fit (default: %(default)s)")
+    parser.add_argument("--l2", type=float, default=1e-4, help="L2 regularisation (default: %(default)s)")
+    parser.add_argument("--holdout", type=float, default=0.1, help="fraction kept for validation (default: %(default)s)")
+    parser.add_argument("--min-ply", type=int, default=0, help="skip positions before this ply (default: %(default)s)")
+    parser.add_argument("--out", metavar="PATH", help="also write the result as JSON")
+    parser.add_argument("--tmp", metavar="DIR", help="where to keep the feature files (default: the data directory)")
+    args = parser.parse_args(argv)
+
+    result = tune(args.data, args.strategy, args.l2, args.holdout, args.min_ply, workdir=args.tmp)
+    print(f"{result['positions']} positions (loaded in {result['load_seconds']} s)")
+    loss = result["holdout_log_loss"]
+    if loss["tuned"] is not None:
+        print(f"hold-out log loss: tuned {loss['tuned']:.4f}, current {loss['current']:.4f}")
+    print(f"# AIStrategy{args.strategy} weights (current value in brackets)")
+    for name, value in result["weights"].items():
+        print(f"{name} = {value}  # ({result['current'][name]})")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()